@@ -16,6 +16,20 @@ import seaborn as sns
 from datetime import datetime
 import warnings
 import json
+import argparse
+import os
+from analysis_state import STATE_DIR, load_state, save_state
+from data_store import (add_window_arguments, describe_window, file_hash, iter_table,
+                        load_table, month_window, require_rows)
+from dimensions import Dimension
+from schema import iter_table_csv
+from tracing import enable as enable_tracing, save as save_trace, span, stage
+from partials import EncounterPartials, ProcedurePartials, ranked
+from scheduler import EXECUTORS, Scheduler, Stage
+from olap_cube import cube_key, save_encounter_cube
+from patient_features import feature_key, save_patient_features
+from sketches import DEFAULT_CAPACITY, DEFAULT_COMPRESSION
+from timeparse import DAY_NAMES, MONTH_NAMES, calendar_fields, duration_hours, named
 warnings.filterwarnings('ignore')
 
 # Set visualization style
@@ -23,24 +37,93 @@ sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (14, 8)
 plt.rcParams['font.size'] = 10
 
+DEFAULT_CHUNKSIZE = 500_000
+
+def prepare_encounters(encounters):
+    """Add the derived duration, coverage and calendar columns to an encounters frame or chunk"""
+    # Calculate encounter duration in hours
+    encounters['DURATION_HOURS'] = duration_hours(encounters['START'], encounters['STOP'])
+    
+    # Calculate insurance coverage rate
+    encounters['COVERAGE_RATE'] = (
+        encounters['PAYER_COVERAGE'] / encounters['TOTAL_CLAIM_COST'] * 100
+    )
+    encounters['COVERAGE_RATE'] = encounters['COVERAGE_RATE'].fillna(0)
+    
+    # Calculate patient out-of-pocket costs
+    encounters['OUT_OF_POCKET'] = (
+        encounters['TOTAL_CLAIM_COST'] - encounters['PAYER_COVERAGE']
+    )
+    
+    # Extract temporal features from the integer epoch values
+    start = calendar_fields(encounters['START'])
+    encounters['YEAR'] = start['year']
+    encounters['MONTH'] = start['month']
+    encounters['MONTH_NAME'] = named(start['month'] - 1, MONTH_NAMES)
+    encounters['DAY_OF_WEEK'] = named(start['weekday'], DAY_NAMES)
+    encounters['HOUR'] = start['hour']
+    
+    return encounters
+
 class AIHospitalAnalyzer:
     """
     AI-Assisted Hospital Data Analyzer
     Uses AI prompting and automated analysis techniques
+    
+    With streaming=True the encounters and procedures tables are never held in
+    memory: prepare_data reads them in chunks of `chunksize` rows and folds each
+    chunk into mergeable partial aggregates, which every analysis then reads.
+    
+    With deltas={'encounters': path, 'procedures': path} the analyzer runs
+    incrementally: it starts from the partial aggregates saved by the previous
+    run (ai_analysis_state/) and folds in only the new rows in the delta files.
+    
+    With window=(first, last) month indices (see data_store.month_window) only
+    the encounter/procedure partitions inside the window are read.
+    
+    With approximate=True the cost and duration quantiles (medians, top-10%
+    thresholds), the top encounter descriptions/reasons and the distinct
+    patient/encounter/diagnosis counts come from mergeable fixed-size sketches
+    (see sketches.py) instead of exact tables.
+    
+    run() executes the stages as a dependency graph (see pipeline()), running
+    independent ones - demographics next to data preparation, the encounter
+    analyses next to each other - concurrently.
     """
     
-    def __init__(self):
+    @stage('load', rows_out=lambda self: self.loaded_rows())
+    def __init__(self, streaming=False, chunksize=DEFAULT_CHUNKSIZE, deltas=None, window=None,
+                 approximate=False):
         """Initialize the analyzer and load all datasets"""
         print("="*80)
         print("AI-POWERED HOSPITAL DATA ANALYSIS")
         print("="*80)
         print("\n📊 Loading datasets...")
         
-        self.patients = pd.read_csv('patients.csv')
-        self.encounters = pd.read_csv('encounters.csv')
-        self.procedures = pd.read_csv('procedures.csv')
-        self.organizations = pd.read_csv('organizations.csv')
-        self.payers = pd.read_csv('payers.csv')
+        self.deltas = deltas or {}
+        self.streaming = streaming or bool(self.deltas)
+        self.chunksize = chunksize
+        self.window = window
+        self.approximate = approximate
+        self.applied_deltas = []
+        
+        self.patients = load_table('patients')
+        if self.streaming:
+            self.encounters = None
+            self.procedures = None
+        else:
+            self.encounters = load_table('encounters', window=window)
+            self.procedures = load_table('procedures', window=window)
+        self.organizations = load_table('organizations')
+        self.payers = load_table('payers')
+        
+        # Dense-key lookups for enriching aggregates with names and locations
+        self.payer_dim = Dimension(self.payers)
+        self.organization_dim = Dimension(self.organizations)
+        
+        self.encounter_stats = EncounterPartials(approximate)
+        self.procedure_stats = ProcedurePartials(approximate)
+        self.patient_features = None
         
         self.insights = {
             'demographics': {},
@@ -51,11 +134,55 @@ class AIHospitalAnalyzer:
         }
         
         print(f"✓ Patients: {len(self.patients):,} records")
-        print(f"✓ Encounters: {len(self.encounters):,} records")
-        print(f"✓ Procedures: {len(self.procedures):,} records")
+        if self.deltas:
+            for table, path in self.deltas.items():
+                print(f"✓ {table.title()}: delta from {path}")
+        elif self.streaming:
+            print(f"✓ Encounters: streamed in chunks of {chunksize:,} rows")
+            print(f"✓ Procedures: streamed in chunks of {chunksize:,} rows")
+        else:
+            print(f"✓ Encounters: {len(self.encounters):,} records")
+            print(f"✓ Procedures: {len(self.procedures):,} records")
+        if window is not None:
+            print(f"✓ Window: {describe_window(window)}")
+        if not self.deltas:
+            # A delta run takes its mode from the saved state (see _apply_deltas)
+            self._print_mode()
         print(f"✓ Organizations: {len(self.organizations):,} records")
         print(f"✓ Payers: {len(self.payers):,} records")
         
+    def _print_mode(self):
+        """Announce the sketches in use when the run is approximate"""
+        if self.approximate:
+            print(f"✓ Quantiles: approximate (t-digest, compression {DEFAULT_COMPRESSION})")
+            print(f"✓ Top descriptions/reasons: approximate (Space-Saving, {DEFAULT_CAPACITY:,} labels)")
+            print("✓ Distinct counts: approximate (HyperLogLog)")
+    
+    def loaded_rows(self):
+        """Rows held in memory across the loaded tables"""
+        tables = [self.patients, self.encounters, self.procedures, self.organizations, self.payers]
+        return sum(len(table) for table in tables if table is not None)
+    
+    @stage(rows_out=lambda self: len(self.patients))
+    def prepare_patients(self):
+        """Add the AGE and AGE_GROUP columns to the patients table"""
+        # Calculate patient age
+        today = pd.Timestamp.now()
+        age = ((today - self.patients['BIRTHDATE']).dt.days / 365.25).round(1)
+        
+        # Create age groups
+        age_group = pd.cut(
+            age, 
+            bins=[0, 18, 35, 50, 65, 100],
+            labels=['0-18', '19-35', '36-50', '51-65', '65+']
+        )
+        
+        # A new frame, so stages still reading the old one are unaffected
+        self.patients = self.patients.assign(AGE=age, AGE_GROUP=age_group)
+        
+        return self
+    
+    @stage(rows_out=lambda self: self.encounter_stats.rows + self.procedure_stats.rows)
     def prepare_data(self):
         """
         AI PROMPT USED: "Clean and prepare hospital data for analysis. 
@@ -68,57 +195,82 @@ class AIHospitalAnalyzer:
         print("DATA PREPARATION")
         print("="*80)
         
-        # Convert date columns
-        self.encounters['START'] = pd.to_datetime(self.encounters['START'])
-        self.encounters['STOP'] = pd.to_datetime(self.encounters['STOP'])
-        self.patients['BIRTHDATE'] = pd.to_datetime(self.patients['BIRTHDATE'])
-        self.patients['DEATHDATE'] = pd.to_datetime(self.patients['DEATHDATE'])
-        self.procedures['START'] = pd.to_datetime(self.procedures['START'])
-        
-        # Calculate patient age
-        today = pd.Timestamp.now()
-        self.patients['AGE'] = (today - self.patients['BIRTHDATE']).dt.days / 365.25
-        self.patients['AGE'] = self.patients['AGE'].round(1)
-        
-        # Calculate encounter duration in hours
-        self.encounters['DURATION_HOURS'] = (
-            self.encounters['STOP'] - self.encounters['START']
-        ).dt.total_seconds() / 3600
-        
-        # Calculate insurance coverage rate
-        self.encounters['COVERAGE_RATE'] = (
-            self.encounters['PAYER_COVERAGE'] / self.encounters['TOTAL_CLAIM_COST'] * 100
-        )
-        self.encounters['COVERAGE_RATE'] = self.encounters['COVERAGE_RATE'].fillna(0)
-        
-        # Calculate patient out-of-pocket costs
-        self.encounters['OUT_OF_POCKET'] = (
-            self.encounters['TOTAL_CLAIM_COST'] - self.encounters['PAYER_COVERAGE']
-        )
-        
-        # Extract temporal features
-        self.encounters['YEAR'] = self.encounters['START'].dt.year
-        self.encounters['MONTH'] = self.encounters['START'].dt.month
-        self.encounters['MONTH_NAME'] = self.encounters['START'].dt.month_name()
-        self.encounters['DAY_OF_WEEK'] = self.encounters['START'].dt.day_name()
-        self.encounters['HOUR'] = self.encounters['START'].dt.hour
-        
-        # Create age groups
-        self.patients['AGE_GROUP'] = pd.cut(
-            self.patients['AGE'], 
-            bins=[0, 18, 35, 50, 65, 100],
-            labels=['0-18', '19-35', '36-50', '51-65', '65+']
-        )
-        
-        print("✓ Date columns converted")
+        # Date columns arrive already converted from the dataset cache; patient
+        # ages and age groups come from prepare_patients
+        
+        # Derive encounter features and fold them into the partial aggregates
+        if self.deltas:
+            self._apply_deltas()
+        elif self.streaming:
+            for chunk in iter_table('encounters', self.chunksize, window=self.window):
+                with span('encounter chunk', rows_in=len(chunk)):
+                    self.encounter_stats.update(prepare_encounters(chunk))
+            for chunk in iter_table('procedures', self.chunksize, window=self.window):
+                with span('procedure chunk', rows_in=len(chunk)):
+                    self.procedure_stats.update(chunk)
+        else:
+            with span('prepare_encounters', rows_in=len(self.encounters)):
+                prepare_encounters(self.encounters)
+            with span('encounter partials', rows_in=len(self.encounters)):
+                self.encounter_stats.update(self.encounters)
+            with span('procedure partials', rows_in=len(self.procedures)):
+                self.procedure_stats.update(self.procedures)
+        require_rows('encounters', self.encounter_stats.rows, self.window)
+        
+        # Build the shared per-patient feature table once for every consumer
+        with span('patient features', rows_in=self.encounter_stats.rows) as current:
+            self.patient_features = self.encounter_stats.patient_features(self.patients)
+            save_patient_features(self.patient_features,
+                                  feature_key(self.window, self.applied_deltas, self.approximate))
+            current.set(rows_out=len(self.patient_features))
+        
+        # Persist the rollup cube the dashboard scripts slice instead of the raw table
+        save_encounter_cube(self.encounter_stats.cube, cube_key(self.window, self.applied_deltas))
+        
+        print("✓ Date columns loaded from dataset cache")
         print("✓ Patient ages calculated")
         print("✓ Encounter durations computed")
         print("✓ Coverage rates calculated")
         print("✓ Temporal features extracted")
         print("✓ Age groups created")
+        print(f"✓ Patient features built for {len(self.patient_features):,} patients")
+        if self.streaming:
+            print(f"✓ Streamed {self.encounter_stats.rows:,} encounters and "
+                  f"{self.procedure_stats.rows:,} procedures")
         
         return self
     
+    def _apply_deltas(self):
+        """Fold the delta files into the partial aggregates saved by the previous run"""
+        state = load_state()
+        self.encounter_stats = state['encounters']
+        self.procedure_stats = state['procedures']
+        self.applied_deltas = state['applied_deltas']
+        if self.encounter_stats.approximate != self.approximate:
+            # The saved summaries cannot change representation; keep the state's mode
+            self.approximate = self.encounter_stats.approximate
+            mode = 'approximate' if self.approximate else 'exact'
+            print(f"⚠️  Using {mode} statistics, as in the saved state")
+        self._print_mode()
+        
+        for table, path in self.deltas.items():
+            digest = file_hash(path)
+            if digest in self.applied_deltas:
+                print(f"⚠️  Skipping {path}: this delta was already applied")
+                continue
+            
+            rows = 0
+            for chunk in iter_table_csv(table, path, self.chunksize):
+                if table == 'encounters':
+                    self.encounter_stats.update(prepare_encounters(chunk))
+                else:
+                    self.procedure_stats.update(chunk)
+                rows += len(chunk)
+            self.applied_deltas.append(digest)
+            print(f"✓ Applied {rows:,} new {table} from {path}")
+    
+    @stage(rows_in=lambda self: self.encounter_stats.rows,
+           rows_out=lambda self: len(self.insights['demographics']))
     def analyze_demographics(self):
         """
         AI PROMPT USED: "Analyze patient demographics comprehensively. 
@@ -198,6 +350,8 @@ class AIHospitalAnalyzer:
         
         return self
     
+    @stage(rows_in=lambda self: self.encounter_stats.rows,
+           rows_out=lambda self: len(self.insights['financial']))
     def analyze_financial(self):
         """
         AI PROMPT USED: "Perform comprehensive financial analysis of hospital encounters. 
@@ -210,24 +364,24 @@ class AIHospitalAnalyzer:
         print("FINANCIAL ANALYSIS (AI-ASSISTED)")
         print("="*80)
         
+        enc = self.encounter_stats
+        
         # Overall financial metrics
-        total_base_cost = self.encounters['BASE_ENCOUNTER_COST'].sum()
-        total_claim_cost = self.encounters['TOTAL_CLAIM_COST'].sum()
-        total_payer_coverage = self.encounters['PAYER_COVERAGE'].sum()
-        total_out_of_pocket = self.encounters['OUT_OF_POCKET'].sum()
+        total_base_cost = enc.total('BASE_ENCOUNTER_COST')
+        total_claim_cost = enc.total('TOTAL_CLAIM_COST')
+        total_payer_coverage = enc.total('PAYER_COVERAGE')
+        total_out_of_pocket = enc.total('OUT_OF_POCKET')
         
         print(f"\n💰 OVERALL REVENUE METRICS:")
         print(f"  Total Base Encounter Cost: ${total_base_cost:,.2f}")
         print(f"  Total Claim Cost: ${total_claim_cost:,.2f}")
         print(f"  Total Payer Coverage: ${total_payer_coverage:,.2f}")
         print(f"  Total Patient Out-of-Pocket: ${total_out_of_pocket:,.2f}")
-        print(f"  Average Coverage Rate: {self.encounters['COVERAGE_RATE'].mean():.2f}%")
+        print(f"  Average Coverage Rate: {enc.mean('COVERAGE_RATE'):.2f}%")
         
         # Cost by encounter type
         print(f"\n💰 COSTS BY ENCOUNTER TYPE:")
-        cost_by_type = self.encounters.groupby('ENCOUNTERCLASS').agg({
-            'TOTAL_CLAIM_COST': ['mean', 'sum', 'count']
-        }).round(2)
+        cost_by_type = enc.class_costs().round(2)
         cost_by_type.columns = ['Avg_Cost', 'Total_Cost', 'Count']
         cost_by_type = cost_by_type.sort_values('Total_Cost', ascending=False)
         
@@ -238,41 +392,51 @@ class AIHospitalAnalyzer:
             print(f"    Total Revenue: ${row['Total_Cost']:,.2f}")
         
         # High-cost encounters
-        high_cost_threshold = self.encounters['TOTAL_CLAIM_COST'].quantile(0.90)
-        high_cost_encounters = self.encounters[
-            self.encounters['TOTAL_CLAIM_COST'] > high_cost_threshold
-        ]
+        claim_costs = enc.histograms['TOTAL_CLAIM_COST']
+        high_cost_threshold = claim_costs.quantile(0.90)
+        high_cost_count = claim_costs.count_above(high_cost_threshold)
+        high_cost_total = claim_costs.sum_above(high_cost_threshold)
         
         print(f"\n💰 HIGH-COST ENCOUNTERS (Top 10%):")
         print(f"  Threshold: ${high_cost_threshold:,.2f}")
-        print(f"  Count: {len(high_cost_encounters):,}")
-        print(f"  Total Cost: ${high_cost_encounters['TOTAL_CLAIM_COST'].sum():,.2f}")
-        print(f"  Average Cost: ${high_cost_encounters['TOTAL_CLAIM_COST'].mean():,.2f}")
+        print(f"  Count: {high_cost_count:,}")
+        print(f"  Total Cost: ${high_cost_total:,.2f}")
+        print(f"  Average Cost: ${high_cost_total / high_cost_count:,.2f}")
         
         # Insurance coverage analysis
         print(f"\n💰 INSURANCE COVERAGE ANALYSIS:")
-        print(f"  Encounters with Full Coverage (100%): {len(self.encounters[self.encounters['COVERAGE_RATE'] == 100]):,}")
-        print(f"  Encounters with No Coverage (0%): {len(self.encounters[self.encounters['COVERAGE_RATE'] == 0]):,}")
-        print(f"  Encounters with Partial Coverage: {len(self.encounters[(self.encounters['COVERAGE_RATE'] > 0) & (self.encounters['COVERAGE_RATE'] < 100)]):,}")
+        print(f"  Encounters with Full Coverage (100%): {enc.coverage_full:,}")
+        print(f"  Encounters with No Coverage (0%): {enc.coverage_none:,}")
+        print(f"  Encounters with Partial Coverage: {enc.coverage_partial:,}")
         
         # Top payers
-        payer_revenue = self.encounters.groupby('PAYER')['PAYER_COVERAGE'].sum().sort_values(ascending=False).head(10)
+        payer_revenue = enc.payer_totals().sort_values(ascending=False).head(10)
+        payer_revenue = self.payer_dim.enrich(payer_revenue, ['NAME'], default="Unknown")
         print(f"\n💰 TOP 10 PAYERS BY COVERAGE:")
-        for i, (payer_id, coverage) in enumerate(payer_revenue.items(), 1):
-            payer_name = self.payers[self.payers['Id'] == payer_id]['NAME'].values
-            payer_name = payer_name[0] if len(payer_name) > 0 else "Unknown"
+        for i, (coverage, payer_name) in enumerate(payer_revenue.itertuples(index=False), 1):
             print(f"  {i}. {payer_name[:40]}: ${coverage:,.2f}")
         
+        # Revenue by organization
+        org_revenue = enc.organization_totals().sort_values('cost_sum', ascending=False).head(10)
+        org_revenue = self.organization_dim.enrich(org_revenue, ['NAME', 'CITY', 'STATE'],
+                                                   default="Unknown")
+        print(f"\n🏥 TOP ORGANIZATIONS BY REVENUE:")
+        for i, org in enumerate(org_revenue.itertuples(index=False), 1):
+            print(f"  {i}. {str(org.NAME)[:40]} ({org.CITY}, {org.STATE}): "
+                  f"${org.cost_sum:,.2f} over {org.rows:,} encounters")
+        
         # Store insights
         self.insights['financial'] = {
             'total_revenue': round(total_claim_cost, 2),
-            'avg_cost_per_encounter': round(self.encounters['TOTAL_CLAIM_COST'].mean(), 2),
-            'avg_coverage_rate': round(self.encounters['COVERAGE_RATE'].mean(), 2),
-            'high_cost_count': len(high_cost_encounters)
+            'avg_cost_per_encounter': round(enc.mean('TOTAL_CLAIM_COST'), 2),
+            'avg_coverage_rate': round(enc.mean('COVERAGE_RATE'), 2),
+            'high_cost_count': high_cost_count
         }
         
         return self
     
+    @stage(rows_in=lambda self: self.encounter_stats.rows,
+           rows_out=lambda self: len(self.insights['clinical']))
     def analyze_clinical_operations(self):
         """
         AI PROMPT USED: "Analyze clinical operations including most common procedures, 
@@ -284,60 +448,67 @@ class AIHospitalAnalyzer:
         print("CLINICAL OPERATIONS ANALYSIS (AI-ASSISTED)")
         print("="*80)
         
+        enc = self.encounter_stats
+        proc_stats = self.procedure_stats
+        
         # Encounter analysis
         print(f"\n🏥 ENCOUNTER STATISTICS:")
-        print(f"  Total Encounters: {len(self.encounters):,}")
-        print(f"  Average Duration: {self.encounters['DURATION_HOURS'].mean():.2f} hours")
-        print(f"  Median Duration: {self.encounters['DURATION_HOURS'].median():.2f} hours")
+        print(f"  Total Encounters: {enc.rows:,}")
+        print(f"  Distinct Encounter Ids: {enc.distinct_count('Id'):,}")
+        print(f"  Distinct Patients Seen: {enc.distinct_count('PATIENT'):,}")
+        print(f"  Average Duration: {enc.mean('DURATION_HOURS'):.2f} hours")
+        print(f"  Median Duration: {enc.histograms['DURATION_HOURS'].median():.2f} hours")
         
         # Most common encounter types
         print(f"\n🏥 MOST COMMON ENCOUNTER TYPES:")
-        encounter_types = self.encounters['ENCOUNTERCLASS'].value_counts()
+        encounter_types = enc.value_counts('ENCOUNTERCLASS')
         for enc_type, count in encounter_types.items():
-            print(f"  {enc_type.title()}: {count:,} ({count/len(self.encounters)*100:.1f}%)")
+            print(f"  {enc_type.title()}: {count:,} ({count/enc.rows*100:.1f}%)")
         
         # Most common encounter descriptions
         print(f"\n🏥 TOP 10 ENCOUNTER DESCRIPTIONS:")
-        top_encounters = self.encounters['DESCRIPTION'].value_counts().head(10)
+        top_encounters = enc.value_counts('DESCRIPTION').head(10)
         for i, (desc, count) in enumerate(top_encounters.items(), 1):
             print(f"  {i}. {desc}: {count:,}")
         
         # Procedure analysis
         print(f"\n🏥 PROCEDURE STATISTICS:")
-        print(f"  Total Procedures: {len(self.procedures):,}")
-        print(f"  Average Procedure Cost: ${self.procedures['BASE_COST'].mean():,.2f}")
-        print(f"  Median Procedure Cost: ${self.procedures['BASE_COST'].median():,.2f}")
-        print(f"  Total Procedure Revenue: ${self.procedures['BASE_COST'].sum():,.2f}")
+        print(f"  Total Procedures: {proc_stats.rows:,}")
+        print(f"  Average Procedure Cost: ${proc_stats.mean_cost():,.2f}")
+        print(f"  Median Procedure Cost: ${proc_stats.cost_histogram.median():,.2f}")
+        print(f"  Total Procedure Revenue: ${proc_stats.cost_sum:,.2f}")
         
         # Most common procedures
         print(f"\n🏥 TOP 15 MOST COMMON PROCEDURES:")
-        top_procedures = self.procedures['DESCRIPTION'].value_counts().head(15)
+        top_procedures = proc_stats.value_counts().head(15)
         for i, (proc, count) in enumerate(top_procedures.items(), 1):
             print(f"  {i}. {proc[:60]}: {count:,}")
         
         # Highest cost procedures
         print(f"\n🏥 TOP 10 HIGHEST COST PROCEDURES:")
-        high_cost_proc = self.procedures.groupby('DESCRIPTION')['BASE_COST'].mean().sort_values(ascending=False).head(10)
+        high_cost_proc = proc_stats.mean_cost_by_description().sort_values(ascending=False).head(10)
         for i, (proc, cost) in enumerate(high_cost_proc.items(), 1):
             print(f"  {i}. {proc[:60]}: ${cost:,.2f}")
         
         # Reason for visit analysis
         print(f"\n🏥 TOP 10 REASONS FOR ENCOUNTERS:")
-        reasons = self.encounters['REASONDESCRIPTION'].value_counts().head(10)
+        reasons = enc.value_counts('REASONDESCRIPTION').head(10)
         for i, (reason, count) in enumerate(reasons.items(), 1):
             if pd.notna(reason):
                 print(f"  {i}. {reason}: {count:,}")
         
         # Store insights
         self.insights['clinical'] = {
-            'total_encounters': len(self.encounters),
-            'total_procedures': len(self.procedures),
-            'avg_encounter_duration': round(self.encounters['DURATION_HOURS'].mean(), 2),
+            'total_encounters': enc.rows,
+            'total_procedures': proc_stats.rows,
+            'avg_encounter_duration': round(enc.mean('DURATION_HOURS'), 2),
             'most_common_encounter': encounter_types.index[0]
         }
         
         return self
     
+    @stage(rows_in=lambda self: self.encounter_stats.rows,
+           rows_out=lambda self: len(self.insights['temporal']))
     def analyze_temporal_patterns(self):
         """
         AI PROMPT USED: "Analyze temporal patterns in hospital utilization. 
@@ -350,34 +521,39 @@ class AIHospitalAnalyzer:
         print("TEMPORAL PATTERN ANALYSIS (AI-ASSISTED)")
         print("="*80)
         
+        enc = self.encounter_stats
+        cube = enc.cube
+        
         # Yearly trends
         print(f"\n📅 ENCOUNTERS BY YEAR:")
-        yearly = self.encounters['YEAR'].value_counts().sort_index()
+        yearly = cube.counts('YEAR')
         for year, count in yearly.items():
             print(f"  {int(year)}: {count:,}")
         
         # Monthly patterns
         print(f"\n📅 ENCOUNTERS BY MONTH:")
-        monthly = self.encounters['MONTH_NAME'].value_counts()
+        monthly = cube.counts('MONTH')
+        monthly = ranked(monthly.set_axis([MONTH_NAMES[int(m) - 1] for m in monthly.index]))
         month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
                       'July', 'August', 'September', 'October', 'November', 'December']
         for month in month_order:
             if month in monthly.index:
                 count = monthly[month]
-                print(f"  {month}: {count:,} ({count/len(self.encounters)*100:.1f}%)")
+                print(f"  {month}: {count:,} ({count/enc.rows*100:.1f}%)")
         
         # Day of week patterns
         print(f"\n📅 ENCOUNTERS BY DAY OF WEEK:")
         day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        dow = self.encounters['DAY_OF_WEEK'].value_counts()
+        dow = cube.counts('DAY_OF_WEEK')
+        dow = ranked(dow.set_axis([DAY_NAMES[int(d)] for d in dow.index]))
         for day in day_order:
             if day in dow.index:
                 count = dow[day]
-                print(f"  {day}: {count:,} ({count/len(self.encounters)*100:.1f}%)")
+                print(f"  {day}: {count:,} ({count/enc.rows*100:.1f}%)")
         
         # Hourly patterns
         print(f"\n📅 PEAK HOURS (Top 10):")
-        hourly = self.encounters['HOUR'].value_counts().sort_index()
+        hourly = cube.counts('HOUR')
         top_hours = hourly.sort_values(ascending=False).head(10)
         for hour, count in top_hours.items():
             print(f"  {int(hour):02d}:00 - {count:,} encounters")
@@ -392,6 +568,8 @@ class AIHospitalAnalyzer:
         
         return self
     
+    @stage(rows_in=lambda self: len(self.patient_features),
+           rows_out=lambda self: len(self.insights['risk_analysis']))
     def identify_risk_factors(self):
         """
         AI PROMPT USED: "Identify high-risk patient populations based on 
@@ -404,13 +582,10 @@ class AIHospitalAnalyzer:
         print("RISK FACTOR ANALYSIS (AI-ASSISTED)")
         print("="*80)
         
+        enc = self.encounter_stats
+        
         # Patient encounter frequency
-        patient_stats = self.encounters.groupby('PATIENT').agg({
-            'Id': 'count',
-            'TOTAL_CLAIM_COST': 'sum',
-            'BASE_ENCOUNTER_COST': 'mean',
-            'DURATION_HOURS': 'sum'
-        }).rename(columns={'Id': 'ENCOUNTER_COUNT'})
+        patient_stats = self.patient_features
         
         # High utilizers
         high_utilizers = patient_stats[patient_stats['ENCOUNTER_COUNT'] >= 10]
@@ -422,7 +597,7 @@ class AIHospitalAnalyzer:
         print(f"  Total Cost Impact: ${high_utilizers['TOTAL_CLAIM_COST'].sum():,.2f}")
         print(f"  Average Cost per Patient: ${high_utilizers['TOTAL_CLAIM_COST'].mean():,.2f}")
         
-        # High cost patients
+        # High cost patients (the feature table is in memory, so exact in either mode)
         high_cost_threshold = patient_stats['TOTAL_CLAIM_COST'].quantile(0.90)
         high_cost_patients = patient_stats[patient_stats['TOTAL_CLAIM_COST'] >= high_cost_threshold]
         
@@ -431,11 +606,10 @@ class AIHospitalAnalyzer:
         print(f"  Cost Threshold: ${high_cost_threshold:,.2f}")
         print(f"  Total Cost: ${high_cost_patients['TOTAL_CLAIM_COST'].sum():,.2f}")
         print(f"  Average Cost: ${high_cost_patients['TOTAL_CLAIM_COST'].mean():,.2f}")
-        print(f"  Percentage of Total Costs: {high_cost_patients['TOTAL_CLAIM_COST'].sum()/self.encounters['TOTAL_CLAIM_COST'].sum()*100:.1f}%")
+        print(f"  Percentage of Total Costs: {high_cost_patients['TOTAL_CLAIM_COST'].sum()/enc.total('TOTAL_CLAIM_COST')*100:.1f}%")
         
         # Chronic condition analysis
-        chronic_conditions = self.encounters[self.encounters['REASONDESCRIPTION'].notna()]
-        chronic_patients = chronic_conditions.groupby('PATIENT')['REASONDESCRIPTION'].nunique()
+        chronic_patients = patient_stats['DISTINCT_REASONS']
         multi_condition = chronic_patients[chronic_patients >= 3]
         
         print(f"\n⚠️  PATIENTS WITH MULTIPLE CONDITIONS (≥3 diagnoses):")
@@ -453,6 +627,7 @@ class AIHospitalAnalyzer:
         
         return self
     
+    @stage()
     def save_insights(self):
         """Save all insights to JSON file for documentation"""
         with open('ai_analysis_insights.json', 'w') as f:
@@ -463,23 +638,130 @@ class AIHospitalAnalyzer:
         print("="*80)
         
         return self
+    
+    @stage()
+    def save_state(self):
+        """Persist the partial aggregates so later deltas can be applied incrementally"""
+        if self.window is not None:
+            # A windowed run only covers part of the history, so it is no base for deltas
+            print(f"⚠️  Aggregate state not saved for a windowed run ({describe_window(self.window)})")
+            return self
+        save_state(self.encounter_stats, self.procedure_stats, self.applied_deltas)
+        print(f"✓ Aggregate state saved to: {STATE_DIR}")
+        
+        return self
 
-def main():
+    def pipeline(self):
+        """
+        The analysis stages in serial order, with the analyzer attributes and
+        insight sections ('insights.<section>') each one reads and writes
+        """
+        def step(method, inputs, outputs=()):
+            def run():
+                method()
+                return {name: self._artifact(name) for name in outputs}
+            return Stage(method.__name__, run, inputs, outputs)
+        
+        sections = [f'insights.{section}' for section in self.insights]
+        return [
+            step(self.prepare_patients, ['patients'], ['patients']),
+            step(self.prepare_data, ['encounters', 'procedures', 'patients'],
+                 ['encounter_stats', 'procedure_stats', 'patient_features',
+                  'applied_deltas', 'approximate']),
+            step(self.analyze_demographics, ['patients'], ['insights.demographics']),
+            step(self.analyze_financial, ['encounter_stats'], ['insights.financial']),
+            step(self.analyze_clinical_operations, ['encounter_stats', 'procedure_stats'],
+                 ['insights.clinical']),
+            step(self.analyze_temporal_patterns, ['encounter_stats'], ['insights.temporal']),
+            step(self.identify_risk_factors,
+                 ['patients', 'patient_features', 'encounter_stats', 'approximate'],
+                 ['insights.risk_analysis']),
+            step(self.save_insights, sections),
+            # After every analysis, as saving compacts the segments they may read
+            step(self.save_state, ['encounter_stats', 'procedure_stats', 'applied_deltas']
+                 + sections),
+        ]
+    
+    def _artifact(self, name):
+        if name.startswith('insights.'):
+            return self.insights[name.split('.', 1)[1]]
+        return getattr(self, name)
+    
+    def _publish(self, outputs):
+        """Store a stage's outputs on the analyzer (a no-op for stages run in this process)"""
+        for name, value in outputs.items():
+            if name.startswith('insights.'):
+                self.insights[name.split('.', 1)[1]] = value
+            else:
+                setattr(self, name, value)
+    
+    def run(self, workers=None, executor='thread'):
+        """Run every stage, independent ones concurrently on `workers` threads or processes"""
+        Scheduler(self.pipeline(), workers, executor).run(self._publish)
+        return self
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="AI-powered hospital data analysis")
+    parser.add_argument('--streaming', action='store_true',
+                        help="read encounters/procedures in chunks instead of loading them into memory")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"rows per chunk in streaming mode (default: {DEFAULT_CHUNKSIZE:,})")
+    parser.add_argument('--delta-encounters', metavar='CSV',
+                        help=f"fold new encounters into the state saved in {STATE_DIR}")
+    parser.add_argument('--delta-procedures', metavar='CSV',
+                        help=f"fold new procedures into the state saved in {STATE_DIR}")
+    parser.add_argument('--trace', metavar='JSON',
+                        help="write a Chrome trace-event file of every stage (chrome://tracing, Perfetto)")
+    parser.add_argument('--approximate', action='store_true',
+                        help="estimate medians, percentile thresholds, top descriptions/reasons and "
+                             "distinct counts with bounded-memory sketches "
+                             "(delta runs keep the mode of the saved state)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="stages run concurrently at most (default: CPU count; 1 runs them in order)")
+    parser.add_argument('--executor', choices=EXECUTORS, default='thread',
+                        help="run concurrent stages on threads sharing the prepared data (default) "
+                             "or on forked processes")
+    add_window_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        args.window = month_window(args.start, args.end)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.window is not None and (args.delta_encounters or args.delta_procedures):
+        parser.error("--from/--to cannot be combined with deltas; the saved state covers all months")
+    return args
+
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
+    
     print("\n🤖 Starting AI-Powered Analysis...")
     print("This analysis uses AI-assisted code generation and prompting techniques\n")
     
-    # Initialize analyzer
-    analyzer = AIHospitalAnalyzer()
+    if args.trace:
+        enable_tracing()
+    
+    with span('analysis pipeline'):
+        # Initialize analyzer
+        deltas = {
+            table: path
+            for table, path in [('encounters', args.delta_encounters),
+                                ('procedures', args.delta_procedures)]
+            if path
+        }
+        analyzer = AIHospitalAnalyzer(streaming=args.streaming, chunksize=args.chunksize,
+                                      deltas=deltas, window=args.window,
+                                      approximate=args.approximate)
+        
+        # Run all analyses, independent stages concurrently
+        analyzer.run(workers=args.workers, executor=args.executor)
     
-    # Run all analyses
-    analyzer.prepare_data()
-    analyzer.analyze_demographics()
-    analyzer.analyze_financial()
-    analyzer.analyze_clinical_operations()
-    analyzer.analyze_temporal_patterns()
-    analyzer.identify_risk_factors()
-    analyzer.save_insights()
+    if args.trace:
+        save_trace(args.trace)
+        print(f"\n✓ Stage trace saved to: {args.trace}")
     
     print("\n" + "="*80)
     print("✅ AI-POWERED ANALYSIS COMPLETE!")
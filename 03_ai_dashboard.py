@@ -8,11 +8,20 @@ Date: November 5, 2025
 AI Tools Used: GitHub Copilot, Plotly Dash
 """
 
+import argparse
+
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
+from data_store import add_window_arguments, load_table, month_window, require_rows
+from olap_cube import encounter_cube, year_month
+from partials import ranked
+from patient_features import patient_features
+from plot_bins import PLOTLY_BUNDLE, histogram, histogram_bar, write_plotly_html
+from render import Dashboard, render_dashboards
+from sketches import top_values
 
 class AIConsolidatedDashboard:
     """
@@ -20,35 +29,32 @@ class AIConsolidatedDashboard:
     Creates a single comprehensive view of all hospital analytics
     """
     
-    def __init__(self):
-        """Initialize and load data"""
+    def __init__(self, window=None):
+        """Initialize and load data, optionally only for a (first, last) month window"""
         print("="*80)
         print("AI-POWERED CONSOLIDATED DASHBOARD")
         print("="*80)
         print("\n📊 Loading datasets...")
         
-        self.patients = pd.read_csv('patients.csv')
-        self.encounters = pd.read_csv('encounters.csv')
-        self.procedures = pd.read_csv('procedures.csv')
+        self.patients = load_table('patients')
+        self.encounters = load_table('encounters', window=window)
+        self.procedures = load_table('procedures', window=window)
+        require_rows('encounters', len(self.encounters), window)
         
         self._prepare_data()
+        self.patient_features = patient_features(self.encounters, self.patients, window)
+        self.cube = encounter_cube(self.encounters, window)
         print("✓ Data loaded and prepared\n")
     
     def _prepare_data(self):
         """Prepare data for dashboard"""
-        # Convert dates
-        self.encounters['START'] = pd.to_datetime(self.encounters['START'])
-        self.patients['BIRTHDATE'] = pd.to_datetime(self.patients['BIRTHDATE'])
-        
-        # Calculate features
+        # Calculate features (dates are already converted by the dataset cache)
         today = pd.Timestamp.now()
         self.patients['AGE'] = (today - self.patients['BIRTHDATE']).dt.days / 365.25
         
         self.encounters['COVERAGE_RATE'] = (
             self.encounters['PAYER_COVERAGE'] / self.encounters['TOTAL_CLAIM_COST'] * 100
         ).fillna(0)
-        
-        self.encounters['MONTH'] = self.encounters['START'].dt.to_period('M').astype(str)
     
     def create_master_dashboard(self):
         """
@@ -58,134 +64,167 @@ class AIConsolidatedDashboard:
         
         AI RESPONSE: Generated comprehensive dashboard with 6 key visualizations.
         """
-        print("Creating Master Dashboard...")
-        
-        # Create 3x2 subplot layout
-        fig = make_subplots(
-            rows=3, cols=2,
-            subplot_titles=(
-                'Patient Demographics by Age Group',
-                'Monthly Revenue Trend',
-                'Encounter Type Distribution', 
-                'Insurance Coverage Rate',
-                'Top 10 Most Common Procedures',
-                'Patient Risk Segmentation'
-            ),
-            specs=[
-                [{"type": "bar"}, {"type": "scatter"}],
-                [{"type": "pie"}, {"type": "histogram"}],
-                [{"type": "bar"}, {"type": "pie"}]
-            ],
-            vertical_spacing=0.12,
-            horizontal_spacing=0.15
-        )
-        
-        # 1. Age Group Distribution
+        return draw_master_dashboard(self.master_inputs())
+    
+    def master_inputs(self):
+        """Aggregates drawn by the master dashboard"""
         age_bins = pd.cut(self.patients['AGE'], bins=[0, 18, 35, 50, 65, 100],
                          labels=['0-18', '19-35', '36-50', '51-65', '65+'])
-        age_counts = age_bins.value_counts().sort_index()
-        
-        fig.add_trace(
-            go.Bar(x=age_counts.index, y=age_counts.values,
-                  marker=dict(color='skyblue', line=dict(color='darkblue', width=2)),
-                  name='Age Groups'),
-            row=1, col=1
-        )
-        
-        # 2. Monthly Revenue Trend
-        monthly_rev = self.encounters.groupby('MONTH')['TOTAL_CLAIM_COST'].sum()
-        
-        fig.add_trace(
-            go.Scatter(x=monthly_rev.index, y=monthly_rev.values,
-                      mode='lines+markers',
-                      line=dict(color='green', width=3),
-                      marker=dict(size=8, color='darkgreen'),
-                      name='Revenue'),
-            row=1, col=2
-        )
-        
-        # 3. Encounter Type Distribution
-        encounter_counts = self.encounters['ENCOUNTERCLASS'].value_counts()
-        
-        fig.add_trace(
-            go.Pie(labels=encounter_counts.index, values=encounter_counts.values,
-                  name='Encounter Types',
-                  marker=dict(colors=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8'])),
-            row=2, col=1
-        )
-        
-        # 4. Coverage Rate Distribution
-        fig.add_trace(
-            go.Histogram(x=self.encounters['COVERAGE_RATE'],
-                        nbinsx=40,
-                        marker=dict(color='coral', line=dict(color='darkred', width=1)),
-                        name='Coverage Rate'),
-            row=2, col=2
-        )
-        
-        # 5. Top 10 Procedures
-        top_proc = self.procedures['DESCRIPTION'].value_counts().head(10)
-        
-        fig.add_trace(
-            go.Bar(y=[desc[:35] + '...' if len(desc) > 35 else desc for desc in top_proc.index],
-                  x=top_proc.values,
-                  orientation='h',
-                  marker=dict(color='mediumseagreen'),
-                  name='Procedures'),
-            row=3, col=1
-        )
-        
-        # 6. Risk Segmentation
-        patient_encounters = self.encounters.groupby('PATIENT').size()
-        risk_categories = {
-            'Low Risk (<5)': len(patient_encounters[patient_encounters < 5]),
-            'Medium Risk (5-10)': len(patient_encounters[(patient_encounters >= 5) & (patient_encounters < 10)]),
-            'High Risk (≥10)': len(patient_encounters[patient_encounters >= 10])
+        patient_encounters = self.patient_features['ENCOUNTER_COUNT']
+        return {
+            'age_counts': age_bins.value_counts().sort_index(),
+            'monthly_revenue': year_month(self.cube.total(['YEAR', 'MONTH'], 'TOTAL_CLAIM_COST')),
+            'encounter_counts': ranked(self.cube.counts('ENCOUNTERCLASS')),
+            'coverage_rate_bins': histogram(self.encounters['COVERAGE_RATE'], bins=40),
+            'top_procedures': top_values(self.procedures['DESCRIPTION'], 10),
+            'risk_categories': {
+                'Low Risk (<5)': len(patient_encounters[patient_encounters < 5]),
+                'Medium Risk (5-10)': len(patient_encounters[(patient_encounters >= 5) & (patient_encounters < 10)]),
+                'High Risk (≥10)': len(patient_encounters[patient_encounters >= 10])
+            },
         }
-        
-        fig.add_trace(
-            go.Pie(labels=list(risk_categories.keys()), 
-                  values=list(risk_categories.values()),
-                  marker=dict(colors=['lightgreen', 'gold', 'crimson']),
-                  name='Risk Levels'),
-            row=3, col=2
-        )
-        
-        # Update layout
-        fig.update_layout(
-            height=1400,
-            showlegend=False,
-            title_text="Hospital Analytics - Comprehensive AI-Generated Dashboard",
-            title_font_size=24,
-            title_x=0.5,
-            font=dict(size=11)
-        )
-        
-        # Update axes
-        fig.update_xaxes(title_text="Age Group", row=1, col=1)
-        fig.update_yaxes(title_text="Number of Patients", row=1, col=1)
-        
-        fig.update_xaxes(title_text="Month", tickangle=45, row=1, col=2)
-        fig.update_yaxes(title_text="Revenue ($)", row=1, col=2)
-        
-        fig.update_xaxes(title_text="Coverage Rate (%)", row=2, col=2)
-        fig.update_yaxes(title_text="Frequency", row=2, col=2)
-        
-        fig.update_xaxes(title_text="Number of Occurrences", row=3, col=1)
-        fig.update_yaxes(title_text="Procedure", row=3, col=1)
-        
-        # Save dashboard
-        fig.write_html('ai_consolidated_dashboard.html')
-        print("✓ Saved: ai_consolidated_dashboard.html\n")
-        
-        return fig
+    
+    def dashboards(self):
+        """The master dashboard, for render.render_dashboards"""
+        return [Dashboard('consolidated', self.master_inputs, draw_master_dashboard,
+                          ['ai_consolidated_dashboard.html', PLOTLY_BUNDLE])]
+
+def draw_master_dashboard(data):
+    """Draw and save the master dashboard from its aggregates"""
+    print("Creating Master Dashboard...")
+    
+    # Create 3x2 subplot layout
+    fig = make_subplots(
+        rows=3, cols=2,
+        subplot_titles=(
+            'Patient Demographics by Age Group',
+            'Monthly Revenue Trend',
+            'Encounter Type Distribution', 
+            'Insurance Coverage Rate',
+            'Top 10 Most Common Procedures',
+            'Patient Risk Segmentation'
+        ),
+        specs=[
+            [{"type": "bar"}, {"type": "scatter"}],
+            [{"type": "pie"}, {"type": "bar"}],
+            [{"type": "bar"}, {"type": "pie"}]
+        ],
+        vertical_spacing=0.12,
+        horizontal_spacing=0.15
+    )
+    
+    # 1. Age Group Distribution
+    age_counts = data['age_counts']
+    
+    fig.add_trace(
+        go.Bar(x=age_counts.index, y=age_counts.values,
+              marker=dict(color='skyblue', line=dict(color='darkblue', width=2)),
+              name='Age Groups'),
+        row=1, col=1
+    )
+    
+    # 2. Monthly Revenue Trend
+    monthly_rev = data['monthly_revenue']
+    
+    fig.add_trace(
+        go.Scatter(x=monthly_rev.index, y=monthly_rev.values,
+                  mode='lines+markers',
+                  line=dict(color='green', width=3),
+                  marker=dict(size=8, color='darkgreen'),
+                  name='Revenue'),
+        row=1, col=2
+    )
+    
+    # 3. Encounter Type Distribution
+    encounter_counts = data['encounter_counts']
+    
+    fig.add_trace(
+        go.Pie(labels=encounter_counts.index, values=encounter_counts.values,
+              name='Encounter Types',
+              marker=dict(colors=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8'])),
+        row=2, col=1
+    )
+    
+    # 4. Coverage Rate Distribution
+    fig.add_trace(
+        histogram_bar(data['coverage_rate_bins'],
+                      marker=dict(color='coral', line=dict(color='darkred', width=1)),
+                      name='Coverage Rate'),
+        row=2, col=2
+    )
+    
+    # 5. Top 10 Procedures
+    top_proc = data['top_procedures']
+    
+    fig.add_trace(
+        go.Bar(y=[desc[:35] + '...' if len(desc) > 35 else desc for desc in top_proc.index],
+              x=top_proc.values,
+              orientation='h',
+              marker=dict(color='mediumseagreen'),
+              name='Procedures'),
+        row=3, col=1
+    )
+    
+    # 6. Risk Segmentation
+    risk_categories = data['risk_categories']
+    
+    fig.add_trace(
+        go.Pie(labels=list(risk_categories.keys()), 
+              values=list(risk_categories.values()),
+              marker=dict(colors=['lightgreen', 'gold', 'crimson']),
+              name='Risk Levels'),
+        row=3, col=2
+    )
+    
+    # Update layout
+    fig.update_layout(
+        height=1400,
+        showlegend=False,
+        title_text="Hospital Analytics - Comprehensive AI-Generated Dashboard",
+        title_font_size=24,
+        title_x=0.5,
+        font=dict(size=11)
+    )
+    
+    # Update axes
+    fig.update_xaxes(title_text="Age Group", row=1, col=1)
+    fig.update_yaxes(title_text="Number of Patients", row=1, col=1)
+    
+    fig.update_xaxes(title_text="Month", tickangle=45, row=1, col=2)
+    fig.update_yaxes(title_text="Revenue ($)", row=1, col=2)
+    
+    fig.update_xaxes(title_text="Coverage Rate (%)", row=2, col=2)
+    fig.update_yaxes(title_text="Frequency", row=2, col=2)
+    
+    fig.update_xaxes(title_text="Number of Occurrences", row=3, col=1)
+    fig.update_yaxes(title_text="Procedure", row=3, col=1)
+    
+    # Save dashboard
+    write_plotly_html(fig, 'ai_consolidated_dashboard.html')
+    print("✓ Saved: ai_consolidated_dashboard.html\n")
+    
+    return fig
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="AI-powered consolidated dashboard")
+    parser.add_argument('--force', action='store_true',
+                        help="redraw the dashboard even if its inputs are unchanged")
+    add_window_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        args.window = month_window(args.start, args.end)
+    except ValueError as exc:
+        parser.error(str(exc))
+    return args
 
-def main():
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
     print("\n🎯 Creating Consolidated AI Dashboard...\n")
     
-    dashboard = AIConsolidatedDashboard()
-    dashboard.create_master_dashboard()
+    dashboard = AIConsolidatedDashboard(window=args.window)
+    render_dashboards(dashboard.dashboards(), workers=1, force=args.force)
     
     print("="*80)
     print("✅ CONSOLIDATED DASHBOARD CREATED!")
@@ -2,16 +2,28 @@
 Additional Visualizations for Missing Analyses
 Creates 4 new dashboards for:
 1. Admissions/Readmissions over time
-2. Length of Stay analysis
+2. Length of Stay and concurrent census analysis
 3. Average Cost per Visit
 4. Procedures covered by Insurance
 """
 
+import argparse
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime
+from data_store import add_window_arguments, load_table, month_window, require_rows
+from dimensions import Dimension
+from olap_cube import encounter_cube
+from patient_features import patient_features
+from plot_bins import histogram, plot_histogram
+from census import census_report
+from readmissions import READMISSION_WINDOWS, readmission_report
+from render import Dashboard, render_dashboards
+from timeparse import duration_hours
 
 # Set professional style
 sns.set_style("whitegrid")
@@ -19,196 +31,106 @@ plt.rcParams['figure.figsize'] = (20, 12)
 plt.rcParams['font.size'] = 11
 
 class AdditionalVisualizations:
-    def __init__(self):
-        """Initialize and load data"""
+    def __init__(self, window=None):
+        """Initialize and load data, optionally only for a (first, last) month window"""
         print("Loading data...")
-        self.encounters = pd.read_csv('encounters.csv')
-        self.procedures = pd.read_csv('procedures.csv')
-        self.patients = pd.read_csv('patients.csv')
-        
-        # Convert dates
-        self.encounters['START'] = pd.to_datetime(self.encounters['START'])
-        self.encounters['STOP'] = pd.to_datetime(self.encounters['STOP'])
-        
-        # Calculate duration
-        self.encounters['DURATION_HOURS'] = (
-            self.encounters['STOP'] - self.encounters['START']
-        ).dt.total_seconds() / 3600
+        self.encounters = load_table('encounters', window=window)
+        self.procedures = load_table('procedures', window=window)
+        require_rows('encounters', len(self.encounters), window)
+        self.patients = load_table('patients')
+        self.payer_dim = Dimension(load_table('payers'))
+        self.organization_dim = Dimension(load_table('organizations'))
+        
+        # Calculate duration (dates are already converted by the dataset cache)
+        self.encounters['DURATION_HOURS'] = duration_hours(
+            self.encounters['START'], self.encounters['STOP']
+        )
         self.encounters['DURATION_DAYS'] = self.encounters['DURATION_HOURS'] / 24
         
-        # Extract year
-        self.encounters['YEAR'] = self.encounters['START'].dt.year
+        self.patient_features = patient_features(self.encounters, self.patients, window)
+        # Per-year/month/class rollups of the encounters, shared with the other scripts
+        self.cube = encounter_cube(self.encounters, window)
         
         print(f"✓ Loaded {len(self.encounters):,} encounters")
         print(f"✓ Loaded {len(self.procedures):,} procedures")
         print(f"✓ Loaded {len(self.patients):,} patients")
     
-    def create_admissions_dashboard(self):
-        """Dashboard 1: Admissions and Readmissions over Time"""
-        print("\n📊 Creating Admissions/Readmissions Dashboard...")
-        
-        fig, axes = plt.subplots(2, 2, figsize=(20, 12))
-        fig.suptitle('Hospital Admissions & Readmissions Analysis', 
-                     fontsize=22, fontweight='bold', y=0.995)
-        
-        # 1. Yearly Admissions Trend
-        yearly_admissions = self.encounters.groupby('YEAR').size()
-        axes[0, 0].plot(yearly_admissions.index, yearly_admissions.values, 
-                       marker='o', linewidth=3, markersize=10, color='#2E86AB')
-        axes[0, 0].fill_between(yearly_admissions.index, yearly_admissions.values, 
-                                alpha=0.3, color='#2E86AB')
-        axes[0, 0].set_title('Total Admissions by Year', fontsize=16, fontweight='bold', pad=15)
-        axes[0, 0].set_xlabel('Year', fontsize=12, fontweight='bold')
-        axes[0, 0].set_ylabel('Number of Encounters', fontsize=12, fontweight='bold')
-        axes[0, 0].grid(True, alpha=0.3)
-        
-        # Add value labels
-        for x, y in zip(yearly_admissions.index, yearly_admissions.values):
-            axes[0, 0].text(x, y, f'{y:,}', ha='center', va='bottom', fontweight='bold')
-        
-        # 2. Readmission Rate Analysis
-        patient_encounter_counts = self.encounters.groupby('PATIENT').size()
-        readmission_data = pd.DataFrame({
-            'Encounter_Count': patient_encounter_counts
-        })
-        readmission_data['Category'] = pd.cut(
-            readmission_data['Encounter_Count'],
-            bins=[0, 1, 5, 10, 20, 50, 100, 1000],
-            labels=['1 visit', '2-5 visits', '6-10 visits', '11-20 visits', 
-                   '21-50 visits', '51-100 visits', '100+ visits']
-        )
-        
-        category_counts = readmission_data['Category'].value_counts().sort_index()
-        colors = ['#06A77D', '#F4D35E', '#EE964B', '#F95738', '#C1121F', '#780000', '#370617']
-        bars = axes[0, 1].barh(range(len(category_counts)), category_counts.values, color=colors)
-        axes[0, 1].set_yticks(range(len(category_counts)))
-        axes[0, 1].set_yticklabels(category_counts.index)
-        axes[0, 1].set_title('Patient Readmission Distribution', fontsize=16, fontweight='bold', pad=15)
-        axes[0, 1].set_xlabel('Number of Patients', fontsize=12, fontweight='bold')
-        axes[0, 1].grid(True, alpha=0.3, axis='x')
-        
-        # Add value labels
-        for i, (bar, val) in enumerate(zip(bars, category_counts.values)):
-            axes[0, 1].text(val, i, f' {val:,} ({val/len(patient_encounter_counts)*100:.1f}%)', 
-                          va='center', fontweight='bold', fontsize=10)
-        
-        # 3. Monthly Admission Patterns
-        self.encounters['MONTH'] = self.encounters['START'].dt.month
-        monthly_admissions = self.encounters.groupby('MONTH').size()
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        
-        bars = axes[1, 0].bar(range(1, 13), monthly_admissions.values, 
-                             color='#A23B72', edgecolor='black', linewidth=1.5)
-        axes[1, 0].set_xticks(range(1, 13))
-        axes[1, 0].set_xticklabels(month_names, rotation=45)
-        axes[1, 0].set_title('Admissions by Month (All Years)', fontsize=16, fontweight='bold', pad=15)
-        axes[1, 0].set_xlabel('Month', fontsize=12, fontweight='bold')
-        axes[1, 0].set_ylabel('Number of Encounters', fontsize=12, fontweight='bold')
-        axes[1, 0].grid(True, alpha=0.3, axis='y')
-        
-        # Highlight peak month
-        peak_idx = monthly_admissions.argmax()
-        bars[peak_idx].set_color('#F18F01')
-        
-        # Add value labels
-        for i, val in enumerate(monthly_admissions.values):
-            axes[1, 0].text(i+1, val, f'{val:,}', ha='center', va='bottom', fontweight='bold')
-        
-        # 4. Key Statistics Box
-        axes[1, 1].axis('off')
+    def _class_medians(self, column):
+        """Median of ``column`` per ENCOUNTERCLASS, indexed by plain labels like the cube"""
+        medians = self.encounters.groupby('ENCOUNTERCLASS', observed=True)[column].median()
+        return medians.set_axis(medians.index.astype(object))
+    
+    def admissions_inputs(self):
+        """Aggregates drawn by the admissions/readmissions dashboard"""
+        yearly_admissions = self.cube.counts('YEAR')
+        readmissions = readmission_report(self.encounters)
+        overall = readmissions['overall']
         
+        patient_encounter_counts = self.patient_features['ENCOUNTER_COUNT']
         total_patients = len(patient_encounter_counts)
-        readmitted_patients = len(patient_encounter_counts[patient_encounter_counts > 1])
+        returning_patients = len(patient_encounter_counts[patient_encounter_counts > 1])
         avg_encounters = patient_encounter_counts.mean()
         max_encounters = patient_encounter_counts.max()
         
+        # Growth between the first and last year present (the window may exclude 2011/2021)
+        first_year, last_year = yearly_admissions.index.min(), yearly_admissions.index.max()
+        
+        by_organization = self.organization_dim.enrich(
+            readmissions['organization'].nlargest(3, 'STAYS'), ['NAME'], default='Unknown')
+        organization_lines = "\n".join(
+            f"          {name[:28]:<28} {rate:5.1f}%"
+            for name, rate in zip(by_organization['NAME'], by_organization['RATE_30D']))
+        
         stats_text = f"""
         KEY READMISSION STATISTICS
         
-        Total Unique Patients: {total_patients:,}
+        Inpatient Discharges: {int(overall['STAYS']):,}
+        7-Day Readmission Rate: {overall.get('RATE_7D', np.nan):.1f}%
+        30-Day Readmission Rate: {overall.get('RATE_30D', np.nan):.1f}%
+        90-Day Readmission Rate: {overall.get('RATE_90D', np.nan):.1f}%
         
-        Patients with Readmissions: {readmitted_patients:,}
-        Readmission Rate: {readmitted_patients/total_patients*100:.1f}%
+        30-Day Rate by Organization:
+{organization_lines}
         
+        Total Unique Patients: {total_patients:,}
+        Patients with Repeat Visits: {returning_patients:,} ({returning_patients/total_patients*100:.1f}%)
         Average Encounters/Patient: {avg_encounters:.2f}
         Maximum Encounters (1 patient): {max_encounters:,}
         
         Total Encounters (All Years): {len(self.encounters):,}
-        
         Peak Year: {yearly_admissions.idxmax()} ({yearly_admissions.max():,} encounters)
         Lowest Year: {yearly_admissions.idxmin()} ({yearly_admissions.min():,} encounters)
-        
-        Growth Rate (2011-2021): {((yearly_admissions[2021]/yearly_admissions[2011])-1)*100:.1f}%
+        Growth Rate ({first_year:.0f}-{last_year:.0f}): {((yearly_admissions[last_year]/yearly_admissions[first_year])-1)*100:.1f}%
         """
         
-        axes[1, 1].text(0.1, 0.5, stats_text, fontsize=14, family='monospace',
-                       bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
-                       verticalalignment='center')
-        
-        plt.tight_layout()
-        plt.savefig('admissions_readmissions_dashboard.png', dpi=300, bbox_inches='tight')
-        print("✓ Saved: admissions_readmissions_dashboard.png")
-        plt.close()
+        return {
+            'yearly_admissions': yearly_admissions,
+            'readmission_overall': overall,
+            'readmission_by_year': readmissions['year'],
+            'readmission_by_class': readmissions['class'].sort_values('STAYS', ascending=False),
+            'readmission_by_payer': self.payer_dim.enrich(
+                readmissions['payer'], ['NAME'], default='Unknown').sort_values('RATE_30D'),
+            'monthly_admissions': self.cube.counts('MONTH'),
+            'stats_text': stats_text,
+        }
     
-    def create_length_of_stay_dashboard(self):
-        """Dashboard 2: Length of Stay Analysis"""
-        print("\n📊 Creating Length of Stay Dashboard...")
-        
-        fig, axes = plt.subplots(2, 2, figsize=(20, 12))
-        fig.suptitle('Hospital Length of Stay Analysis', 
-                     fontsize=22, fontweight='bold', y=0.995)
-        
-        # 1. Distribution of Stay Duration (log scale for better visibility)
-        axes[0, 0].hist(self.encounters['DURATION_HOURS'], bins=50, 
-                       color='#5E548E', edgecolor='black', alpha=0.7)
-        axes[0, 0].axvline(self.encounters['DURATION_HOURS'].mean(), 
-                          color='red', linestyle='--', linewidth=2, label='Mean')
-        axes[0, 0].axvline(self.encounters['DURATION_HOURS'].median(), 
-                          color='green', linestyle='--', linewidth=2, label='Median')
-        axes[0, 0].set_title('Distribution of Stay Duration', fontsize=16, fontweight='bold', pad=15)
-        axes[0, 0].set_xlabel('Duration (Hours)', fontsize=12, fontweight='bold')
-        axes[0, 0].set_ylabel('Frequency', fontsize=12, fontweight='bold')
-        axes[0, 0].legend(fontsize=12)
-        axes[0, 0].set_yscale('log')
-        axes[0, 0].grid(True, alpha=0.3)
-        
-        # 2. Average Stay by Encounter Type
-        avg_by_type = self.encounters.groupby('ENCOUNTERCLASS')['DURATION_HOURS'].mean().sort_values()
-        colors_type = plt.cm.Spectral(np.linspace(0, 1, len(avg_by_type)))
-        bars = axes[0, 1].barh(range(len(avg_by_type)), avg_by_type.values, color=colors_type)
-        axes[0, 1].set_yticks(range(len(avg_by_type)))
-        axes[0, 1].set_yticklabels(avg_by_type.index)
-        axes[0, 1].set_title('Average Stay Duration by Encounter Type', 
-                            fontsize=16, fontweight='bold', pad=15)
-        axes[0, 1].set_xlabel('Average Duration (Hours)', fontsize=12, fontweight='bold')
-        axes[0, 1].grid(True, alpha=0.3, axis='x')
-        
-        # Add value labels
-        for i, val in enumerate(avg_by_type.values):
-            axes[0, 1].text(val, i, f' {val:.2f}h ({val/24:.2f}d)', 
-                          va='center', fontweight='bold')
-        
-        # 3. Stay Duration Over Time (Yearly Trend)
-        yearly_avg_duration = self.encounters.groupby('YEAR')['DURATION_HOURS'].mean()
-        axes[1, 0].plot(yearly_avg_duration.index, yearly_avg_duration.values,
-                       marker='o', linewidth=3, markersize=10, color='#06A77D')
-        axes[1, 0].fill_between(yearly_avg_duration.index, yearly_avg_duration.values,
-                                alpha=0.3, color='#06A77D')
-        axes[1, 0].set_title('Average Stay Duration Trend', fontsize=16, fontweight='bold', pad=15)
-        axes[1, 0].set_xlabel('Year', fontsize=12, fontweight='bold')
-        axes[1, 0].set_ylabel('Average Duration (Hours)', fontsize=12, fontweight='bold')
-        axes[1, 0].grid(True, alpha=0.3)
-        
-        # Add value labels
-        for x, y in zip(yearly_avg_duration.index, yearly_avg_duration.values):
-            axes[1, 0].text(x, y, f'{y:.1f}h', ha='center', va='bottom', fontweight='bold')
-        
-        # 4. Length of Stay Statistics by Type
-        axes[1, 1].axis('off')
-        
-        stats_by_type = self.encounters.groupby('ENCOUNTERCLASS').agg({
-            'DURATION_HOURS': ['mean', 'median', 'count']
+    def create_admissions_dashboard(self):
+        """Dashboard 1: Admissions and Readmissions over Time"""
+        draw_admissions_dashboard(self.admissions_inputs())
+    
+    def length_of_stay_inputs(self):
+        """Aggregates drawn by the length of stay and census dashboard"""
+        durations = self.encounters['DURATION_HOURS']
+        census = census_report(self.encounters)
+        class_hourly = census['class_hourly']
+        peak_day = census['class_daily'].sum(axis=1)
+        
+        # Means and counts come from the cube; medians need the rows themselves
+        stays_by_type = self.cube.rollup('ENCOUNTERCLASS', 'DURATION_HOURS')
+        stats_by_type = pd.DataFrame({
+            'mean': stays_by_type['MEAN'],
+            'median': self._class_medians('DURATION_HOURS'),
+            'count': stays_by_type['COUNT'],
         }).round(2)
         
         stats_text = "LENGTH OF STAY BY ENCOUNTER TYPE\n\n"
@@ -216,98 +138,60 @@ class AdditionalVisualizations:
         stats_text += "="*70 + "\n"
         
         for encounter_type in stats_by_type.index:
-            avg_h = stats_by_type.loc[encounter_type, ('DURATION_HOURS', 'mean')]
+            avg_h = stats_by_type.loc[encounter_type, 'mean']
             avg_d = avg_h / 24
-            median_h = stats_by_type.loc[encounter_type, ('DURATION_HOURS', 'median')]
-            count = int(stats_by_type.loc[encounter_type, ('DURATION_HOURS', 'count')])
+            median_h = stats_by_type.loc[encounter_type, 'median']
+            count = int(stats_by_type.loc[encounter_type, 'count'])
             stats_text += f"{encounter_type:<15} {avg_h:<10.2f} {avg_d:<10.2f} {median_h:<12.2f} {count:<10,}\n"
         
-        overall_avg = self.encounters['DURATION_HOURS'].mean()
-        overall_median = self.encounters['DURATION_HOURS'].median()
+        overall_avg = durations.mean()
+        overall_median = durations.median()
         stats_text += "="*70 + "\n"
         stats_text += f"\nOVERALL AVERAGE: {overall_avg:.2f} hours ({overall_avg/24:.2f} days)"
         stats_text += f"\nOVERALL MEDIAN: {overall_median:.2f} hours ({overall_median/24:.2f} days)"
         
-        axes[1, 1].text(0.05, 0.5, stats_text, fontsize=11, family='monospace',
-                       bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.5),
-                       verticalalignment='center')
-        
-        plt.tight_layout()
-        plt.savefig('length_of_stay_dashboard.png', dpi=300, bbox_inches='tight')
-        print("✓ Saved: length_of_stay_dashboard.png")
-        plt.close()
+        stats_text += "\n\nPEAK HOURLY CENSUS WINDOWS\n"
+        for _, window in census['peaks'].head(3).iterrows():
+            stats_text += (f"{window['START']:%Y-%m-%d %H:%M} - {window['END']:%H:%M}"
+                           f"   {window['OCCUPANCY']:,} in progress\n")
+        
+        return {
+            'duration_bins': histogram(durations, bins=50),
+            'avg_by_type': stays_by_type['MEAN'].rename('DURATION_HOURS').sort_values(),
+            'census_by_hour_of_day': class_hourly.groupby(class_hourly.index.hour).mean(),
+            'yearly_avg_duration': self.cube.mean('YEAR', 'DURATION_HOURS'),
+            'monthly_census': census['class_daily'].resample('MS').mean(),
+            'peak_day': (peak_day.idxmax(), peak_day.max()),
+            'stats_text': stats_text,
+        }
     
-    def create_cost_per_visit_dashboard(self):
-        """Dashboard 3: Average Cost per Visit"""
-        print("\n📊 Creating Cost per Visit Dashboard...")
-        
-        fig, axes = plt.subplots(2, 2, figsize=(20, 12))
-        fig.suptitle('Average Cost per Visit Analysis', 
-                     fontsize=22, fontweight='bold', y=0.995)
-        
-        # 1. Cost Distribution (log scale)
-        axes[0, 0].hist(self.encounters['TOTAL_CLAIM_COST'], bins=50,
-                       color='#C1121F', edgecolor='black', alpha=0.7)
-        axes[0, 0].axvline(self.encounters['TOTAL_CLAIM_COST'].mean(),
-                          color='yellow', linestyle='--', linewidth=3, label='Mean')
-        axes[0, 0].axvline(self.encounters['TOTAL_CLAIM_COST'].median(),
-                          color='cyan', linestyle='--', linewidth=3, label='Median')
-        axes[0, 0].set_title('Distribution of Visit Costs', fontsize=16, fontweight='bold', pad=15)
-        axes[0, 0].set_xlabel('Cost ($)', fontsize=12, fontweight='bold')
-        axes[0, 0].set_ylabel('Frequency (log scale)', fontsize=12, fontweight='bold')
-        axes[0, 0].legend(fontsize=12)
-        axes[0, 0].set_yscale('log')
-        axes[0, 0].grid(True, alpha=0.3)
-        
-        # 2. Average Cost by Encounter Type
-        cost_by_type = self.encounters.groupby('ENCOUNTERCLASS')['TOTAL_CLAIM_COST'].mean().sort_values()
-        colors = ['#06A77D', '#F4D35E', '#EE964B', '#F95738', '#C1121F', '#780000']
-        bars = axes[0, 1].barh(range(len(cost_by_type)), cost_by_type.values, color=colors)
-        axes[0, 1].set_yticks(range(len(cost_by_type)))
-        axes[0, 1].set_yticklabels(cost_by_type.index)
-        axes[0, 1].set_title('Average Cost by Encounter Type', fontsize=16, fontweight='bold', pad=15)
-        axes[0, 1].set_xlabel('Average Cost ($)', fontsize=12, fontweight='bold')
-        axes[0, 1].grid(True, alpha=0.3, axis='x')
-        
-        # Add value labels
-        for i, val in enumerate(cost_by_type.values):
-            axes[0, 1].text(val, i, f' ${val:,.2f}', va='center', fontweight='bold', fontsize=11)
-        
-        # 3. Cost Trend Over Time
-        yearly_avg_cost = self.encounters.groupby('YEAR')['TOTAL_CLAIM_COST'].mean()
-        axes[1, 0].plot(yearly_avg_cost.index, yearly_avg_cost.values,
-                       marker='s', linewidth=3, markersize=10, color='#F18F01')
-        axes[1, 0].fill_between(yearly_avg_cost.index, yearly_avg_cost.values,
-                                alpha=0.3, color='#F18F01')
-        axes[1, 0].set_title('Average Cost per Visit Trend', fontsize=16, fontweight='bold', pad=15)
-        axes[1, 0].set_xlabel('Year', fontsize=12, fontweight='bold')
-        axes[1, 0].set_ylabel('Average Cost ($)', fontsize=12, fontweight='bold')
-        axes[1, 0].grid(True, alpha=0.3)
-        axes[1, 0].yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-        
-        # Add value labels
-        for x, y in zip(yearly_avg_cost.index, yearly_avg_cost.values):
-            axes[1, 0].text(x, y, f'${y:,.0f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
-        
-        # 4. Cost Statistics Table
-        axes[1, 1].axis('off')
-        
-        cost_stats_by_type = self.encounters.groupby('ENCOUNTERCLASS').agg({
-            'TOTAL_CLAIM_COST': ['mean', 'median', 'sum', 'count']
+    def create_length_of_stay_dashboard(self):
+        """Dashboard 2: Length of Stay and Census Analysis"""
+        draw_length_of_stay_dashboard(self.length_of_stay_inputs())
+    
+    def cost_per_visit_inputs(self):
+        """Aggregates drawn by the cost per visit dashboard"""
+        costs = self.encounters['TOTAL_CLAIM_COST']
+        costs_by_type = self.cube.rollup('ENCOUNTERCLASS', 'TOTAL_CLAIM_COST')
+        cost_stats_by_type = pd.DataFrame({
+            'mean': costs_by_type['MEAN'],
+            'median': self._class_medians('TOTAL_CLAIM_COST'),
+            'sum': costs_by_type['SUM'],
+            'count': costs_by_type['COUNT'],
         }).round(2)
         
-        total_cost = self.encounters['TOTAL_CLAIM_COST'].sum()
-        avg_cost = self.encounters['TOTAL_CLAIM_COST'].mean()
-        median_cost = self.encounters['TOTAL_CLAIM_COST'].median()
+        total_cost = costs.sum()
+        avg_cost = costs.mean()
+        median_cost = costs.median()
         
         stats_text = "COST STATISTICS BY ENCOUNTER TYPE\n\n"
         stats_text += f"{'Type':<15} {'Avg Cost':<15} {'Median':<15} {'Total':<15} {'%':<8}\n"
         stats_text += "="*70 + "\n"
         
         for encounter_type in cost_stats_by_type.index:
-            avg = cost_stats_by_type.loc[encounter_type, ('TOTAL_CLAIM_COST', 'mean')]
-            median = cost_stats_by_type.loc[encounter_type, ('TOTAL_CLAIM_COST', 'median')]
-            total = cost_stats_by_type.loc[encounter_type, ('TOTAL_CLAIM_COST', 'sum')]
+            avg = cost_stats_by_type.loc[encounter_type, 'mean']
+            median = cost_stats_by_type.loc[encounter_type, 'median']
+            total = cost_stats_by_type.loc[encounter_type, 'sum']
             pct = (total / total_cost) * 100
             stats_text += f"{encounter_type:<15} ${avg:>13,.0f} ${median:>13,.0f} ${total:>13,.0f} {pct:>6.1f}%\n"
         
@@ -318,86 +202,31 @@ class AdditionalVisualizations:
         stats_text += f"\nMedian Cost/Visit: ${median_cost:,.2f}"
         stats_text += f"\nTotal Encounters: {len(self.encounters):,}"
         
-        axes[1, 1].text(0.05, 0.5, stats_text, fontsize=11, family='monospace',
-                       bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.5),
-                       verticalalignment='center')
-        
-        plt.tight_layout()
-        plt.savefig('cost_per_visit_dashboard.png', dpi=300, bbox_inches='tight')
-        print("✓ Saved: cost_per_visit_dashboard.png")
-        plt.close()
+        return {
+            'cost_bins': histogram(costs, bins=50),
+            'cost_by_type': costs_by_type['MEAN'].rename('TOTAL_CLAIM_COST').sort_values(),
+            'yearly_avg_cost': self.cube.mean('YEAR', 'TOTAL_CLAIM_COST'),
+            'stats_text': stats_text,
+        }
     
-    def create_insurance_coverage_dashboard(self):
-        """Dashboard 4: Procedures Covered by Insurance"""
-        print("\n📊 Creating Insurance Coverage Dashboard...")
-        
-        # Merge procedures with encounters to get coverage info
-        procedures_with_coverage = self.procedures.merge(
-            self.encounters[['Id', 'PAYER_COVERAGE', 'TOTAL_CLAIM_COST', 'ENCOUNTERCLASS']], 
-            left_on='ENCOUNTER', 
-            right_on='Id',
-            how='left'
-        )
-        
-        fig, axes = plt.subplots(2, 2, figsize=(20, 12))
-        fig.suptitle('Insurance Coverage Analysis for Procedures', 
-                     fontsize=22, fontweight='bold', y=0.995)
+    def create_cost_per_visit_dashboard(self):
+        """Dashboard 3: Average Cost per Visit"""
+        draw_cost_per_visit_dashboard(self.cost_per_visit_inputs())
+    
+    def insurance_coverage_inputs(self):
+        """Aggregates drawn by the procedure insurance coverage dashboard"""
+        # Look up each procedure's encounter once, then take its coverage info by key
+        encounter_dim = Dimension(self.encounters[['Id', 'PAYER_COVERAGE', 'TOTAL_CLAIM_COST', 'ENCOUNTERCLASS']])
+        encounter_keys = encounter_dim.keys(self.procedures['ENCOUNTER'])
+        procedures_with_coverage = self.procedures.assign(**{
+            col: encounter_dim.column(col, encounter_keys)
+            for col in ['PAYER_COVERAGE', 'TOTAL_CLAIM_COST', 'ENCOUNTERCLASS']
+        })
         
-        # 1. Coverage vs No Coverage Pie Chart
         total_procedures = len(procedures_with_coverage)
         covered = len(procedures_with_coverage[procedures_with_coverage['PAYER_COVERAGE'] > 0])
         not_covered = total_procedures - covered
         
-        sizes = [covered, not_covered]
-        labels = [f'Covered\n{covered:,}\n({covered/total_procedures*100:.1f}%)',
-                 f'Not Covered\n{not_covered:,}\n({not_covered/total_procedures*100:.1f}%)']
-        colors = ['#06A77D', '#C1121F']
-        explode = (0.05, 0.05)
-        
-        axes[0, 0].pie(sizes, labels=labels, colors=colors, explode=explode,
-                      autopct='', startangle=90, textprops={'fontsize': 14, 'fontweight': 'bold'})
-        axes[0, 0].set_title('Procedure Insurance Coverage Overview', 
-                            fontsize=16, fontweight='bold', pad=15)
-        
-        # 2. Coverage by Encounter Type
-        coverage_by_type = procedures_with_coverage.groupby('ENCOUNTERCLASS').apply(
-            lambda x: (x['PAYER_COVERAGE'] > 0).sum() / len(x) * 100
-        ).sort_values()
-        
-        bars = axes[0, 1].barh(range(len(coverage_by_type)), coverage_by_type.values,
-                              color=plt.cm.RdYlGn(coverage_by_type.values / 100))
-        axes[0, 1].set_yticks(range(len(coverage_by_type)))
-        axes[0, 1].set_yticklabels(coverage_by_type.index)
-        axes[0, 1].set_title('Insurance Coverage Rate by Encounter Type', 
-                            fontsize=16, fontweight='bold', pad=15)
-        axes[0, 1].set_xlabel('Coverage Rate (%)', fontsize=12, fontweight='bold')
-        axes[0, 1].set_xlim(0, 100)
-        axes[0, 1].grid(True, alpha=0.3, axis='x')
-        
-        # Add value labels
-        for i, val in enumerate(coverage_by_type.values):
-            axes[0, 1].text(val, i, f' {val:.1f}%', va='center', fontweight='bold')
-        
-        # 3. Average Coverage Amount by Type
-        avg_coverage_by_type = procedures_with_coverage.groupby('ENCOUNTERCLASS')['PAYER_COVERAGE'].mean().sort_values()
-        
-        bars = axes[1, 0].bar(range(len(avg_coverage_by_type)), avg_coverage_by_type.values,
-                             color='#5E548E', edgecolor='black', linewidth=1.5)
-        axes[1, 0].set_xticks(range(len(avg_coverage_by_type)))
-        axes[1, 0].set_xticklabels(avg_coverage_by_type.index, rotation=45, ha='right')
-        axes[1, 0].set_title('Average Insurance Payment per Procedure by Type', 
-                            fontsize=16, fontweight='bold', pad=15)
-        axes[1, 0].set_ylabel('Average Coverage ($)', fontsize=12, fontweight='bold')
-        axes[1, 0].grid(True, alpha=0.3, axis='y')
-        axes[1, 0].yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-        
-        # Add value labels
-        for i, val in enumerate(avg_coverage_by_type.values):
-            axes[1, 0].text(i, val, f'${val:,.0f}', ha='center', va='bottom', fontweight='bold')
-        
-        # 4. Coverage Statistics
-        axes[1, 1].axis('off')
-        
         total_claim = procedures_with_coverage['TOTAL_CLAIM_COST'].sum()
         total_coverage = procedures_with_coverage['PAYER_COVERAGE'].sum()
         total_patient_cost = total_claim - total_coverage
@@ -405,7 +234,7 @@ class AdditionalVisualizations:
         
         avg_coverage = procedures_with_coverage[procedures_with_coverage['PAYER_COVERAGE'] > 0]['PAYER_COVERAGE'].mean()
         
-        coverage_stats = procedures_with_coverage.groupby('ENCOUNTERCLASS').agg({
+        coverage_stats = procedures_with_coverage.groupby('ENCOUNTERCLASS', observed=True).agg({
             'PAYER_COVERAGE': lambda x: (x > 0).sum(),
             'ENCOUNTER': 'count'
         })
@@ -430,25 +259,44 @@ class AdditionalVisualizations:
             count = int(coverage_stats.loc[encounter_type, 'ENCOUNTER'])
             stats_text += f"{encounter_type:<15} {rate:>6.1f}% ({count:>6,} proc)\n"
         
-        axes[1, 1].text(0.05, 0.5, stats_text, fontsize=12, family='monospace',
-                       bbox=dict(boxstyle='round', facecolor='lightyellow', alpha=0.5),
-                       verticalalignment='center')
-        
-        plt.tight_layout()
-        plt.savefig('insurance_coverage_dashboard.png', dpi=300, bbox_inches='tight')
-        print("✓ Saved: insurance_coverage_dashboard.png")
-        plt.close()
+        return {
+            'covered': covered,
+            'not_covered': not_covered,
+            'coverage_by_type': procedures_with_coverage.groupby('ENCOUNTERCLASS', observed=True).apply(
+                lambda x: (x['PAYER_COVERAGE'] > 0).sum() / len(x) * 100
+            ).sort_values(),
+            'avg_coverage_by_type': procedures_with_coverage.groupby(
+                'ENCOUNTERCLASS', observed=True)['PAYER_COVERAGE'].mean().sort_values(),
+            'stats_text': stats_text,
+        }
+    
+    def create_insurance_coverage_dashboard(self):
+        """Dashboard 4: Procedures Covered by Insurance"""
+        draw_insurance_coverage_dashboard(self.insurance_coverage_inputs())
+    
+    def dashboards(self):
+        """The four additional dashboards, in output order"""
+        return [
+            Dashboard('admissions', self.admissions_inputs, draw_admissions_dashboard,
+                      ['admissions_readmissions_dashboard.png']),
+            Dashboard('length_of_stay', self.length_of_stay_inputs, draw_length_of_stay_dashboard,
+                      ['length_of_stay_dashboard.png']),
+            Dashboard('cost_per_visit', self.cost_per_visit_inputs, draw_cost_per_visit_dashboard,
+                      ['cost_per_visit_dashboard.png']),
+            Dashboard('insurance_coverage', self.insurance_coverage_inputs,
+                      draw_insurance_coverage_dashboard, ['insurance_coverage_dashboard.png']),
+        ]
     
-    def create_all_dashboards(self):
-        """Create all 4 additional dashboards"""
+    def create_all_dashboards(self, workers=None, force=False):
+        """
+        Create all 4 additional dashboards, drawing up to `workers` at once;
+        unchanged ones are only redrawn with `force`
+        """
         print("\n" + "="*80)
         print("CREATING ADDITIONAL VISUALIZATIONS")
         print("="*80)
         
-        self.create_admissions_dashboard()
-        self.create_length_of_stay_dashboard()
-        self.create_cost_per_visit_dashboard()
-        self.create_insurance_coverage_dashboard()
+        render_dashboards(self.dashboards(), workers=workers, force=force)
         
         print("\n" + "="*80)
         print("✅ ALL ADDITIONAL DASHBOARDS CREATED SUCCESSFULLY!")
@@ -458,8 +306,353 @@ class AdditionalVisualizations:
         print("  2. length_of_stay_dashboard.png")
         print("  3. cost_per_visit_dashboard.png")
         print("  4. insurance_coverage_dashboard.png")
-        print("\n🎯 Total: 4 new dashboards with 16 charts")
+        print("\n🎯 Total: 4 new dashboards with 20 charts")
+
+# Drawing functions: they take only a dashboard's aggregates, so render.py can
+# run them on worker processes
+
+def draw_admissions_dashboard(data):
+    """Draw and save Dashboard 1: Admissions and Readmissions over Time"""
+    print("\n📊 Creating Admissions/Readmissions Dashboard...")
+    overall = data['readmission_overall']
+    print("✓ Readmission rates (inpatient): " + ", ".join(
+        f"{days}-day {overall[f'RATE_{days}D']:.1f}%" for days in READMISSION_WINDOWS))
+    
+    fig, axes = plt.subplots(2, 3, figsize=(28, 12))
+    fig.suptitle('Hospital Admissions & Readmissions Analysis', 
+                 fontsize=22, fontweight='bold', y=0.995)
+    
+    # 1. Yearly Admissions Trend
+    yearly_admissions = data['yearly_admissions']
+    axes[0, 0].plot(yearly_admissions.index, yearly_admissions.values, 
+                   marker='o', linewidth=3, markersize=10, color='#2E86AB')
+    axes[0, 0].fill_between(yearly_admissions.index, yearly_admissions.values, 
+                            alpha=0.3, color='#2E86AB')
+    axes[0, 0].set_title('Total Admissions by Year', fontsize=16, fontweight='bold', pad=15)
+    axes[0, 0].set_xlabel('Year', fontsize=12, fontweight='bold')
+    axes[0, 0].set_ylabel('Number of Encounters', fontsize=12, fontweight='bold')
+    axes[0, 0].grid(True, alpha=0.3)
+    
+    # Add value labels
+    for x, y in zip(yearly_admissions.index, yearly_admissions.values):
+        axes[0, 0].text(x, y, f'{y:,}', ha='center', va='bottom', fontweight='bold')
+    
+    # 2. Readmission Rates by Discharge Year (inpatient index stays)
+    window_colors = ['#06A77D', '#F18F01', '#C1121F']
+    by_year = data['readmission_by_year']
+    for days, color in zip(READMISSION_WINDOWS, window_colors):
+        axes[0, 1].plot(by_year.index.astype(int), by_year[f'RATE_{days}D'], marker='o',
+                       linewidth=3, markersize=8, color=color, label=f'{days}-day')
+    axes[0, 1].set_title('Inpatient Readmission Rate by Discharge Year', fontsize=16,
+                        fontweight='bold', pad=15)
+    axes[0, 1].set_xlabel('Year', fontsize=12, fontweight='bold')
+    axes[0, 1].set_ylabel('Readmitted (%)', fontsize=12, fontweight='bold')
+    axes[0, 1].legend()
+    axes[0, 1].grid(True, alpha=0.3)
+    
+    # 3. Admission Rates after each Encounter Class
+    by_class = data['readmission_by_class']
+    positions = np.arange(len(by_class))
+    width = 0.8 / len(READMISSION_WINDOWS)
+    for i, (days, color) in enumerate(zip(READMISSION_WINDOWS, window_colors)):
+        axes[0, 2].bar(positions + (i - 1) * width, by_class[f'RATE_{days}D'], width,
+                      color=color, edgecolor='black', label=f'{days}-day')
+    axes[0, 2].set_xticks(positions)
+    axes[0, 2].set_xticklabels([str(c).title() for c in by_class.index], rotation=45)
+    axes[0, 2].set_title('Inpatient Admission within N Days, by Encounter Class', fontsize=16,
+                        fontweight='bold', pad=15)
+    axes[0, 2].set_ylabel('Admitted (%)', fontsize=12, fontweight='bold')
+    axes[0, 2].set_ylim(0, 100)
+    axes[0, 2].legend(ncol=len(READMISSION_WINDOWS))
+    axes[0, 2].grid(True, alpha=0.3, axis='y')
+    
+    # 4. Monthly Admission Patterns
+    monthly_admissions = data['monthly_admissions']
+    month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
+                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    
+    bars = axes[1, 0].bar(range(1, 13), monthly_admissions.values, 
+                         color='#A23B72', edgecolor='black', linewidth=1.5)
+    axes[1, 0].set_xticks(range(1, 13))
+    axes[1, 0].set_xticklabels(month_names, rotation=45)
+    axes[1, 0].set_title('Admissions by Month (All Years)', fontsize=16, fontweight='bold', pad=15)
+    axes[1, 0].set_xlabel('Month', fontsize=12, fontweight='bold')
+    axes[1, 0].set_ylabel('Number of Encounters', fontsize=12, fontweight='bold')
+    axes[1, 0].grid(True, alpha=0.3, axis='y')
+    
+    # Highlight peak month
+    peak_idx = monthly_admissions.argmax()
+    bars[peak_idx].set_color('#F18F01')
+    
+    # Add value labels
+    for i, val in enumerate(monthly_admissions.values):
+        axes[1, 0].text(i+1, val, f'{val:,}', ha='center', va='bottom', fontweight='bold')
+    
+    # 5. 30-Day Readmission Rate by Payer
+    by_payer = data['readmission_by_payer']
+    axes[1, 1].barh(range(len(by_payer)), by_payer['RATE_30D'], color='#2E86AB',
+                   edgecolor='black')
+    axes[1, 1].set_yticks(range(len(by_payer)))
+    axes[1, 1].set_yticklabels([name[:30] for name in by_payer['NAME']])
+    axes[1, 1].set_title('30-Day Readmission Rate by Payer', fontsize=16, fontweight='bold', pad=15)
+    axes[1, 1].set_xlabel('Readmitted (%)', fontsize=12, fontweight='bold')
+    axes[1, 1].grid(True, alpha=0.3, axis='x')
+    for i, (rate, stays) in enumerate(zip(by_payer['RATE_30D'], by_payer['STAYS'])):
+        axes[1, 1].text(rate, i, f' {rate:.1f}% ({stays:,} stays)', va='center', fontsize=10)
+    
+    # 6. Key Statistics Box
+    axes[1, 2].axis('off')
+    axes[1, 2].text(0.02, 0.5, data['stats_text'], fontsize=12, family='monospace',
+                   bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+                   verticalalignment='center')
+    
+    plt.tight_layout()
+    plt.savefig('admissions_readmissions_dashboard.png', dpi=300, bbox_inches='tight')
+    print("✓ Saved: admissions_readmissions_dashboard.png")
+    plt.close()
+
+def draw_length_of_stay_dashboard(data):
+    """Draw and save Dashboard 2: Length of Stay and Census Analysis"""
+    print("\n📊 Creating Length of Stay Dashboard...")
+    durations = data['duration_bins']
+    
+    fig, axes = plt.subplots(2, 3, figsize=(28, 12))
+    fig.suptitle('Hospital Length of Stay & Census Analysis', 
+                 fontsize=22, fontweight='bold', y=0.995)
+    
+    # 1. Distribution of Stay Duration (log scale for better visibility)
+    plot_histogram(axes[0, 0], durations, 
+                   color='#5E548E', edgecolor='black', alpha=0.7)
+    axes[0, 0].axvline(durations.mean, 
+                      color='red', linestyle='--', linewidth=2, label='Mean')
+    axes[0, 0].axvline(durations.median, 
+                      color='green', linestyle='--', linewidth=2, label='Median')
+    axes[0, 0].set_title('Distribution of Stay Duration', fontsize=16, fontweight='bold', pad=15)
+    axes[0, 0].set_xlabel('Duration (Hours)', fontsize=12, fontweight='bold')
+    axes[0, 0].set_ylabel('Frequency', fontsize=12, fontweight='bold')
+    axes[0, 0].legend(fontsize=12)
+    axes[0, 0].set_yscale('log')
+    axes[0, 0].grid(True, alpha=0.3)
+    
+    # 2. Average Stay by Encounter Type
+    avg_by_type = data['avg_by_type']
+    colors_type = plt.cm.Spectral(np.linspace(0, 1, len(avg_by_type)))
+    bars = axes[0, 1].barh(range(len(avg_by_type)), avg_by_type.values, color=colors_type)
+    axes[0, 1].set_yticks(range(len(avg_by_type)))
+    axes[0, 1].set_yticklabels(avg_by_type.index)
+    axes[0, 1].set_title('Average Stay Duration by Encounter Type', 
+                        fontsize=16, fontweight='bold', pad=15)
+    axes[0, 1].set_xlabel('Average Duration (Hours)', fontsize=12, fontweight='bold')
+    axes[0, 1].grid(True, alpha=0.3, axis='x')
+    
+    # Add value labels
+    for i, val in enumerate(avg_by_type.values):
+        axes[0, 1].text(val, i, f' {val:.2f}h ({val/24:.2f}d)', 
+                      va='center', fontweight='bold')
+    
+    # 3. Average Census by Hour of Day (encounters in progress)
+    by_hour_of_day = data['census_by_hour_of_day']
+    for encounter_type, color in zip(by_hour_of_day.columns,
+                                     plt.cm.Spectral(np.linspace(0, 1, len(by_hour_of_day.columns)))):
+        axes[0, 2].plot(by_hour_of_day.index, by_hour_of_day[encounter_type], marker='o',
+                       linewidth=2, color=color, label=encounter_type)
+    axes[0, 2].set_xticks(range(0, 24, 2))
+    axes[0, 2].set_title('Average Hourly Census by Encounter Type', fontsize=16,
+                        fontweight='bold', pad=15)
+    axes[0, 2].set_xlabel('Hour of Day', fontsize=12, fontweight='bold')
+    axes[0, 2].set_ylabel('Encounters in Progress', fontsize=12, fontweight='bold')
+    axes[0, 2].legend()
+    axes[0, 2].grid(True, alpha=0.3)
+    
+    # 4. Stay Duration Over Time (Yearly Trend)
+    yearly_avg_duration = data['yearly_avg_duration']
+    axes[1, 0].plot(yearly_avg_duration.index, yearly_avg_duration.values,
+                   marker='o', linewidth=3, markersize=10, color='#06A77D')
+    axes[1, 0].fill_between(yearly_avg_duration.index, yearly_avg_duration.values,
+                            alpha=0.3, color='#06A77D')
+    axes[1, 0].set_title('Average Stay Duration Trend', fontsize=16, fontweight='bold', pad=15)
+    axes[1, 0].set_xlabel('Year', fontsize=12, fontweight='bold')
+    axes[1, 0].set_ylabel('Average Duration (Hours)', fontsize=12, fontweight='bold')
+    axes[1, 0].grid(True, alpha=0.3)
+    
+    # Add value labels
+    for x, y in zip(yearly_avg_duration.index, yearly_avg_duration.values):
+        axes[1, 0].text(x, y, f'{y:.1f}h', ha='center', va='bottom', fontweight='bold')
+    
+    # 5. Daily Census Over Time (monthly average of encounters in progress per day)
+    monthly_census = data['monthly_census']
+    peak_date, peak_count = data['peak_day']
+    axes[1, 1].stackplot(monthly_census.index, monthly_census.T.values,
+                        labels=monthly_census.columns,
+                        colors=plt.cm.Spectral(np.linspace(0, 1, len(monthly_census.columns))))
+    axes[1, 1].axhline(peak_count, color='red', linestyle='--', linewidth=2,
+                      label=f'Peak day: {peak_date:%Y-%m-%d} ({peak_count:,})')
+    axes[1, 1].set_title('Daily Census (Monthly Average)', fontsize=16, fontweight='bold', pad=15)
+    axes[1, 1].set_xlabel('Date', fontsize=12, fontweight='bold')
+    axes[1, 1].set_ylabel('Encounters in Progress per Day', fontsize=12, fontweight='bold')
+    axes[1, 1].legend(loc='upper left', ncol=2, fontsize=9)
+    axes[1, 1].grid(True, alpha=0.3)
+    
+    # 6. Length of Stay Statistics by Type
+    axes[1, 2].axis('off')
+    axes[1, 2].text(0.05, 0.5, data['stats_text'], fontsize=11, family='monospace',
+                   bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.5),
+                   verticalalignment='center')
+    
+    plt.tight_layout()
+    plt.savefig('length_of_stay_dashboard.png', dpi=300, bbox_inches='tight')
+    print("✓ Saved: length_of_stay_dashboard.png")
+    plt.close()
+
+def draw_cost_per_visit_dashboard(data):
+    """Draw and save Dashboard 3: Average Cost per Visit"""
+    print("\n📊 Creating Cost per Visit Dashboard...")
+    
+    fig, axes = plt.subplots(2, 2, figsize=(20, 12))
+    fig.suptitle('Average Cost per Visit Analysis', 
+                 fontsize=22, fontweight='bold', y=0.995)
+    
+    # 1. Cost Distribution (log scale)
+    costs = data['cost_bins']
+    plot_histogram(axes[0, 0], costs,
+                   color='#C1121F', edgecolor='black', alpha=0.7)
+    axes[0, 0].axvline(costs.mean,
+                      color='yellow', linestyle='--', linewidth=3, label='Mean')
+    axes[0, 0].axvline(costs.median,
+                      color='cyan', linestyle='--', linewidth=3, label='Median')
+    axes[0, 0].set_title('Distribution of Visit Costs', fontsize=16, fontweight='bold', pad=15)
+    axes[0, 0].set_xlabel('Cost ($)', fontsize=12, fontweight='bold')
+    axes[0, 0].set_ylabel('Frequency (log scale)', fontsize=12, fontweight='bold')
+    axes[0, 0].legend(fontsize=12)
+    axes[0, 0].set_yscale('log')
+    axes[0, 0].grid(True, alpha=0.3)
+    
+    # 2. Average Cost by Encounter Type
+    cost_by_type = data['cost_by_type']
+    colors = ['#06A77D', '#F4D35E', '#EE964B', '#F95738', '#C1121F', '#780000']
+    bars = axes[0, 1].barh(range(len(cost_by_type)), cost_by_type.values, color=colors)
+    axes[0, 1].set_yticks(range(len(cost_by_type)))
+    axes[0, 1].set_yticklabels(cost_by_type.index)
+    axes[0, 1].set_title('Average Cost by Encounter Type', fontsize=16, fontweight='bold', pad=15)
+    axes[0, 1].set_xlabel('Average Cost ($)', fontsize=12, fontweight='bold')
+    axes[0, 1].grid(True, alpha=0.3, axis='x')
+    
+    # Add value labels
+    for i, val in enumerate(cost_by_type.values):
+        axes[0, 1].text(val, i, f' ${val:,.2f}', va='center', fontweight='bold', fontsize=11)
+    
+    # 3. Cost Trend Over Time
+    yearly_avg_cost = data['yearly_avg_cost']
+    axes[1, 0].plot(yearly_avg_cost.index, yearly_avg_cost.values,
+                   marker='s', linewidth=3, markersize=10, color='#F18F01')
+    axes[1, 0].fill_between(yearly_avg_cost.index, yearly_avg_cost.values,
+                            alpha=0.3, color='#F18F01')
+    axes[1, 0].set_title('Average Cost per Visit Trend', fontsize=16, fontweight='bold', pad=15)
+    axes[1, 0].set_xlabel('Year', fontsize=12, fontweight='bold')
+    axes[1, 0].set_ylabel('Average Cost ($)', fontsize=12, fontweight='bold')
+    axes[1, 0].grid(True, alpha=0.3)
+    axes[1, 0].yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    
+    # Add value labels
+    for x, y in zip(yearly_avg_cost.index, yearly_avg_cost.values):
+        axes[1, 0].text(x, y, f'${y:,.0f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
+    
+    # 4. Cost Statistics Table
+    axes[1, 1].axis('off')
+    axes[1, 1].text(0.05, 0.5, data['stats_text'], fontsize=11, family='monospace',
+                   bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.5),
+                   verticalalignment='center')
+    
+    plt.tight_layout()
+    plt.savefig('cost_per_visit_dashboard.png', dpi=300, bbox_inches='tight')
+    print("✓ Saved: cost_per_visit_dashboard.png")
+    plt.close()
+
+def draw_insurance_coverage_dashboard(data):
+    """Draw and save Dashboard 4: Procedures Covered by Insurance"""
+    print("\n📊 Creating Insurance Coverage Dashboard...")
+    
+    fig, axes = plt.subplots(2, 2, figsize=(20, 12))
+    fig.suptitle('Insurance Coverage Analysis for Procedures', 
+                 fontsize=22, fontweight='bold', y=0.995)
+    
+    # 1. Coverage vs No Coverage Pie Chart
+    covered, not_covered = data['covered'], data['not_covered']
+    total_procedures = covered + not_covered
+    
+    sizes = [covered, not_covered]
+    labels = [f'Covered\n{covered:,}\n({covered/total_procedures*100:.1f}%)',
+             f'Not Covered\n{not_covered:,}\n({not_covered/total_procedures*100:.1f}%)']
+    colors = ['#06A77D', '#C1121F']
+    explode = (0.05, 0.05)
+    
+    axes[0, 0].pie(sizes, labels=labels, colors=colors, explode=explode,
+                  autopct='', startangle=90, textprops={'fontsize': 14, 'fontweight': 'bold'})
+    axes[0, 0].set_title('Procedure Insurance Coverage Overview', 
+                        fontsize=16, fontweight='bold', pad=15)
+    
+    # 2. Coverage by Encounter Type
+    coverage_by_type = data['coverage_by_type']
+    bars = axes[0, 1].barh(range(len(coverage_by_type)), coverage_by_type.values,
+                          color=plt.cm.RdYlGn(coverage_by_type.values / 100))
+    axes[0, 1].set_yticks(range(len(coverage_by_type)))
+    axes[0, 1].set_yticklabels(coverage_by_type.index)
+    axes[0, 1].set_title('Insurance Coverage Rate by Encounter Type', 
+                        fontsize=16, fontweight='bold', pad=15)
+    axes[0, 1].set_xlabel('Coverage Rate (%)', fontsize=12, fontweight='bold')
+    axes[0, 1].set_xlim(0, 100)
+    axes[0, 1].grid(True, alpha=0.3, axis='x')
+    
+    # Add value labels
+    for i, val in enumerate(coverage_by_type.values):
+        axes[0, 1].text(val, i, f' {val:.1f}%', va='center', fontweight='bold')
+    
+    # 3. Average Coverage Amount by Type
+    avg_coverage_by_type = data['avg_coverage_by_type']
+    bars = axes[1, 0].bar(range(len(avg_coverage_by_type)), avg_coverage_by_type.values,
+                         color='#5E548E', edgecolor='black', linewidth=1.5)
+    axes[1, 0].set_xticks(range(len(avg_coverage_by_type)))
+    axes[1, 0].set_xticklabels(avg_coverage_by_type.index, rotation=45, ha='right')
+    axes[1, 0].set_title('Average Insurance Payment per Procedure by Type', 
+                        fontsize=16, fontweight='bold', pad=15)
+    axes[1, 0].set_ylabel('Average Coverage ($)', fontsize=12, fontweight='bold')
+    axes[1, 0].grid(True, alpha=0.3, axis='y')
+    axes[1, 0].yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    
+    # Add value labels
+    for i, val in enumerate(avg_coverage_by_type.values):
+        axes[1, 0].text(i, val, f'${val:,.0f}', ha='center', va='bottom', fontweight='bold')
+    
+    # 4. Coverage Statistics
+    axes[1, 1].axis('off')
+    axes[1, 1].text(0.05, 0.5, data['stats_text'], fontsize=12, family='monospace',
+                   bbox=dict(boxstyle='round', facecolor='lightyellow', alpha=0.5),
+                   verticalalignment='center')
+    
+    plt.tight_layout()
+    plt.savefig('insurance_coverage_dashboard.png', dpi=300, bbox_inches='tight')
+    print("✓ Saved: insurance_coverage_dashboard.png")
+    plt.close()
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Additional hospital dashboards")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="dashboards drawn at once on worker processes "
+                             "(default: CPU count; 1 draws them in order in this process)")
+    parser.add_argument('--force', action='store_true',
+                        help="redraw every dashboard, even those whose inputs are unchanged")
+    add_window_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        args.window = month_window(args.start, args.end)
+    except ValueError as exc:
+        parser.error(str(exc))
+    return args
 
 if __name__ == "__main__":
-    viz = AdditionalVisualizations()
-    viz.create_all_dashboards()
+    args = parse_args()
+    viz = AdditionalVisualizations(window=args.window)
+    viz.create_all_dashboards(workers=args.workers, force=args.force)
@@ -0,0 +1,84 @@
+"""
+Persisted Analysis State
+========================
+Saves the analyzer's mergeable partial aggregates (see ``partials.py``) next to
+``ai_analysis_insights.json`` so that a daily delta of new encounters and
+procedures can be folded in without re-reading the full history.
+
+The state holds the running totals, per-ENCOUNTERCLASS statistics, per-payer
+coverage, per-patient counters and the encounter rollup cube, plus the
+SHA-256 of every delta file already applied so the same delta is never
+counted twice. Deltas are assumed to be append-only (new rows only).
+
+Everything whose size is bounded by the population or the calendar rather
+than by the number of rows - the per-patient and per-class tables, the
+cube, the frequency tables and the sketches - is pickled into a small core,
+``state.pkl``. The parts that grow with every row in exact mode - the value
+histograms and the distinct encounter ids, patients and (patient, reason)
+pairs - are written as append-only segments beside it (see ``segments.py``):
+sorted NumPy arrays that a later run memory-maps and searches instead of
+loading. A delta run therefore reads the core and the pages its lookups
+touch, and writes the core plus one segment per structure, sized by the
+delta; segments of similar size are merged as they accumulate, so a
+structure keeps a logarithmic number of them.
+
+    ai_analysis_state/
+        state.pkl                       core: version, partials, applied deltas
+        <segment>.<field>.npy           segment arrays, memory-mapped on read
+
+A save writes the new segments first, then replaces the core atomically,
+then deletes the segments the new core no longer refers to, so an
+interrupted save leaves the previous state intact.
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+from segments import SegmentStore
+
+STATE_DIR = 'ai_analysis_state'
+STATE_CORE = 'state.pkl'
+STATE_VERSION = 13
+
+
+def save_state(encounter_stats, procedure_stats, applied_deltas, path=STATE_DIR):
+    """
+    Write the partial aggregates and the list of applied delta hashes: new
+    segments, then the core atomically, then the deletion of stale segments
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    store = SegmentStore(path)
+    state = {
+        'version': STATE_VERSION,
+        'encounters': encounter_stats.persisted(store),
+        'procedures': procedure_stats.persisted(store),
+        'applied_deltas': list(applied_deltas),
+        'store': store,
+    }
+    tmp_path = path / (STATE_CORE + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path / STATE_CORE)
+    store.collect()
+
+
+def load_state(path=STATE_DIR):
+    """Load a saved state's core, failing clearly if there is no compatible base run"""
+    path = Path(path)
+    if not (path / STATE_CORE).exists():
+        raise FileNotFoundError(
+            f"No saved analysis state in {path}; run a full analysis first "
+            "(python 01_ai_analysis_main.py) before applying deltas"
+        )
+    with open(path / STATE_CORE, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(
+            f"Analysis state {path} has version {state.get('version')}, expected "
+            f"{STATE_VERSION}; rerun the full analysis to rebuild it"
+        )
+    # Every segmented structure shares the store; point it at where the state is now
+    state['store'].path = path
+    return state
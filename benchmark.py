@@ -0,0 +1,284 @@
+"""
+Stage Benchmark Harness
+=======================
+Times every stage of the analysis pipeline across synthetic dataset scale
+factors, so regressions show up as the encounter table grows:
+
+    01  AIHospitalAnalyzer        load, prepare_patients, prepare_data, analyze_*,
+                                  identify_risk_factors
+    02  AIVisualizationGenerator  load, every create_* builder
+    03  AIConsolidatedDashboard   load, every create_* builder
+    04  AdditionalVisualizations  load, every create_* builder
+
+For each stage the harness records wall time, CPU time and peak RSS. On Linux
+the peak is reset before every stage (``/proc/self/clear_refs``) so it is the
+stage's own high-water mark; elsewhere it falls back to the process peak.
+
+Data for each scale is generated once with ``generate_synthetic_data.py`` into
+``--work-dir`` and reused while the scale and seed match. Results are written
+as JSON; ``--baseline`` compares them with a stored results file and exits
+with status 1 if any stage got slower or larger than the tolerance allows.
+
+Usage:
+    python benchmark.py --scales 1 10 --save-baseline benchmark_baseline.json
+    python benchmark.py --scales 1 10 --baseline benchmark_baseline.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+
+from generate_synthetic_data import generate
+
+REPO_DIR = Path(__file__).resolve().parent
+REFERENCE_FILES = ['patients.csv', 'payers.csv', 'organizations.csv', 'data_dictionary.csv']
+WORK_DIR = '.benchmark'
+RESULTS_FILE = 'benchmark_results.json'
+
+# Script, class, and the analysis stages to run after loading (dashboard
+# classes run every create_* method instead)
+PIPELINES = [
+    ('01_ai_analysis_main.py', 'AIHospitalAnalyzer',
+     ['prepare_patients', 'prepare_data', 'analyze_demographics', 'analyze_financial',
+      'analyze_clinical_operations', 'analyze_temporal_patterns', 'identify_risk_factors']),
+    ('02_ai_visualizations.py', 'AIVisualizationGenerator', None),
+    ('03_ai_dashboard.py', 'AIConsolidatedDashboard', None),
+    ('04_additional_visualizations.py', 'AdditionalVisualizations', None),
+]
+
+# A stage regresses if it exceeds the baseline by the tolerance AND by the
+# absolute floor, so millisecond-scale stages do not fail on timer noise
+DEFAULT_TOLERANCE = 0.25
+MIN_SECONDS = 0.25
+MIN_RSS_MB = 20.0
+
+
+def load_script(filename):
+    """Import a numbered script (e.g. 01_ai_analysis_main.py) as a module"""
+    name = Path(filename).stem
+    spec = importlib.util.spec_from_file_location(f'bench_{name}', REPO_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def dashboard_stages(cls):
+    """The create_* builder methods of a dashboard class, in definition order"""
+    return [name for name in vars(cls)
+            if name.startswith('create_') and name != 'create_all_dashboards']
+
+
+class PeakRSS:
+    """Peak resident set size of the process during a block, in MB"""
+
+    STATUS = Path('/proc/self/status')
+    CLEAR_REFS = Path('/proc/self/clear_refs')
+
+    def __init__(self):
+        self.resettable = True
+        self.peak_mb = None
+
+    def _reset(self):
+        try:
+            self.CLEAR_REFS.write_text('5')  # resets VmHWM to the current RSS
+        except OSError:
+            self.resettable = False
+
+    def _read(self):
+        if self.resettable:
+            for line in self.STATUS.read_text().splitlines():
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+        # ru_maxrss is KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+    def __enter__(self):
+        self._reset()
+        return self
+
+    def __exit__(self, *exc):
+        self.peak_mb = self._read()
+        return False
+
+
+def measure(func):
+    """Run func and return (wall seconds, CPU seconds, peak RSS MB)"""
+    with PeakRSS() as rss, contextlib.redirect_stdout(io.StringIO()):
+        wall, cpu = time.perf_counter(), time.process_time()
+        func()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return wall, cpu, rss.peak_mb
+
+
+def prepare_scale(scale, seed, work_dir, cold=False):
+    """Generate (or reuse) the dataset directory for one scale factor"""
+    data_dir = Path(work_dir) / f'scale_{scale:g}'
+    stamp_file = data_dir / 'generator.json'
+    stamp = {'scale': scale, 'seed': seed}
+    current = stamp_file.exists() and json.loads(stamp_file.read_text()) == stamp
+
+    if not current:
+        print(f"  🧪 Generating scale {scale:g}x data in {data_dir}...")
+        data_dir.mkdir(parents=True, exist_ok=True)
+        for name in REFERENCE_FILES:
+            shutil.copy2(REPO_DIR / name, data_dir / name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(scale, seed, data_dir=data_dir, out_dir=data_dir)
+        stamp_file.write_text(json.dumps(stamp))
+    if cold or not current:
+        shutil.rmtree(data_dir / '.data_cache', ignore_errors=True)
+    return data_dir
+
+
+def run_pipeline(module, class_name, stages):
+    """Time the constructor and each stage of one pipeline, in order"""
+    cls = getattr(module, class_name)
+    results = []
+    holder = {}
+
+    def construct():
+        holder['obj'] = cls()
+
+    wall, cpu, rss = measure(construct)
+    results.append(('load', wall, cpu, rss))
+    for stage in stages or dashboard_stages(cls):
+        wall, cpu, rss = measure(getattr(holder['obj'], stage))
+        results.append((stage, wall, cpu, rss))
+    return results
+
+
+def run_benchmarks(scales, seed=0, work_dir=WORK_DIR, repeat=1, cold=False, scripts=None):
+    """Run every pipeline at every scale and return the result records"""
+    modules = {filename: load_script(filename) for filename, _, _ in PIPELINES
+               if not scripts or filename[:2] in scripts}
+    records = []
+    cwd = os.getcwd()
+    for scale in scales:
+        data_dir = prepare_scale(scale, seed, work_dir, cold)
+        os.chdir(data_dir)
+        try:
+            for filename, class_name, stages in PIPELINES:
+                if filename not in modules:
+                    continue
+                print(f"  ⏱️  {scale:g}x {filename}")
+                best = {}
+                for _ in range(repeat):
+                    if cold:
+                        shutil.rmtree('.data_cache', ignore_errors=True)
+                    for stage, wall, cpu, rss in run_pipeline(modules[filename], class_name, stages):
+                        if stage not in best or wall < best[stage][0]:
+                            best[stage] = (wall, cpu, rss)
+                for stage, (wall, cpu, rss) in best.items():
+                    records.append({
+                        'scale': scale,
+                        'script': Path(filename).stem,
+                        'stage': stage,
+                        'wall_s': round(wall, 4),
+                        'cpu_s': round(cpu, 4),
+                        'peak_rss_mb': round(rss, 1),
+                    })
+        finally:
+            os.chdir(cwd)
+    return records
+
+
+def compare(records, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a description of every stage that regressed against the baseline"""
+    base = {(r['scale'], r['script'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for record in records:
+        old = base.get((record['scale'], record['script'], record['stage']))
+        if old is None:
+            continue
+        label = f"{record['scale']:g}x {record['script']}.{record['stage']}"
+        for metric, floor, unit in [('wall_s', MIN_SECONDS, 's'), ('peak_rss_mb', MIN_RSS_MB, ' MB')]:
+            new_value, old_value = record[metric], old[metric]
+            if new_value > old_value * (1 + tolerance) and new_value - old_value > floor:
+                regressions.append(f"{label} {metric}: {old_value:.3f}{unit} -> {new_value:.3f}{unit} "
+                                   f"(+{(new_value / old_value - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(records):
+    """Print the results as an aligned table"""
+    print(f"\n{'scale':>6}  {'stage':<62} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}")
+    for r in records:
+        stage = f"{r['script']}.{r['stage']}"
+        print(f"{r['scale']:>5g}x  {stage:<62} {r['wall_s']:>9.3f} {r['cpu_s']:>9.3f} "
+              f"{r['peak_rss_mb']:>9.1f}")
+
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Benchmark every analysis and dashboard stage")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10],
+                        help="dataset scale factors to run (default: 1 10)")
+    parser.add_argument('--seed', type=int, default=0, help="generator seed (default: 0)")
+    parser.add_argument('--scripts', nargs='+', choices=['01', '02', '03', '04'],
+                        help="only benchmark these scripts")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="runs per pipeline; the fastest run of each stage is kept")
+    parser.add_argument('--cold', action='store_true',
+                        help="drop the dataset cache before every run so 'load' includes CSV parsing")
+    parser.add_argument('--work-dir', default=WORK_DIR, help=f"generated data location (default: {WORK_DIR})")
+    parser.add_argument('--output', default=RESULTS_FILE, help=f"results file (default: {RESULTS_FILE})")
+    parser.add_argument('--baseline', help="results file to compare against; regressions exit with 1")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed relative slowdown/growth (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument('--save-baseline', metavar='PATH', help="also write the results as a new baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    print("="*80)
+    print("PIPELINE BENCHMARK")
+    print("="*80)
+
+    work_dir = Path(args.work_dir).resolve()
+    records = run_benchmarks(args.scales, args.seed, work_dir, args.repeat, args.cold, args.scripts)
+    results = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'cold': args.cold,
+        },
+        'results': records,
+    }
+    print_table(records)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to: {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Census Engine
+=============
+Concurrent occupancy (how many encounters are in progress) per hour or day,
+overall or per ENCOUNTERCLASS / ORGANIZATION, by a sweep over START/STOP
+events.
+
+Every encounter becomes a +1 event at the first bin it overlaps and a -1 event
+after the last one. The events are sorted once by a composite (group, bin)
+int64 key and their running sum is the occupancy, so the whole history costs
+O(n log n) however many decades or groups it spans:
+
+    steps = occupancy_steps(encounters, by='ENCOUNTERCLASS')
+    census_table(steps, by='ENCOUNTERCLASS')   # bins x classes, dense
+    peak_windows(steps, by='ENCOUNTERCLASS')   # highest-occupancy windows
+
+An encounter occupies every bin its [START, STOP) interval overlaps; one that
+stops when it starts occupies the bin it starts in. Rows without a valid START
+or STOP are left out.
+
+The sweep result is a sparse step function - one row per bin where a group's
+occupancy changes - so organizations over decades stay small. ``census_table``
+expands it to one row per bin for charting a few groups.
+"""
+
+import numpy as np
+import pandas as pd
+
+from financial_engine import category_codes
+from timeparse import SECONDS_PER_DAY, epoch_seconds
+
+RESOLUTIONS = {'hour': 3600, 'day': SECONDS_PER_DAY}
+
+
+def _bins(encounters, resolution):
+    """First and one-past-last bin each valid encounter occupies, and the validity mask"""
+    step = RESOLUTIONS[resolution]
+    start, start_valid = epoch_seconds(encounters['START'])
+    stop, stop_valid = epoch_seconds(encounters['STOP'])
+    valid = start_valid & stop_valid
+    first = start // step
+    last = np.maximum(stop - 1, start) // step + 1
+    return first[valid], last[valid], valid
+
+
+def occupancy_steps(encounters, by=None, resolution='hour'):
+    """
+    Occupancy as a step function: one row per (``by`` value, bin) where it
+    changes, holding until the group's next row; each group ends with a row
+    at occupancy 0. Columns: ``by`` (if given), TIME (bin start), OCCUPANCY.
+    """
+    step = RESOLUTIONS[resolution]
+    first, last, valid = _bins(encounters, resolution)
+    if by is None:
+        codes, labels = np.zeros(len(first), dtype=np.int64), pd.Index([None])
+    else:
+        codes, labels = category_codes(encounters[by])
+        codes = codes[valid].astype(np.int64)
+        keep = codes >= 0
+        codes, first, last = codes[keep], first[keep], last[keep]
+
+    columns = ([by] if by is not None else []) + ['TIME', 'OCCUPANCY']
+    if len(first) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # One sweep over every group: the composite key keeps each group's events
+    # together and in time order, and each group's events sum to zero, so the
+    # running sum restarts at 0 for the next group. The low bit tells a -1
+    # (set) from a +1, so the keys sort by value with no separate gather.
+    origin = first.min()
+    span = last.max() - origin + 1
+    events = np.sort(np.concatenate([(codes * span + (first - origin)) << 1,
+                                     ((codes * span + (last - origin)) << 1) | 1]))
+    occupancy = np.cumsum(1 - ((events & 1) << 1))
+    keys = events >> 1
+
+    # Occupancy after the last event of each key, where it changed
+    ends = np.append(keys[1:] != keys[:-1], True)
+    keys, occupancy = keys[ends], occupancy[ends]
+    group = keys // span
+    changed = np.append(True, (occupancy[1:] != occupancy[:-1]) | (group[1:] != group[:-1]))
+    keys, occupancy, group = keys[changed], occupancy[changed], group[changed]
+
+    steps = pd.DataFrame({
+        'TIME': ((keys - group * span + origin) * step).astype('datetime64[s]'),
+        'OCCUPANCY': occupancy,
+    })
+    if by is not None:
+        steps.insert(0, by, pd.Categorical.from_codes(group, categories=labels))
+    return steps
+
+
+def census_table(steps, by=None, resolution='hour'):
+    """
+    Occupancy at every bin from the first step to the last: a Series, or a
+    DataFrame with one column per ``by`` value.
+    """
+    step = RESOLUTIONS[resolution]
+    bins = steps['TIME'].to_numpy().astype('datetime64[s]').view(np.int64) // step
+    if len(bins) == 0:
+        return pd.Series(dtype='int64') if by is None else pd.DataFrame()
+    origin = bins.min()
+    if by is None:
+        codes, labels = np.zeros(len(bins), dtype=np.int64), [None]
+    else:
+        codes, labels = category_codes(steps[by])
+        labels = list(labels)
+
+    # Changes in occupancy at their bins, summed along time per group
+    occupancy = steps['OCCUPANCY'].to_numpy()
+    new_group = np.append(True, codes[1:] != codes[:-1])
+    changes = occupancy - np.where(new_group, 0, np.roll(occupancy, 1))
+    grid = np.zeros((len(labels), bins.max() - origin + 1), dtype=np.int64)
+    grid[codes, bins - origin] = changes
+    grid = np.cumsum(grid, axis=1)
+
+    index = pd.DatetimeIndex(((origin + np.arange(grid.shape[1])) * step).astype('datetime64[s]'),
+                             name='TIME')
+    if by is None:
+        return pd.Series(grid[0], index=index, name='OCCUPANCY')
+    return pd.DataFrame(grid.T, index=index, columns=pd.Index(labels, name=by))
+
+
+def peak_windows(steps, by=None, top=5, per_group=False):
+    """
+    The ``top`` highest-occupancy windows (earliest first among ties): the
+    stretches from a step to the group's next one. With ``per_group``, the
+    ``top`` windows of every ``by`` value. Columns: ``by`` (if given), START,
+    END, HOURS, OCCUPANCY.
+    """
+    starts = steps['TIME'].to_numpy()
+    occupancy = steps['OCCUPANCY'].to_numpy()
+    codes = np.zeros(len(steps), np.int64) if by is None else category_codes(steps[by])[0]
+    # Each step lasts until the group's next one; a group's last step
+    # (occupancy 0) has no end and is never a peak
+    last = np.append(codes[1:] != codes[:-1], True)[:len(steps)]
+    rows = np.flatnonzero(~last)
+    per_group = per_group and by is not None
+    if not per_group and len(rows) > top > 0:
+        # Only steps at or above the top-th highest occupancy can make the cut
+        threshold = np.partition(occupancy[rows], -top)[-top]
+        rows = rows[occupancy[rows] >= threshold]
+
+    # Highest occupancy first (within each group); steps are in time order
+    # within a group, so a stable sort keeps the earliest first among ties
+    rank = occupancy.max(initial=0) - occupancy[rows]
+    if per_group:
+        rank = rank + codes[rows] * (occupancy.max(initial=0) + 1)
+    rows = rows[np.argsort(rank, kind='stable')]
+    if per_group:
+        groups = codes[rows]
+        position = np.arange(len(rows))
+        group_start = np.maximum.accumulate(
+            np.where(np.append(True, groups[1:] != groups[:-1]), position, 0)) if len(rows) else position
+        rows = rows[position - group_start < top]
+    else:
+        rows = rows[:top]
+
+    windows = steps.iloc[rows].rename(columns={'TIME': 'START'}).reset_index(drop=True)
+    windows.insert(windows.columns.get_loc('START') + 1, 'END', starts[rows + 1])
+    windows.insert(windows.columns.get_loc('END') + 1, 'HOURS',
+                   (starts[rows + 1] - starts[rows]) / np.timedelta64(1, 'h'))
+    return windows
+
+
+def census_report(encounters, top=5):
+    """
+    Census overall and per ENCOUNTERCLASS and ORGANIZATION, as a dict:
+
+        hourly             dense hourly occupancy (Series)
+        class_hourly       dense hourly occupancy per class (DataFrame)
+        class_daily        dense daily occupancy per class (DataFrame)
+        peaks              the ``top`` overall peak windows
+        class_peaks        each class's peak window
+        organization_peaks each organization's peak window
+    """
+    overall = occupancy_steps(encounters)
+    by_class = occupancy_steps(encounters, 'ENCOUNTERCLASS')
+    return {
+        'hourly': census_table(overall),
+        'class_hourly': census_table(by_class, 'ENCOUNTERCLASS'),
+        'class_daily': census_table(occupancy_steps(encounters, 'ENCOUNTERCLASS', 'day'),
+                                    'ENCOUNTERCLASS', 'day'),
+        'peaks': peak_windows(overall, top=top),
+        'class_peaks': peak_windows(by_class, 'ENCOUNTERCLASS', top=1, per_group=True),
+        'organization_peaks': peak_windows(occupancy_steps(encounters, 'ORGANIZATION'),
+                                           'ORGANIZATION', top=1, per_group=True),
+    }
@@ -0,0 +1,168 @@
+"""
+Memory-Mapped Column Store
+==========================
+Binary on-disk layout for large fact tables: one ``.npy`` file per column,
+opened with ``np.load(mmap_mode='r')`` so that loading a table costs only the
+page faults on the columns an analysis actually touches.
+
+Layout of a store directory:
+
+    meta.json          row count and, per column, its kind, dtype and files
+    NNN.npy            column values (codes for categorical columns,
+                       int64 ticks for datetimes, concatenated UTF-8 bytes
+                       for text)
+    NNN.dict.json      dictionary (category labels) of a categorical column
+    NNN.offsets.npy    start of each value of a text column in its bytes,
+                       plus the end of the last (int64, Arrow layout)
+    NNN.valid.npy      validity bitmap of a text column, if it has nulls
+
+Every column is returned as a zero-copy view of the mapped files. Text
+columns (e.g. encounter ``Id``) are laid out like an Arrow large_string
+array, so pyarrow wraps the mapped offsets, bytes and bitmap as they are and
+pandas sees an ordinary ``str`` column; no value is decoded until it is read.
+pyarrow is only imported for text columns.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+META_FILE = 'meta.json'
+
+
+def _column_kind(series):
+    """Classify a column as category, datetime, numeric or text"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return 'category'
+    if pd.api.types.is_datetime64_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return 'numeric'
+    return 'text'
+
+
+def write_column_store(df, path):
+    """Write a DataFrame as a column store directory, replacing any existing store"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    meta = {'rows': len(df), 'columns': []}
+    for i, (name, series) in enumerate(df.items()):
+        stem = f'{i:03d}'
+        kind = _column_kind(series)
+        entry = {'name': name, 'kind': kind, 'file': f'{stem}.npy', 'dtype': str(series.dtype)}
+
+        if kind == 'category':
+            np.save(tmp_path / entry['file'], series.cat.codes.to_numpy())
+            entry['dictionary'] = f'{stem}.dict.json'
+            with open(tmp_path / entry['dictionary'], 'w') as f:
+                json.dump(series.cat.categories.tolist(), f)
+        elif kind == 'datetime':
+            np.save(tmp_path / entry['file'], series.to_numpy().view('i8'))
+        elif kind == 'numeric':
+            np.save(tmp_path / entry['file'], series.to_numpy())
+        else:
+            import pyarrow as pa
+            text = pa.array(series.astype(object), type=pa.large_string(), from_pandas=True)
+            validity, offsets, data = text.buffers()
+            offsets = np.frombuffer(offsets, dtype=np.int64)[:len(text) + 1]
+            np.save(tmp_path / entry['file'], np.frombuffer(data, dtype=np.uint8)[:offsets[-1]])
+            entry['offsets'] = f'{stem}.offsets.npy'
+            np.save(tmp_path / entry['offsets'], offsets)
+            if text.null_count:
+                entry['validity'] = f'{stem}.valid.npy'
+                np.save(tmp_path / entry['validity'],
+                        np.frombuffer(validity, dtype=np.uint8)[:(len(text) + 7) // 8])
+
+        meta['columns'].append(entry)
+
+    with open(tmp_path / META_FILE, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if path.exists():
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+
+def read_meta(path):
+    """Return the store's metadata (row count and column descriptions)"""
+    with open(Path(path) / META_FILE) as f:
+        return json.load(f)
+
+
+def _str_array(chunked):
+    """pandas ``str`` array wrapping a pyarrow string array as it is"""
+    dtype = pd.StringDtype('pyarrow', na_value=np.nan)
+    try:
+        return pd.arrays.ArrowStringArray(chunked, dtype=dtype)
+    except TypeError:
+        # pandas < 3: the NaN-semantics ``str`` dtype has an array class of its own
+        return dtype.construct_array_type()(chunked)
+
+
+def _open_text(path, entry, rows, start, stop):
+    """A text column's rows [start, stop) as a ``str`` array over the mapped buffers"""
+    import pyarrow as pa
+    offsets = np.load(path / entry['offsets'], mmap_mode='r')
+    data = np.load(path / entry['file'], mmap_mode='r')
+    validity = (pa.py_buffer(np.load(path / entry['validity'], mmap_mode='r'))
+                if 'validity' in entry else None)
+    text = pa.LargeStringArray.from_buffers(rows, pa.py_buffer(offsets), pa.py_buffer(data),
+                                            validity)
+    start, stop, _ = slice(start, stop).indices(rows)
+    return _str_array(pa.chunked_array([text.slice(start, max(stop - start, 0))]))
+
+
+def _open_column(path, entry, rows, start, stop):
+    """Return one column's values for rows [start, stop) as a view of the mapped files"""
+    kind = entry['kind']
+    if kind == 'text':
+        return _open_text(path, entry, rows, start, stop)
+    values = np.load(path / entry['file'], mmap_mode='r')[start:stop]
+
+    if kind == 'category':
+        with open(path / entry['dictionary']) as f:
+            categories = json.load(f)
+        return pd.Categorical.from_codes(values, categories=pd.Index(categories), validate=False)
+    if kind == 'datetime':
+        return values.view(entry['dtype'])
+    return values
+
+
+def open_column_store(path, columns=None, start=0, stop=None):
+    """
+    Open a column store as a DataFrame backed by memory-mapped views.
+
+    Parameters
+    ----------
+    path : str or Path
+        Store directory.
+    columns : list of str, optional
+        Columns to open; defaults to all.
+    start, stop : int, optional
+        Row range to open, for reading the store in slices.
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    data = {
+        entry['name']: _open_column(path, entry, meta['rows'], start, stop)
+        for entry in meta['columns']
+        if columns is None or entry['name'] in columns
+    }
+    # copy=False keeps each column as its own block, so nothing is consolidated
+    return pd.DataFrame(data, copy=False)
+
+
+def iter_column_store(path, chunksize, columns=None, start=0, stop=None):
+    """Yield rows [start, stop) of the store in slices of at most ``chunksize`` rows"""
+    rows = read_meta(path)['rows']
+    stop = rows if stop is None else min(stop, rows)
+    for lo in range(start, stop, chunksize):
+        yield open_column_store(path, columns=columns, start=lo, stop=min(lo + chunksize, stop))
@@ -0,0 +1,410 @@
+"""
+Shared Dataset Cache
+====================
+Single entry point for loading the hospital CSV extracts.
+
+The first time a table is requested its CSV is parsed once with the types
+declared in ``schema.py``, and the typed result is written to a Parquet file under
+``.data_cache/``. Every later load (from any of the analysis or visualization
+scripts) reads that columnar copy instead of re-parsing the CSV, until the
+source file changes.
+
+Large fact tables listed in ``COLUMN_STORE_TABLES`` are cached as a
+memory-mapped column store (see ``column_store.py``) instead of Parquet, so
+they open as zero-copy views of the files on disk.
+
+Fact tables listed in ``PARTITION_COLUMNS`` are partitioned by the YEAR/MONTH
+of their START timestamp: the cached copy is stored sorted by month, and the
+manifest records each partition's row range (a contiguous slice of the column
+store, or its own row groups in the Parquet file). Loads given a ``window`` of
+months read only the partitions inside it.
+
+A cached copy is considered current when the source CSV still has the size and
+modification time recorded in its manifest. If either differs, the file's
+SHA-256 is compared with the recorded hash so that a touched or re-copied but
+otherwise identical extract does not trigger a full reconversion.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from column_store import iter_column_store, open_column_store, write_column_store
+from schema import check_dictionary, iter_table_csv, read_table_csv
+from timeparse import calendar_fields
+
+CACHE_DIR = '.data_cache'
+CACHE_VERSION = 5
+
+# Keyed artifacts of each kind kept in the cache (see cache_slot)
+CACHE_SLOTS = 8
+
+# Tables cached as memory-mapped column stores rather than Parquet
+COLUMN_STORE_TABLES = {'encounters'}
+
+# Tables partitioned by the YEAR/MONTH of this timestamp column
+PARTITION_COLUMNS = {
+    'encounters': 'START',
+    'procedures': 'START',
+}
+
+
+def file_hash(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_month(text, end=False):
+    """
+    Month index (year * 12 + month - 1) of a 'YYYY-MM' or 'YYYY' bound.
+    A bare year means January, or December when ``end`` is True.
+    """
+    parts = str(text).split('-')
+    try:
+        year = int(parts[0])
+        month = int(parts[1]) if len(parts) > 1 else (12 if end else 1)
+    except ValueError:
+        raise ValueError(f"Invalid month {text!r}; expected YYYY-MM or YYYY") from None
+    if len(parts) > 2 or not 1 <= month <= 12:
+        raise ValueError(f"Invalid month {text!r}; expected YYYY-MM or YYYY")
+    return year * 12 + month - 1
+
+
+def month_window(start=None, end=None):
+    """
+    Inclusive (first, last) month indices for ``--from``/``--to`` bounds, or None
+    when neither bound is given. Either side may be left open.
+    """
+    if start is None and end is None:
+        return None
+    window = (
+        parse_month(start) if start is not None else None,
+        parse_month(end, end=True) if end is not None else None,
+    )
+    if None not in window and window[0] > window[1]:
+        raise ValueError(f"Empty window: {start} is after {end}")
+    return window
+
+
+def describe_window(window):
+    """Human-readable label of a month window, e.g. '2019-01 to 2020-12'"""
+    if window is None:
+        return 'all months'
+    first, last = (f'{i // 12:04d}-{i % 12 + 1:02d}' if i is not None else None for i in window)
+    if first and last:
+        return f'{first} to {last}'
+    return f'from {first}' if first else f'up to {last}'
+
+
+def require_rows(name, rows, window):
+    """Fail clearly when a window selects no rows of a table, rather than deep in a chart"""
+    if rows == 0 and window is not None:
+        raise ValueError(f"No {name} in the window {describe_window(window)}")
+
+
+def add_window_arguments(parser):
+    """Add the shared ``--from``/``--to`` month window options to a script's parser"""
+    parser.add_argument('--from', dest='start', metavar='YYYY-MM',
+                        help="only read encounters/procedures starting in or after this month")
+    parser.add_argument('--to', dest='end', metavar='YYYY-MM',
+                        help="only read encounters/procedures starting in or before this month")
+
+
+def _month_keys(name, df):
+    """Month index of every row's partition column, NaN where it is missing"""
+    fields = calendar_fields(df[PARTITION_COLUMNS[name]])
+    return np.asarray(fields['year'] * 12 + fields['month'] - 1, dtype=float)
+
+
+def _partition(name, df):
+    """
+    Sort a partitioned table by month (stable, rows without a date last) and
+    return the sorted frame with its partition index.
+    """
+    keys = _month_keys(name, df)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    df = df.take(order).reset_index(drop=True)
+
+    months, starts, counts = np.unique(keys[~np.isnan(keys)], return_index=True,
+                                       return_counts=True)
+    partitions = [
+        {'year': int(month // 12), 'month': int(month % 12) + 1,
+         'start': int(start), 'stop': int(start + count)}
+        for month, start, count in zip(months, starts, counts)
+    ]
+    return df, partitions
+
+
+def _in_window(partition, window):
+    """True if a partition's month lies inside an inclusive month window"""
+    month = partition['year'] * 12 + partition['month'] - 1
+    first, last = window
+    return (first is None or month >= first) and (last is None or month <= last)
+
+
+def _window_rows(partitions, window):
+    """Row range [start, stop) covering the partitions inside the window"""
+    selected = [p for p in partitions if _in_window(p, window)]
+    if not selected:
+        return 0, 0
+    # Partitions are stored in month order, so the selection is contiguous
+    return selected[0]['start'], selected[-1]['stop']
+
+
+def _filter_window(name, df, window):
+    """Rows of a frame inside the window, for data that is not served from the cache"""
+    if window is None or name not in PARTITION_COLUMNS:
+        return df
+    keys = _month_keys(name, df)
+    first, last = window
+    mask = ~np.isnan(keys)
+    if first is not None:
+        mask &= keys >= first
+    if last is not None:
+        mask &= keys <= last
+    return _drop_unused_categories(df[mask].reset_index(drop=True))
+
+
+def _drop_unused_categories(df):
+    """Remove categories that no longer occur after a window was applied"""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def _read_manifest(path):
+    """Load a cache manifest, returning None if it is missing or unreadable"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(path, manifest):
+    """Write a cache manifest atomically"""
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_source(name, source):
+    """Parse a source CSV with the schema registry's types"""
+    undeclared = check_dictionary(source.parent / 'data_dictionary.csv').get(name)
+    if undeclared:
+        print(f"  ⚠️  {name}: no schema entry for {', '.join(undeclared)}")
+    return read_table_csv(name, source)
+
+
+def _paths(name, data_dir, cache_dir):
+    """Return the source CSV, cached copy (Parquet file or column store) and manifest paths"""
+    source = Path(data_dir) / f'{name}.csv'
+    cache_root = Path(cache_dir) if cache_dir else Path(data_dir) / CACHE_DIR
+    suffix = '.cols' if name in COLUMN_STORE_TABLES else '.parquet'
+    return source, cache_root / f'{name}{suffix}', cache_root / f'{name}.json'
+
+
+def _is_current(source, cache_file, manifest_file):
+    """True if the cached copy of ``source`` can be reused"""
+    manifest = _read_manifest(manifest_file)
+    if not manifest or manifest.get('version') != CACHE_VERSION or not cache_file.exists():
+        return False
+    stat = source.stat()
+    if manifest['size'] == stat.st_size and manifest['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if manifest['sha256'] == file_hash(source):
+        # Same content, new timestamp: record it and keep the cached copy
+        manifest.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        _write_manifest(manifest_file, manifest)
+        return True
+    return False
+
+
+def cache_slot(kind, key, data_dir='.', cache_dir=None):
+    """
+    Directory holding the cached ``kind`` artifact (feature table, cube) built
+    for ``key``: one per distinct key, so windowed, full and approximate runs
+    keep their own copies instead of overwriting each other's
+    """
+    cache_root = Path(cache_dir) if cache_dir else Path(data_dir) / CACHE_DIR
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+    return cache_root / kind / digest
+
+
+def touch_slot(slot, keep=CACHE_SLOTS):
+    """Mark a slot as just used and remove all but the ``keep`` most recently used of its kind"""
+    os.utime(slot)
+    slots = sorted((path for path in slot.parent.iterdir() if path.is_dir()),
+                   key=lambda path: path.stat().st_mtime_ns, reverse=True)
+    for stale in slots[keep:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def source_hash(name, data_dir='.', cache_dir=None):
+    """SHA-256 of a table's source CSV as recorded in its cache manifest, or None if not cached"""
+    _, _, manifest_file = _paths(name, data_dir, cache_dir)
+    manifest = _read_manifest(manifest_file)
+    return manifest['sha256'] if manifest else None
+
+
+def _row_groups(cache_file, start, stop):
+    """Indices of the Parquet row groups holding rows [start, stop)"""
+    import pyarrow.parquet as pq
+    metadata = pq.ParquetFile(cache_file).metadata
+    groups, offset = [], 0
+    for i in range(metadata.num_row_groups):
+        rows = metadata.row_group(i).num_rows
+        if offset >= start and offset + rows <= stop:
+            groups.append(i)
+        offset += rows
+    return groups
+
+
+def _read_cache(name, cache_file, columns=None, rows=None):
+    """Read a table's cached copy, or only rows [start, stop) of a partitioned table"""
+    if name in COLUMN_STORE_TABLES:
+        start, stop = rows or (0, None)
+        return open_column_store(cache_file, columns=columns, start=start, stop=stop)
+    if rows is None:
+        return pd.read_parquet(cache_file, columns=columns)
+    import pyarrow.parquet as pq
+    groups = _row_groups(cache_file, *rows)
+    return pq.ParquetFile(cache_file).read_row_groups(groups, columns=columns).to_pandas()
+
+
+def _write_cache(name, df, cache_file, partitions=None):
+    """Write a table's cached copy atomically, one row group per partition for Parquet"""
+    if name in COLUMN_STORE_TABLES:
+        write_column_store(df, cache_file)
+        return
+    tmp_file = cache_file.with_suffix('.parquet.tmp')
+    if partitions is None:
+        df.to_parquet(tmp_file, index=False)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        bounds = [(p['start'], p['stop']) for p in partitions]
+        if not partitions or partitions[-1]['stop'] < len(df):
+            bounds.append((partitions[-1]['stop'] if partitions else 0, len(df)))
+        with pq.ParquetWriter(tmp_file, table.schema) as writer:
+            for start, stop in bounds:
+                # Each write starts a new row group, so no group spans two months
+                writer.write_table(table.slice(start, stop - start))
+    os.replace(tmp_file, cache_file)
+
+
+def load_table(name, data_dir='.', cache_dir=None, refresh=False, columns=None, window=None):
+    """
+    Load one table (e.g. 'encounters') through the columnar cache.
+
+    Parameters
+    ----------
+    name : str
+        Table name; the source file is ``<data_dir>/<name>.csv``.
+    data_dir : str
+        Directory holding the source CSVs.
+    cache_dir : str, optional
+        Cache location, defaults to ``<data_dir>/.data_cache``.
+    refresh : bool
+        Rebuild the cached copy even if it is current.
+    columns : list of str, optional
+        Only load these columns (read from the cache; the first conversion
+        always parses the whole CSV).
+    window : tuple, optional
+        Inclusive (first, last) month indices from ``month_window``. Only the
+        partitions inside the window are read; rows without a date are left out.
+        Ignored for tables that are not partitioned.
+    """
+    source, cache_file, manifest_file = _paths(name, data_dir, cache_dir)
+
+    if refresh or not _is_current(source, cache_file, manifest_file):
+        df = _build_cache(name, source, cache_file, manifest_file)
+        if df is not None:
+            df = _filter_window(name, df, window)
+            return df[columns] if columns else df
+
+    if window is None or name not in PARTITION_COLUMNS:
+        return _read_cache(name, cache_file, columns)
+    rows = _window_rows(_read_manifest(manifest_file)['partitions'], window)
+    return _drop_unused_categories(_read_cache(name, cache_file, columns, rows))
+
+
+def _build_cache(name, source, cache_file, manifest_file):
+    """
+    Parse the source CSV and write its cached copy and manifest. Returns None
+    once the cache is written (callers then read from it), or the parsed frame
+    when it cannot be cached.
+    """
+    df = _read_source(name, source)
+    partitions = None
+    if name in PARTITION_COLUMNS:
+        df, partitions = _partition(name, df)
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        _write_cache(name, df, cache_file, partitions)
+    except (ImportError, OSError) as exc:
+        # No Parquet engine or read-only location: serve the parsed CSV uncached
+        print(f"  ⚠️  Cache disabled for {name}: {exc}")
+        return df
+
+    stat = source.stat()
+    manifest = {
+        'version': CACHE_VERSION,
+        'source': str(source),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_hash(source),
+        'rows': len(df),
+    }
+    if partitions is not None:
+        manifest['partitions'] = partitions
+    _write_manifest(manifest_file, manifest)
+    return None
+
+
+def iter_table(name, chunksize, data_dir='.', cache_dir=None, window=None):
+    """
+    Yield a table in typed chunks of at most ``chunksize`` rows.
+
+    Reads slices of the column store or record batches of the Parquet copy
+    when the cache is current, and otherwise streams the source CSV directly
+    (without building the cache, which would need the whole table in memory).
+    With a ``window`` only the partitions inside it are read from the cache;
+    CSV chunks are filtered row by row instead.
+    """
+    source, cache_file, manifest_file = _paths(name, data_dir, cache_dir)
+
+    if not _is_current(source, cache_file, manifest_file):
+        for chunk in iter_table_csv(name, source, chunksize):
+            yield _filter_window(name, chunk, window)
+        return
+
+    start, stop = 0, None
+    if window is not None and name in PARTITION_COLUMNS:
+        start, stop = _window_rows(_read_manifest(manifest_file)['partitions'], window)
+
+    if name in COLUMN_STORE_TABLES:
+        yield from iter_column_store(cache_file, chunksize, start=start, stop=stop)
+    else:
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(cache_file)
+        groups = (_row_groups(cache_file, start, stop) if stop is not None
+                  else range(parquet.num_row_groups))
+        if not groups:
+            return
+        for batch in parquet.iter_batches(batch_size=chunksize, row_groups=groups):
+            yield batch.to_pandas()
@@ -0,0 +1,86 @@
+"""
+Dimension Lookups
+=================
+Star-schema join layer for the reference tables. A ``Dimension`` maps the
+UUIDs of a table (payers, organizations, patients, or encounters when
+procedures need their parent row) to dense integer keys - their row positions -
+once, using a hash index.
+
+Any aggregate keyed by those UUIDs can then be enriched with attributes such
+as NAME, CITY or STATE by plain array indexing, instead of a boolean scan of
+the table per row (``payers[payers['Id'] == payer_id]``) or a ``merge``.
+
+    payers = Dimension(load_table('payers'))
+    top_payers = payers.enrich(coverage_by_payer, ['NAME', 'STATE_HEADQUARTERED'])
+
+Categorical id columns are resolved through their categories, so the hash
+lookups cost one probe per distinct id rather than one per row.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Dimension:
+    """Dense integer keys for one table's ids, with attributes fetched by array indexing"""
+
+    def __init__(self, table, key='Id'):
+        self.table = table.reset_index(drop=True)
+        self.index = pd.Index(self.table[key].astype(object))
+        if not self.index.is_unique:
+            raise ValueError(f"Dimension key '{key}' has duplicate values")
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self, ids):
+        """Dense keys (row positions) of ids, -1 where an id is unknown"""
+        if isinstance(getattr(ids, 'dtype', None), pd.CategoricalDtype):
+            values = pd.Categorical(ids)
+            category_keys = self.index.get_indexer(values.categories.astype(object))
+            codes = values.codes
+            # Missing values (code -1) pick up the trailing -1
+            return np.append(category_keys, -1)[codes]
+        return self.index.get_indexer(pd.Index(ids).astype(object))
+
+    def column(self, column, keys, default=None):
+        """
+        Values of ``column`` for dense keys. Unknown keys (-1) get ``default``,
+        or a missing value (NaN) when no default is given, as in a left merge.
+        Categorical columns stay categorical.
+        """
+        keys = np.asarray(keys)
+        series = self.table[column]
+        missing = keys < 0
+        safe = np.where(missing, 0, keys)
+
+        if isinstance(series.dtype, pd.CategoricalDtype) and default is None:
+            codes = series.cat.codes.to_numpy()[safe] if len(series) else np.zeros(len(keys), np.int8)
+            return pd.Categorical.from_codes(np.where(missing, -1, codes), dtype=series.dtype)
+
+        values = series.to_numpy()
+        if len(values) == 0:
+            return np.full(len(keys), np.nan if default is None else default, dtype=object)
+        picked = values[safe]
+        if missing.any():
+            if default is None and picked.dtype.kind == 'f':
+                picked[missing] = np.nan
+            else:
+                picked = picked.astype(object)
+                picked[missing] = np.nan if default is None else default
+        return picked
+
+    def lookup(self, ids, column, default=None):
+        """Values of ``column`` for ids"""
+        return self.column(column, self.keys(ids), default)
+
+    def enrich(self, aggregate, columns=('NAME',), default=None):
+        """
+        Add dimension attributes to an aggregate (Series or DataFrame) indexed
+        by this dimension's ids, keeping the aggregate's order.
+        """
+        frame = aggregate.to_frame() if isinstance(aggregate, pd.Series) else aggregate.copy()
+        keys = self.keys(aggregate.index)
+        for col in columns:
+            frame[col] = self.column(col, keys, default)
+        return frame
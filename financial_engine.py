@@ -0,0 +1,120 @@
+"""
+Fused Financial Aggregation
+===========================
+Computes every financial KPI input of ``analyze_financial`` from an encounters
+frame or chunk in a single vectorized pass, without building filtered frames
+or running separate ``groupby`` passes:
+
+    totals and non-null counts   of the cost, coverage and duration columns
+    coverage buckets             full (100%), none (0%) and partial coverage,
+                                 counted with one ``np.bincount`` on bucket codes
+    per-ENCOUNTERCLASS costs     rows, claim cost sum and count, via
+                                 ``np.bincount`` on the category codes
+    per-PAYER coverage           payer coverage sum, via ``np.bincount``
+    per-ORGANIZATION revenue     claim cost sum and rows, via ``np.bincount``
+
+Each column is read once as a NumPy array. The results are shaped like the
+pandas expressions they replace (``chunk[cols].sum()``,
+``groupby('ENCOUNTERCLASS').agg(...)``, ...), so ``partials.EncounterPartials``
+merges them exactly as before.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Coverage bucket codes: 0%, (0%, 100%), 100%, above 100%; negative or
+# missing rates are offset by 4 so they never land in the first three buckets
+COVERAGE_NONE, COVERAGE_PARTIAL, COVERAGE_FULL = 0, 1, 2
+
+
+def category_codes(values):
+    """Integer codes (-1 for missing) and labels of a column, categorical or not"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, labels = pd.factorize(values)
+    return codes, pd.Index(labels)
+
+
+def grouped_sum(codes, labels, weights=None):
+    """
+    Per-label sum of ``weights`` (or row count) for the labels that occur,
+    like ``groupby(observed=True).sum()``; missing codes and weights are skipped.
+    """
+    valid = codes >= 0
+    if weights is not None:
+        valid &= ~np.isnan(weights)
+        weights = weights[valid]
+    codes = codes[valid]
+    sums = np.bincount(codes, weights=weights, minlength=len(labels))
+    present = np.bincount(codes, minlength=len(labels)) > 0
+    return pd.Series(sums[present], index=pd.Index(np.asarray(labels[present], dtype=object)))
+
+
+def column_totals(chunk, columns):
+    """(sums, non-null counts) of numeric columns, like ``chunk[columns].sum()`` / ``.count()``"""
+    sums, counts = {}, {}
+    for col in columns:
+        values = chunk[col].to_numpy()
+        if values.dtype.kind != 'f':
+            values = values.astype('float64')
+        valid = ~np.isnan(values)
+        # float64 accumulator, as pandas uses for every float column
+        sums[col] = np.where(valid, values, 0).sum(dtype='float64')
+        counts[col] = int(valid.sum())
+    return pd.Series(sums, dtype='float64'), pd.Series(counts, dtype='int64')
+
+
+def coverage_buckets(rate):
+    """Counts of rows with no, partial and full coverage, from one bincount"""
+    rate = np.asarray(rate, dtype='float64')
+    # Each threshold crossed adds one, so the code is the bucket index
+    buckets = (rate > 0).view(np.int8) + (rate >= 100).view(np.int8) + (rate > 100).view(np.int8)
+    buckets |= (~(rate >= 0)).view(np.int8) << 2
+    counts = np.bincount(buckets, minlength=8)
+    return int(counts[COVERAGE_NONE]), int(counts[COVERAGE_PARTIAL]), int(counts[COVERAGE_FULL])
+
+
+def financial_pass(chunk, sum_columns):
+    """
+    All financial aggregates of a prepared encounters chunk.
+
+    Returns a dict with ``sums``/``non_null`` (Series over ``sum_columns``),
+    ``coverage_none``/``coverage_partial``/``coverage_full`` counts,
+    ``by_class`` (rows, cost_sum, cost_count per ENCOUNTERCLASS) and
+    ``payer_coverage`` (coverage sum per PAYER) and ``by_organization``
+    (rows and claim cost sum per ORGANIZATION).
+    """
+    sums, non_null = column_totals(chunk, sum_columns)
+    none, partial, full = coverage_buckets(chunk['COVERAGE_RATE'].to_numpy())
+
+    cost = chunk['TOTAL_CLAIM_COST'].to_numpy(dtype='float64')
+    class_codes, classes = category_codes(chunk['ENCOUNTERCLASS'])
+    by_class = pd.DataFrame({
+        'rows': grouped_sum(class_codes, classes).astype('int64'),
+        'cost_sum': grouped_sum(class_codes, classes, cost),
+        'cost_count': grouped_sum(class_codes, classes, np.where(np.isnan(cost), np.nan, 1.0)),
+    })
+    by_class['cost_sum'] = by_class['cost_sum'].fillna(0.0)
+    by_class['cost_count'] = by_class['cost_count'].fillna(0).astype('int64')
+
+    payer_codes, payers = category_codes(chunk['PAYER'])
+    payer_coverage = grouped_sum(payer_codes, payers,
+                                 np.nan_to_num(chunk['PAYER_COVERAGE'].to_numpy(dtype='float64')))
+
+    org_codes, organizations = category_codes(chunk['ORGANIZATION'])
+    by_organization = pd.DataFrame({
+        'rows': grouped_sum(org_codes, organizations).astype('int64'),
+        'cost_sum': grouped_sum(org_codes, organizations, cost),
+    })
+    by_organization['cost_sum'] = by_organization['cost_sum'].fillna(0.0)
+
+    return {
+        'sums': sums,
+        'non_null': non_null,
+        'coverage_none': none,
+        'coverage_partial': partial,
+        'coverage_full': full,
+        'by_class': by_class,
+        'payer_coverage': payer_coverage,
+        'by_organization': by_organization,
+    }
@@ -0,0 +1,405 @@
+"""
+Synthetic Encounter & Procedure Generator
+=========================================
+Builds statistically plausible ``encounters.csv`` and ``procedures.csv`` for
+the shipped ``patients.csv``, ``payers.csv`` and ``organizations.csv`` so the
+analysis and dashboard scripts can be run and load-tested offline.
+
+The output follows the columns documented in ``data_dictionary.csv`` and is
+calibrated on the published summary of the original extract (27,891
+encounters and 47,701 procedures between 2011 and early 2022):
+
+    * ENCOUNTERCLASS mix, per-class cost and length-of-stay profiles
+    * payers assigned per patient by age band, with per-payer coverage rates
+      (NO_INSURANCE encounters are never covered)
+    * heavy-tailed visits per patient, inside each patient's lifetime
+    * weekday/hour patterns for scheduled vs. unscheduled care
+
+``--scale`` multiplies the number of encounters (1x, 10x, 100x, ...) over the
+same patient roster. Rows are generated and appended in fixed-size blocks,
+each with its own random stream derived from ``--seed``, so memory use does
+not grow with the scale and the same seed always produces the same files.
+
+Usage:
+    python generate_synthetic_data.py --scale 10 --seed 7 --out-dir data_10x
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_store import load_table
+from schema import load_dictionary
+from timeparse import SECONDS_PER_DAY, epoch_seconds
+
+BASE_ENCOUNTERS = 27_891
+PROCEDURES_PER_ENCOUNTER = 47_701 / 27_891
+BLOCK_ROWS = 100_000
+
+FIRST_DAY = '2011-01-01'
+LAST_DAY = '2022-02-05'
+
+# share of encounters, base cost, mean total claim cost, probability of a
+# 15-minute visit, mean hours of the longer visits, scheduled (weekday,
+# business hours) care, probability of a recorded reason, relative procedure load
+ENCOUNTER_CLASSES = {
+    'ambulatory': dict(share=0.450, base=129.16, mean_cost=2894.11, short=0.70,
+                       long_hours=31.0, scheduled=True, reason=0.55, procedures=1.2),
+    'outpatient': dict(share=0.226, base=129.16, mean_cost=2237.30, short=0.70,
+                       long_hours=19.0, scheduled=True, reason=0.40, procedures=1.0),
+    'urgentcare': dict(share=0.131, base=142.58, mean_cost=1950.00, short=1.00,
+                       long_hours=0.0, scheduled=False, reason=0.60, procedures=0.3),
+    'emergency': dict(share=0.083, base=146.18, mean_cost=4629.65, short=0.20,
+                      long_hours=1.9, scheduled=False, reason=0.80, procedures=1.4),
+    'wellness': dict(share=0.069, base=136.80, mean_cost=4260.71, short=1.00,
+                     long_hours=0.0, scheduled=True, reason=0.00, procedures=0.8),
+    'inpatient': dict(share=0.041, base=146.18, mean_cost=7761.35, short=0.00,
+                      long_hours=36.8, scheduled=False, reason=0.90, procedures=3.0),
+}
+
+ENCOUNTER_TYPES = {
+    'ambulatory': [(185345009, 'Encounter for symptom'),
+                   (185347001, 'Encounter for problem (procedure)'),
+                   (390906007, 'Follow-up encounter (procedure)'),
+                   (424619006, 'Prenatal visit')],
+    'outpatient': [(371883000, 'Outpatient procedure'),
+                   (185349003, 'Encounter for check up (procedure)'),
+                   (698314001, 'Consultation for treatment')],
+    'urgentcare': [(702927004, 'Urgent care clinic (environment)')],
+    'emergency': [(50849002, 'Emergency room admission (procedure)'),
+                  (183452005, 'Emergency hospital admission (procedure)')],
+    'wellness': [(162673000, 'General examination of patient (procedure)'),
+                 (185349003, 'Encounter for check up (procedure)')],
+    'inpatient': [(32485007, 'Hospital admission'),
+                  (305408004, 'Admission to surgical department')],
+}
+
+# Chronic reasons for scheduled care, acute ones for unscheduled care
+REASONS = {
+    True: [(59621000, 'Hypertension'),
+           (55822004, 'Hyperlipidemia'),
+           (15777000, 'Prediabetes'),
+           (44054006, 'Diabetes'),
+           (72892002, 'Normal pregnancy'),
+           (431855005, 'Chronic kidney disease stage 1 (disorder)'),
+           (46177005, 'End-stage renal disease (disorder)'),
+           (26929004, "Alzheimer's disease (disorder)"),
+           (88805009, 'Chronic congestive heart failure (disorder)')],
+    False: [(10509002, 'Acute bronchitis (disorder)'),
+            (444814009, 'Viral sinusitis (disorder)'),
+            (43878008, 'Streptococcal sore throat (disorder)'),
+            (233604007, 'Pneumonia'),
+            (44465007, 'Sprain of ankle'),
+            (263102004, 'Fracture subluxation of wrist'),
+            (185086009, 'Chronic obstructive bronchitis (disorder)'),
+            (22298006, 'Myocardial infarction')],
+}
+
+# code, description, typical base cost, relative frequency
+PROCEDURES = [
+    (430193006, 'Medication Reconciliation (procedure)', 510.0, 12),
+    (710824005, 'Assessment of health and social care needs (procedure)', 431.4, 10),
+    (171207006, 'Depression screening (procedure)', 431.4, 9),
+    (428211000124100, 'Assessment of substance use (procedure)', 431.4, 8),
+    (265764009, 'Renal dialysis (procedure)', 1255.1, 8),
+    (104091002, 'Hemoglobin / Hematocrit / Platelet count', 516.7, 6),
+    (76601001, 'Intramuscular injection', 582.6, 4),
+    (399208008, 'Plain chest X-ray (procedure)', 471.7, 4),
+    (73761001, 'Colonoscopy', 9743.7, 2),
+    (18286008, 'Catheter ablation of tissue of heart', 28341.0, 1),
+    (180256009, 'Electrical cardioversion', 25903.1, 1),
+    (274031008, 'Rectal polypectomy', 10270.2, 1),
+    (387685009, 'Extraction of wisdom tooth', 2304.9, 1),
+    (162676008, 'Brief general examination (procedure)', 431.4, 3),
+    (117015009, 'Throat culture (procedure)', 463.4, 2),
+    (268556000, 'Fine needle aspiration biopsy of lung (procedure)', 2951.8, 1),
+    (23426006, 'Measurement of respiratory function (procedure)', 516.7, 2),
+    (5880005, 'Physical examination', 431.4, 3),
+    (252160004, 'Standard pregnancy test', 463.4, 1),
+    (447365002, 'Combined chemotherapy and radiation therapy (procedure)', 14583.0, 1),
+    (237001001, 'Augmentation of labor', 2165.5, 1),
+]
+
+# Primary payer weights per age band; names not found in payers.csv are skipped
+COMMERCIAL = ['Humana', 'Blue Cross Blue Shield', 'UnitedHealthcare', 'Aetna',
+              'Cigna Health', 'Anthem']
+PAYER_MIX = {
+    'under_65': {'NO_INSURANCE': 0.55, 'Medicaid': 0.15,
+                 **{name: 0.30 / len(COMMERCIAL) for name in COMMERCIAL}},
+    'over_65': {'Medicare': 0.45, 'Dual Eligible': 0.10, 'NO_INSURANCE': 0.35,
+                **{name: 0.10 / len(COMMERCIAL) for name in COMMERCIAL}},
+}
+# Mean share of the claim a payer covers (commercial payers default to 0.65)
+COVERAGE = {'NO_INSURANCE': 0.0, 'Medicare': 0.80, 'Medicaid': 0.95, 'Dual Eligible': 0.95}
+
+# Visit start hour for scheduled care (business hours) and unscheduled care
+SCHEDULED_HOURS = np.array([0, 0, 0, 0, 0, 0, 0, 1, 4, 6, 6, 5, 3, 4, 6, 6, 5, 3, 1, 0, 0, 0, 0, 0],
+                           dtype=float)
+UNSCHEDULED_HOURS = np.array([4, 4, 5, 4, 3, 2, 2, 3, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 5, 5, 5, 5, 4, 4],
+                             dtype=float)
+
+
+def _day_number(date):
+    """Days since the epoch of a 'YYYY-MM-DD' string"""
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+
+def _lognormal(rng, mean, sigma, size):
+    """Lognormal draws with the given mean"""
+    return rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, size)
+
+
+def random_ids(rng, n):
+    """n UUID-formatted identifiers"""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    hexed = [row.tobytes().hex() for row in raw]
+    return [f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}' for h in hexed]
+
+
+def format_timestamps(seconds):
+    """Epoch seconds as yyyy-MM-dd'T'HH:mm'Z' strings"""
+    minutes = np.asarray(seconds // 60, dtype='datetime64[m]')
+    return np.char.add(np.datetime_as_string(minutes, unit='m'), 'Z')
+
+
+def patient_profiles(patients, payers, rng):
+    """
+    Per-patient sampling weights, active days and primary payer.
+
+    A patient can only have encounters between birth (or FIRST_DAY) and death
+    (or LAST_DAY). Visit frequency is heavy tailed: most patients visit a few
+    times a year, a minority accounts for a large share of all encounters.
+    """
+    first, last = _day_number(FIRST_DAY), _day_number(LAST_DAY)
+    birth_seconds, _ = epoch_seconds(patients['BIRTHDATE'])
+    death_seconds, has_died = epoch_seconds(patients['DEATHDATE'])
+    start = np.maximum(birth_seconds // SECONDS_PER_DAY, first)
+    stop = np.where(has_died, np.minimum(death_seconds // SECONDS_PER_DAY, last), last)
+    active_days = np.maximum(stop - start, 0)
+
+    weights = _lognormal(rng, 1.0, 1.1, len(patients)) * active_days
+    if weights.sum() == 0:
+        raise ValueError(f"No patient is alive between {FIRST_DAY} and {LAST_DAY}")
+
+    # Primary payer by age in the middle of the period
+    midpoint = (first + last) // 2
+    age = (midpoint - birth_seconds // SECONDS_PER_DAY) / 365.25
+    payer_ids = dict(zip(payers['NAME'], payers['Id']))
+    payer = np.empty(len(patients), dtype=object)
+    for band, over_65 in [('under_65', age < 65), ('over_65', age >= 65)]:
+        mix = {name: w for name, w in PAYER_MIX[band].items() if name in payer_ids}
+        if not mix:
+            mix = {name: 1.0 for name in payer_ids}
+        names = list(mix)
+        p = np.array([mix[name] for name in names])
+        payer[over_65] = rng.choice(names, size=int(over_65.sum()), p=p / p.sum())
+
+    return {
+        'id': patients['Id'].to_numpy(),
+        'p': weights / weights.sum(),
+        'start': start,
+        'active_days': active_days,
+        'payer_name': payer,
+        'payer_id': np.array([payer_ids[name] for name in payer], dtype=object),
+        'coverage': np.array([COVERAGE.get(name, 0.65) for name in payer]),
+    }
+
+
+def generate_encounters(profiles, organization_ids, n, rng):
+    """One block of n encounters"""
+    classes = list(ENCOUNTER_CLASSES)
+    shares = np.array([ENCOUNTER_CLASSES[c]['share'] for c in classes])
+    class_idx = rng.choice(len(classes), size=n, p=shares / shares.sum())
+    patient = rng.choice(len(profiles['id']), size=n, p=profiles['p'])
+
+    # Day within the patient's active span; scheduled care moves off weekends
+    day = profiles['start'][patient] + (rng.random(n) * profiles['active_days'][patient]).astype(np.int64)
+    scheduled = np.array([ENCOUNTER_CLASSES[c]['scheduled'] for c in classes])[class_idx]
+    weekday = (day + 3) % 7
+    day = np.where(scheduled & (weekday == 5), day + 2, day)
+    day = np.where(scheduled & (weekday == 6), day + 1, day)
+
+    hour = np.where(
+        scheduled,
+        rng.choice(24, size=n, p=SCHEDULED_HOURS / SCHEDULED_HOURS.sum()),
+        rng.choice(24, size=n, p=UNSCHEDULED_HOURS / UNSCHEDULED_HOURS.sum()),
+    )
+    start = day * SECONDS_PER_DAY + hour * 3600 + rng.integers(0, 60, n) * 60
+
+    minutes = np.full(n, 15.0)
+    code = np.zeros(n, dtype=np.int64)
+    description = np.empty(n, dtype=object)
+    base = np.zeros(n)
+    total = np.zeros(n)
+    reason_code = np.full(n, np.nan)
+    reason = np.full(n, None, dtype=object)
+    for i, name in enumerate(classes):
+        spec = ENCOUNTER_CLASSES[name]
+        rows = np.flatnonzero(class_idx == i)
+        k = len(rows)
+        if not k:
+            continue
+        long_visit = rows[rng.random(k) >= spec['short']]
+        if len(long_visit):
+            minutes[long_visit] = np.maximum(
+                15.0, _lognormal(rng, spec['long_hours'] * 60, 1.0, len(long_visit)).round()
+            )
+
+        types = ENCOUNTER_TYPES[name]
+        pick = rng.integers(0, len(types), k)
+        code[rows] = [types[j][0] for j in pick]
+        description[rows] = [types[j][1] for j in pick]
+
+        base[rows] = spec['base']
+        total[rows] = spec['base'] + _lognormal(rng, spec['mean_cost'] - spec['base'], 1.0, k)
+
+        has_reason = rows[rng.random(k) < spec['reason']]
+        pool = REASONS[spec['scheduled']]
+        pick = rng.integers(0, len(pool), len(has_reason))
+        reason_code[has_reason] = [pool[j][0] for j in pick]
+        reason[has_reason] = [pool[j][1] for j in pick]
+
+    coverage = profiles['coverage'][patient]
+    covered = np.clip(rng.normal(coverage, 0.1), 0, 1) * (coverage > 0)
+    # Some insured claims are denied outright
+    covered[rng.random(n) < 0.08] = 0.0
+    total = total.round(2)
+
+    return pd.DataFrame({
+        'Id': random_ids(rng, n),
+        'START': format_timestamps(start),
+        'STOP': format_timestamps(start + minutes.astype(np.int64) * 60),
+        'PATIENT': profiles['id'][patient],
+        'ORGANIZATION': rng.choice(organization_ids, size=n),
+        'PAYER': profiles['payer_id'][patient],
+        'ENCOUNTERCLASS': np.array(classes, dtype=object)[class_idx],
+        'CODE': code,
+        'DESCRIPTION': description,
+        'BASE_ENCOUNTER_COST': base,
+        'TOTAL_CLAIM_COST': total,
+        'PAYER_COVERAGE': (total * covered).round(2),
+        'REASONCODE': pd.array(reason_code, dtype='Int64'),
+        'REASONDESCRIPTION': reason,
+    }), start, minutes, class_idx
+
+
+def generate_procedures(encounters, start, minutes, class_idx, rng):
+    """Procedures performed during a block of encounters"""
+    loads = np.array([spec['procedures'] for spec in ENCOUNTER_CLASSES.values()])
+    shares = np.array([spec['share'] for spec in ENCOUNTER_CLASSES.values()])
+    rate = PROCEDURES_PER_ENCOUNTER * loads / (loads * shares / shares.sum()).sum()
+    counts = rng.poisson(rate[class_idx])
+    parent = np.repeat(np.arange(len(encounters)), counts)
+    m = len(parent)
+
+    offset = (rng.random(m) * minutes[parent]).astype(np.int64) * 60
+    proc_start = start[parent] + offset
+    proc_stop = np.minimum(proc_start + 15 * 60, start[parent] + minutes[parent].astype(np.int64) * 60)
+
+    weights = np.array([p[3] for p in PROCEDURES], dtype=float)
+    pick = rng.choice(len(PROCEDURES), size=m, p=weights / weights.sum())
+    base_cost = np.array([p[2] for p in PROCEDURES])[pick]
+
+    # About half of the procedures carry the encounter's reason
+    inherits = rng.random(m) < 0.5
+    reason_code = encounters['REASONCODE'].to_numpy()[parent]
+    reason = encounters['REASONDESCRIPTION'].to_numpy()[parent]
+
+    return pd.DataFrame({
+        'START': format_timestamps(proc_start),
+        'STOP': format_timestamps(proc_stop),
+        'PATIENT': encounters['PATIENT'].to_numpy()[parent],
+        'ENCOUNTER': encounters['Id'].to_numpy()[parent],
+        'CODE': np.array([p[0] for p in PROCEDURES], dtype=np.int64)[pick],
+        'DESCRIPTION': np.array([p[1] for p in PROCEDURES], dtype=object)[pick],
+        'BASE_COST': _lognormal(rng, base_cost, 0.3, m).round(2),
+        'REASONCODE': pd.array(np.where(inherits, reason_code, pd.NA), dtype='Int64'),
+        'REASONDESCRIPTION': np.where(inherits, reason, None),
+    })
+
+
+def _documented_columns(table, data_dir, frame):
+    """Column order from data_dictionary.csv, checking the generator covers every field"""
+    columns = load_dictionary(Path(data_dir) / 'data_dictionary.csv')[table]
+    missing = [col for col in columns if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Generator does not produce documented {table} columns: {missing}")
+    return columns
+
+
+def generate(scale=1.0, seed=0, data_dir='.', out_dir='.', block_rows=BLOCK_ROWS):
+    """
+    Write encounters.csv and procedures.csv for ``scale`` x the original
+    extract into ``out_dir``. Returns the number of encounters and procedures.
+    """
+    patients = load_table('patients', data_dir=data_dir)
+    payers = load_table('payers', data_dir=data_dir)
+    organizations = load_table('organizations', data_dir=data_dir)
+
+    seeds = np.random.SeedSequence(seed)
+    profiles = patient_profiles(patients, payers, np.random.default_rng(seeds.spawn(1)[0]))
+    organization_ids = organizations['Id'].to_numpy()
+
+    total = int(round(BASE_ENCOUNTERS * scale))
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {table: out_dir / f'{table}.csv' for table in ('encounters', 'procedures')}
+    tmp_paths = {table: path.with_suffix('.csv.tmp') for table, path in paths.items()}
+
+    n_blocks = (total + block_rows - 1) // block_rows
+    # Independent stream per block: identical output for a seed, block by block
+    block_seeds = np.random.SeedSequence([seed, 1]).spawn(n_blocks)
+    rows = {'encounters': 0, 'procedures': 0}
+    columns = {}
+    for b, block_seed in enumerate(block_seeds):
+        rng = np.random.default_rng(block_seed)
+        n = min(block_rows, total - b * block_rows)
+        encounters, start, minutes, class_idx = generate_encounters(profiles, organization_ids, n, rng)
+        procedures = generate_procedures(encounters, start, minutes, class_idx, rng)
+
+        for table, frame in [('encounters', encounters), ('procedures', procedures)]:
+            if table not in columns:
+                columns[table] = _documented_columns(table, data_dir, frame)
+            frame[columns[table]].to_csv(tmp_paths[table], mode='w' if b == 0 else 'a',
+                                         header=b == 0, index=False)
+            rows[table] += len(frame)
+        print(f"  ✓ Block {b + 1}/{n_blocks}: {rows['encounters']:,} encounters, "
+              f"{rows['procedures']:,} procedures")
+
+    for table, path in paths.items():
+        os.replace(tmp_paths[table], path)
+    return rows['encounters'], rows['procedures']
+
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Generate synthetic encounters and procedures")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f"multiple of the original {BASE_ENCOUNTERS:,} encounters (default: 1)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument('--data-dir', default='.',
+                        help="directory with patients/payers/organizations.csv and data_dictionary.csv")
+    parser.add_argument('--out-dir', default='.', help="where to write encounters.csv and procedures.csv")
+    args = parser.parse_args(argv)
+    if args.scale <= 0:
+        parser.error("--scale must be positive")
+    return args
+
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    print("="*80)
+    print("SYNTHETIC DATA GENERATION")
+    print("="*80)
+    print(f"\n🧪 Scale {args.scale:g}x, seed {args.seed} -> {args.out_dir}")
+
+    encounters, procedures = generate(args.scale, args.seed, args.data_dir, args.out_dir)
+
+    print(f"\n✅ Wrote {encounters:,} encounters and {procedures:,} procedures")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Encounter Rollup Cube
+=====================
+The encounter measures every dashboard slices - row counts and the
+TOTAL_CLAIM_COST, PAYER_COVERAGE, BASE_ENCOUNTER_COST and DURATION_HOURS
+columns - pre-aggregated once by the dimensions they are sliced by:
+
+    YEAR, MONTH (1-12), DAY_OF_WEEK (Monday=0), HOUR   from START
+    ENCOUNTERCLASS, PAYER, ORGANIZATION
+
+A handful of cuboids (``CUBOIDS``) are materialized, each holding ROWS and,
+per measure, SUM, COUNT (non-null), SUMSQ, MIN and MAX for every combination
+of its dimensions that occurs. No cuboid crosses the fine calendar
+dimensions with each other - the hour of day is crossed with the year and
+class only, the day of week with the class - so a cuboid stays far smaller
+than the encounters it summarizes instead of approaching a cell per row. A
+query rolls up the smallest cuboid that has all the dimensions it groups or
+filters by, so it reads at most a few thousand cells however many
+encounters there are:
+
+    cube = EncounterCube().update(encounters)
+    cube.counts('YEAR')                                   # encounters per year
+    cube.mean('ENCOUNTERCLASS', 'DURATION_HOURS')         # average stay per class
+    cube.rollup(['YEAR', 'MONTH'], 'TOTAL_CLAIM_COST',
+                where={'ENCOUNTERCLASS': 'inpatient'})    # SUM/COUNT/MEAN/STD/MIN/MAX
+    year_month(cube.total(['YEAR', 'MONTH'], 'TOTAL_CLAIM_COST'))   # indexed '2019-01', ...
+
+Like the analyzer's other partials (see ``partials.py``) the cube is built
+chunk by chunk and merged, so a streaming run gets the same cube; the chunk
+cuboids are collected in a ``tally.Tally`` and combined once read. It is
+persisted under ``.data_cache/encounter_cube/`` in a slot per key (the
+encounters source hash, month window and applied deltas); the first script
+of a run builds it, later scripts with the same inputs read it back, and
+runs over different windows keep their own cubes.
+
+Rows with a missing dimension value count in rollups over the other
+dimensions and are left out of groups by that one, as ``groupby`` does.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_store import cache_slot, source_hash, touch_slot
+from financial_engine import category_codes
+from tally import Tally
+from timeparse import calendar_fields, duration_hours
+
+CALENDAR_DIMENSIONS = ['YEAR', 'MONTH', 'DAY_OF_WEEK', 'HOUR']
+DIMENSIONS = CALENDAR_DIMENSIONS + ['ENCOUNTERCLASS', 'PAYER', 'ORGANIZATION']
+MEASURES = ['TOTAL_CLAIM_COST', 'PAYER_COVERAGE', 'BASE_ENCOUNTER_COST', 'DURATION_HOURS']
+STATISTICS = ['SUM', 'COUNT', 'SUMSQ', 'MIN', 'MAX']
+
+# Materialized cuboids; every rollup is answered from one of them
+CUBOIDS = [
+    ('YEAR', 'MONTH', 'ENCOUNTERCLASS', 'PAYER'),
+    ('YEAR', 'HOUR', 'ENCOUNTERCLASS'),
+    ('DAY_OF_WEEK', 'ENCOUNTERCLASS'),
+    ('YEAR', 'ENCOUNTERCLASS', 'ORGANIZATION'),
+]
+
+CUBE_DIR = 'encounter_cube'
+CUBE_MANIFEST = 'manifest.json'
+CUBE_VERSION = 2
+
+
+def _columns(measure, statistics=STATISTICS):
+    return [f'{measure}_{statistic}' for statistic in statistics]
+
+
+def _merge_rules():
+    """How each stored column combines across cells"""
+    rules = {'ROWS': 'sum'}
+    for measure in MEASURES:
+        rules.update(dict(zip(_columns(measure), ['sum', 'sum', 'sum', 'min', 'max'])))
+    return rules
+
+
+def _dimension_values(chunk):
+    """The dimension columns of a chunk of encounters, calendar ones derived from START"""
+    start = calendar_fields(chunk['START'])
+    values = {
+        'YEAR': start['year'],
+        'MONTH': start['month'],
+        'DAY_OF_WEEK': start['weekday'],
+        'HOUR': start['hour'],
+    }
+    for name in ['ENCOUNTERCLASS', 'PAYER', 'ORGANIZATION']:
+        values[name] = chunk[name]
+    return {name: pd.Series(np.asarray(value) if name in CALENDAR_DIMENSIONS else value)
+            for name, value in values.items()}
+
+
+def _measure_values(chunk):
+    """Per measure: its values, non-null mask, and values and squares with NaN as 0"""
+    values = {name: chunk[name].to_numpy(dtype='float64')
+              for name in MEASURES if name != 'DURATION_HOURS'}
+    duration = (chunk['DURATION_HOURS'] if 'DURATION_HOURS' in chunk
+                else duration_hours(chunk['START'], chunk['STOP']))
+    values['DURATION_HOURS'] = np.asarray(duration, dtype='float64')
+    measures = {}
+    for name, column in values.items():
+        present = ~np.isnan(column)
+        filled = np.where(present, column, 0.0)
+        measures[name] = column, present, filled, filled * filled
+    return measures
+
+
+def _dimension_codes(dimensions):
+    """Codes and labels of each dimension; missing values get a code of their own"""
+    encoded = {}
+    for name, values in dimensions.items():
+        codes, index = category_codes(values)
+        codes = np.where(codes < 0, len(index), codes).astype(np.int64)
+        encoded[name] = codes, np.append(np.asarray(index, dtype=object), None)
+    return encoded
+
+
+def _cuboid(encoded, dims, measures):
+    """One cuboid of a chunk: a row per combination of ``dims`` values that occurs"""
+    # Composite mixed-radix key over the dimension codes, numbered densely by
+    # hashing (no sort), so every statistic is one bincount or ufunc.at pass
+    key = np.zeros(len(next(iter(measures.values()))[0]), dtype=np.int64)
+    for name in dims:
+        codes, labels = encoded[name]
+        key = key * len(labels) + codes
+    cells, keys = pd.factorize(key)
+    size = len(keys)
+
+    table = {}
+    remainder = keys
+    for name in reversed(dims):
+        labels = encoded[name][1]
+        remainder, codes = np.divmod(remainder, len(labels))
+        table[name] = labels[codes]
+    table = {name: table[name] for name in dims}
+    table['ROWS'] = np.bincount(cells, minlength=size).astype(np.int64)
+    for name, (values, present, filled, squares) in measures.items():
+        table[f'{name}_SUM'] = np.bincount(cells, weights=filled, minlength=size)
+        table[f'{name}_COUNT'] = np.bincount(cells, weights=present, minlength=size).astype(np.int64)
+        table[f'{name}_SUMSQ'] = np.bincount(cells, weights=squares, minlength=size)
+        for statistic, ufunc in [('MIN', np.fmin), ('MAX', np.fmax)]:
+            extreme = np.full(size, np.nan)
+            ufunc.at(extreme, cells, values)
+            table[f'{name}_{statistic}'] = extreme
+    frame = pd.DataFrame(table)
+    for name in dims:
+        if name in CALENDAR_DIMENSIONS:
+            frame[name] = frame[name].astype('float64')
+    return frame
+
+
+def _calendar_integers(index):
+    """Calendar levels of a rollup index as integers (missing values are never grouped)"""
+    if isinstance(index, pd.MultiIndex):
+        return index.set_levels([level.astype('int64') if level.name in CALENDAR_DIMENSIONS
+                                 else level for level in index.levels])
+    return index.astype('int64') if index.name in CALENDAR_DIMENSIONS else index
+
+
+class EncounterCube:
+    """Mergeable rollup cuboids of the encounter measures (see the module docstring)"""
+
+    def __init__(self, cuboids=CUBOIDS):
+        self.cuboids = [tuple(dims) for dims in cuboids]
+        rules = _merge_rules()
+        self.tallies = {dims: Tally(by=list(dims), how=rules) for dims in self.cuboids}
+
+    def __len__(self):
+        """Cells over all cuboids"""
+        return sum(len(table) for table in map(self.table, self.cuboids) if table is not None)
+
+    def table(self, dims):
+        """The cells of one cuboid, or None while the cube is empty"""
+        return self.tallies[dims].total()
+
+    def update(self, chunk):
+        """Fold a chunk of encounters into the cube"""
+        encoded = _dimension_codes(_dimension_values(chunk))
+        measures = _measure_values(chunk)
+        for dims in self.cuboids:
+            self.tallies[dims].add(_cuboid(encoded, dims, measures))
+        return self
+
+    def merge(self, other):
+        """Combine another cube with the same cuboids into this one"""
+        for dims in self.cuboids:
+            self.tallies[dims].merge(other.tallies[dims])
+        return self
+
+    def _source(self, dims):
+        """The smallest materialized cuboid with all of ``dims``"""
+        tables = {cuboid: self.table(cuboid) for cuboid in self.cuboids if set(dims) <= set(cuboid)}
+        covering = [cuboid for cuboid, table in tables.items() if table is not None]
+        if not covering:
+            raise KeyError(f"No cuboid covers {', '.join(dims) or 'the total'}: "
+                           f"materialized cuboids are {self.cuboids}")
+        return tables[min(covering, key=lambda cuboid: len(tables[cuboid]))]
+
+    def rollup(self, by, measure=None, where=None):
+        """
+        Cells grouped by the ``by`` dimension(s), optionally filtered by
+        ``where`` ({dimension: value or list of values}): ROWS, and with a
+        ``measure`` its SUM, COUNT, MEAN, STD (sample), MIN and MAX. A DataFrame
+        indexed by ``by`` in sorted order (calendar dimensions as integers), or
+        a Series of the totals when ``by`` is empty.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        where = where or {}
+        table = self._source(by + list(where))
+        for name, value in where.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            table = table[table[name].isin(values)]
+
+        columns = ['ROWS'] + (_columns(measure) if measure else [])
+        rules = {column: rule for column, rule in _merge_rules().items() if column in columns}
+        if by:
+            cells = table.groupby(by, sort=True).agg(rules)
+            cells.index = _calendar_integers(cells.index)
+        else:
+            cells = table[columns].agg(rules)
+        if not measure:
+            return cells[['ROWS']]
+
+        total, count, squares = (cells[f'{measure}_{s}'] for s in ['SUM', 'COUNT', 'SUMSQ'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            variance = (squares - count * mean * mean) / (count - 1)
+        result = {
+            'ROWS': cells['ROWS'],
+            'SUM': total,
+            'COUNT': count,
+            'MEAN': mean,
+            'STD': np.sqrt(np.maximum(variance, 0)),
+            'MIN': cells[f'{measure}_MIN'],
+            'MAX': cells[f'{measure}_MAX'],
+        }
+        return pd.DataFrame(result) if by else pd.Series(result)
+
+    def counts(self, by, where=None):
+        """Encounters per value of ``by``, like ``value_counts().sort_index()``"""
+        return self.rollup(by, where=where)['ROWS'].rename('count')
+
+    def total(self, by, measure, where=None):
+        """Sum of ``measure`` per value of ``by``, like ``groupby(by)[measure].sum()``"""
+        return self.rollup(by, measure, where)['SUM'].rename(measure)
+
+    def mean(self, by, measure, where=None):
+        """Mean of ``measure`` per value of ``by``, like ``groupby(by)[measure].mean()``"""
+        return self.rollup(by, measure, where)['MEAN'].rename(measure)
+
+
+def year_month(rollup):
+    """A rollup by (YEAR, MONTH) relabelled 'YYYY-MM', as ``timeparse.month_periods`` labels months"""
+    labels = [f'{int(year):04d}-{int(month):02d}' for year, month in rollup.index]
+    return rollup.set_axis(pd.Index(labels, name='YEAR_MONTH'))
+
+
+def cube_key(window=None, deltas=(), data_dir='.', cache_dir=None):
+    """Identity of a cube: the encounters it was built from"""
+    return {
+        'version': CUBE_VERSION,
+        'cuboids': [list(dims) for dims in CUBOIDS],
+        'encounters': source_hash('encounters', data_dir, cache_dir),
+        'window': list(window) if window is not None else None,
+        'deltas': list(deltas),
+    }
+
+
+def save_encounter_cube(cube, key, data_dir='.', cache_dir=None):
+    """Persist a cube (one Parquet file per cuboid) and its key, in the slot of its key"""
+    path = cache_slot(CUBE_DIR, key, data_dir, cache_dir)
+    tmp_path = path.with_name(path.name + '.tmp')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+    for i, dims in enumerate(cube.cuboids):
+        cube.table(dims).to_parquet(tmp_path / f'cuboid_{i}.parquet', index=False)
+    with open(tmp_path / CUBE_MANIFEST, 'w') as f:
+        json.dump(key, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    touch_slot(path)
+
+
+def load_encounter_cube(key, data_dir='.', cache_dir=None):
+    """The persisted cube if one was built for ``key``, otherwise None"""
+    path = cache_slot(CUBE_DIR, key, data_dir, cache_dir)
+    try:
+        with open(path / CUBE_MANIFEST) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if stored != key:
+        return None
+    cube = EncounterCube([tuple(dims) for dims in stored['cuboids']])
+    try:
+        for i, dims in enumerate(cube.cuboids):
+            cube.tallies[dims].add(pd.read_parquet(path / f'cuboid_{i}.parquet'))
+    except OSError:
+        return None
+    touch_slot(path)
+    return cube
+
+
+def encounter_cube(encounters, window=None, data_dir='.', cache_dir=None):
+    """
+    Cube of a loaded encounters frame: the persisted copy when it was built
+    from the same inputs, otherwise built now and persisted.
+    """
+    key = cube_key(window, data_dir=data_dir, cache_dir=cache_dir)
+    cube = load_encounter_cube(key, data_dir, cache_dir)
+    if cube is None:
+        cube = EncounterCube().update(encounters)
+        save_encounter_cube(cube, key, data_dir, cache_dir)
+    return cube
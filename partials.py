@@ -0,0 +1,379 @@
+"""
+Mergeable Partial Aggregates
+============================
+Summaries of the encounters and procedures tables that can be built one chunk
+at a time and merged, so the analysis can run over extracts larger than RAM.
+
+Every statistic the analyzer reports is derived from these partials:
+
+    sums and counts          totals and means of the cost/duration columns
+    per-class statistics     claim cost sum/count per ENCOUNTERCLASS
+    frequency tables         value counts for classes and descriptions
+    rollup cube              calendar/class/payer rollups (see ``olap_cube.py``)
+    value histograms         exact value -> count tables for quantiles, or
+                             bounded-memory quantile sketches in approximate
+                             mode (see ``sketches.py``)
+    per-patient accumulators the patient feature table (see ``patient_features.py``)
+    distinct counters        distinct patients and encounter ids
+
+An in-memory run builds them from the whole frame in one update; a streaming
+run builds them chunk by chunk. Both produce identical results.
+
+Exact mode is not bounded in memory: value histograms and frequency tables
+hold every distinct value, the distinct counters every encounter id and
+patient, and the per-patient accumulators every patient, so a streaming run
+only saves the raw rows. Chunk tables are collected in a ``Tally`` (see
+``tally.py``) and summed when read, or earlier once they outgrow the
+combined table, so folding in a chunk costs the chunk's size rather than
+the size of everything seen so far.
+
+With ``approximate=True`` the quantile columns are summarized by a
+``QuantileSketch``, the free-text description columns by a ``TopKSketch`` and
+the distinct counts by HyperLogLog registers instead, all of fixed size.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from financial_engine import financial_pass
+from olap_cube import EncounterCube
+from patient_features import PatientAccumulator
+from segments import Segmented
+from sketches import DistinctCounter, QuantileSketch, TopKSketch
+from tally import Tally
+from tracing import span
+
+# Columns whose totals and means are reported
+SUM_COLUMNS = ['BASE_ENCOUNTER_COST', 'TOTAL_CLAIM_COST', 'PAYER_COVERAGE',
+               'OUT_OF_POCKET', 'COVERAGE_RATE', 'DURATION_HOURS']
+
+# Columns reported as frequency tables
+COUNT_COLUMNS = ['ENCOUNTERCLASS', 'DESCRIPTION', 'REASONDESCRIPTION']
+
+# High-cardinality frequency tables only read for their top entries; counted
+# with a heavy-hitter sketch in approximate mode
+TOP_K_COLUMNS = ['DESCRIPTION', 'REASONDESCRIPTION']
+
+# Columns whose quantiles are reported
+HISTOGRAM_COLUMNS = ['TOTAL_CLAIM_COST', 'DURATION_HOURS']
+
+# Columns whose distinct values are counted
+DISTINCT_COLUMNS = ['PATIENT', 'Id']
+
+def _plain_index(obj):
+    """Replace a categorical index with plain labels so chunks with different categories merge"""
+    if isinstance(obj.index, pd.CategoricalIndex):
+        obj.index = obj.index.astype(object)
+    return obj
+
+
+def ranked(counts):
+    """
+    Order a merged frequency table like ``value_counts()``.
+
+    Ties are broken by label, so the order does not depend on how the data
+    was split into chunks.
+    """
+    return counts[counts > 0].sort_index().sort_values(ascending=False, kind='stable')
+
+
+class ValueHistogram(Segmented):
+    """
+    Exact value -> count table supporting quantiles and threshold queries.
+    Values seen in this run are tallied in memory; a saved state keeps the
+    earlier ones as segments of sorted values with cumulative counts and
+    sums (see ``segments.py``), and queries combine both by binary search.
+    """
+
+    def __init__(self, counts=None):
+        self.tally = Tally(sort=True).add(counts)
+
+    @classmethod
+    def from_values(cls, values):
+        values = pd.Series(values).dropna().to_numpy()
+        uniques, counts = np.unique(values, return_counts=True)
+        return cls(pd.Series(counts, index=uniques))
+
+    def merge(self, other):
+        if other.segments:
+            raise ValueError("A persisted histogram can only be merged into, not merged")
+        self.tally.merge(other.tally)
+        return self
+
+    def _memory_segment(self):
+        counts = self.tally.total()
+        if counts is None:
+            return None
+        values = counts.index.to_numpy(dtype='float64')
+        counts = counts.to_numpy()
+        return {
+            'values': values,
+            'ranks': np.concatenate([[0], counts.cumsum()]),
+            'sums': np.concatenate([[0.0], (values * counts).cumsum()]),
+        }
+
+    def _without_memory(self):
+        persisted = copy.copy(self)
+        persisted.tally = Tally(sort=True)
+        return persisted
+
+    def _merge_segments(self, older, newer):
+        values = np.concatenate([self._read(older, 'values'), self._read(newer, 'values')])
+        counts = np.concatenate([np.diff(self._read(older, 'ranks')),
+                                 np.diff(self._read(newer, 'ranks'))])
+        values, inverse = np.unique(values, return_inverse=True)
+        return ValueHistogram(pd.Series(np.bincount(inverse, weights=counts).astype('int64'),
+                                        index=values))._memory_segment()
+
+    def _runs(self):
+        """(sorted values, cumulative counts, cumulative sums) of each segment and the memory"""
+        runs = [tuple(self._read(name, field) for field in ['values', 'ranks', 'sums'])
+                for name in self.segments]
+        memory = self._memory_segment()
+        if memory is not None:
+            runs.append((memory['values'], memory['ranks'], memory['sums']))
+        return runs
+
+    def __len__(self):
+        return int(sum(ranks[-1] for _, ranks, _ in self._runs()))
+
+    @staticmethod
+    def _count_at_most(runs, value):
+        return sum(int(ranks[np.searchsorted(values, value, side='right')])
+                   for values, ranks, _ in runs)
+
+    def _value_at(self, runs, rank):
+        """The value at 0-based ``rank`` in sorted order"""
+        if len(runs) == 1:
+            values, ranks, _ = runs[0]
+            return values[np.searchsorted(ranks, rank, side='right') - 1]
+        # Per run, the first value with more than ``rank`` values at or below it
+        best = np.inf
+        for values, _, _ in runs:
+            low, high = 0, len(values)
+            while low < high:
+                middle = (low + high) // 2
+                if self._count_at_most(runs, values[middle]) > rank:
+                    high = middle
+                else:
+                    low = middle + 1
+            if low < len(values):
+                best = min(best, values[low])
+        return best
+
+    def quantile(self, q):
+        """Quantile with the same linear interpolation as ``Series.quantile``"""
+        runs = self._runs()
+        n = sum(int(ranks[-1]) for _, ranks, _ in runs)
+        if n == 0:
+            return np.nan
+        position = (n - 1) * q
+        lower = int(np.floor(position))
+        upper = min(lower + 1, n - 1)
+        lower_value = self._value_at(runs, lower)
+        upper_value = self._value_at(runs, upper)
+        return lower_value + (position - lower) * (upper_value - lower_value)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def count_above(self, threshold):
+        """Number of values strictly greater than ``threshold``"""
+        runs = self._runs()
+        return sum(int(ranks[-1]) for _, ranks, _ in runs) - self._count_at_most(runs, threshold)
+
+    def sum_above(self, threshold):
+        """Sum of the values strictly greater than ``threshold``"""
+        return float(sum(sums[-1] - sums[np.searchsorted(values, threshold, side='right')]
+                         for values, _, sums in self._runs()))
+
+
+def _histogram_type(approximate):
+    return QuantileSketch if approximate else ValueHistogram
+
+
+def _merge_counts(left, right):
+    """Merge two frequency tables, exact (Tally of Series) or sketched (TopKSketch)"""
+    if isinstance(right, TopKSketch):
+        return right if left is None else left.merge(right)
+    return (left if left is not None else Tally()).merge(right)
+
+
+class EncounterPartials:
+    """Mergeable summary of prepared encounter rows"""
+
+    def __init__(self, approximate=False):
+        self.approximate = approximate
+        self.rows = 0
+        self.sums = pd.Series(0.0, index=SUM_COLUMNS)
+        self.non_null = pd.Series(0, index=SUM_COLUMNS)
+        self.coverage_full = 0
+        self.coverage_none = 0
+        self.coverage_partial = 0
+        self.by_class = Tally()
+        self.payer_coverage = Tally()
+        self.by_organization = Tally()
+        self.frequencies = {col: None for col in COUNT_COLUMNS}
+        self.histograms = {col: _histogram_type(approximate)() for col in HISTOGRAM_COLUMNS}
+        self.distinct = {col: DistinctCounter(approximate=approximate) for col in DISTINCT_COLUMNS}
+        self.patients = PatientAccumulator(approximate)
+        self.cube = EncounterCube()
+
+    def update(self, chunk):
+        """Fold a chunk of prepared encounters (see ``prepare_encounters``) into the partials"""
+        other = EncounterPartials(self.approximate)
+        other.rows = len(chunk)
+
+        # Totals, coverage buckets and per-class/per-payer sums in one fused pass
+        with span('financial pass', rows_in=len(chunk)):
+            financials = financial_pass(chunk, SUM_COLUMNS)
+        other.sums = financials['sums']
+        other.non_null = financials['non_null']
+        other.coverage_full = financials['coverage_full']
+        other.coverage_none = financials['coverage_none']
+        other.coverage_partial = financials['coverage_partial']
+        other.by_class.add(financials['by_class'])
+        other.payer_coverage.add(financials['payer_coverage'])
+        other.by_organization.add(financials['by_organization'])
+        for col in COUNT_COLUMNS:
+            if self.approximate and col in TOP_K_COLUMNS:
+                other.frequencies[col] = TopKSketch.from_values(chunk[col])
+            else:
+                other.frequencies[col] = Tally().add(
+                    _plain_index(chunk[col].value_counts(sort=False)))
+        for col in HISTOGRAM_COLUMNS:
+            other.histograms[col] = _histogram_type(self.approximate).from_values(chunk[col])
+
+        for col in DISTINCT_COLUMNS:
+            other.distinct[col].update(chunk[col])
+
+        with span('groupby PATIENT', rows_in=len(chunk)) as current:
+            other.patients.update(chunk)
+            current.set(rows_out=len(other.patients))
+
+        with span('encounter cube', rows_in=len(chunk)) as current:
+            other.cube.update(chunk)
+            current.set(rows_out=len(other.cube))
+
+        return self.merge(other)
+
+    def merge(self, other):
+        """Combine another set of encounter partials into this one"""
+        self.rows += other.rows
+        self.sums = self.sums + other.sums
+        self.non_null = self.non_null + other.non_null
+        self.coverage_full += other.coverage_full
+        self.coverage_none += other.coverage_none
+        self.coverage_partial += other.coverage_partial
+        self.by_class.merge(other.by_class)
+        self.payer_coverage.merge(other.payer_coverage)
+        self.by_organization.merge(other.by_organization)
+        for col in COUNT_COLUMNS:
+            self.frequencies[col] = _merge_counts(self.frequencies[col], other.frequencies[col])
+        for col in HISTOGRAM_COLUMNS:
+            self.histograms[col].merge(other.histograms[col])
+        for col in DISTINCT_COLUMNS:
+            self.distinct[col].merge(other.distinct[col])
+        self.patients.merge(other.patients)
+        self.cube.merge(other.cube)
+        return self
+
+    def persisted(self, store):
+        """A copy for the saved state, its row-granular parts written to ``store`` as segments"""
+        persisted = copy.copy(self)
+        persisted.histograms = {col: histogram.persisted(store)
+                                for col, histogram in self.histograms.items()}
+        persisted.distinct = {col: counter.persisted(store) for col, counter in self.distinct.items()}
+        persisted.patients = self.patients.persisted(store)
+        return persisted
+
+    # Derived statistics, shaped like the equivalent pandas expressions
+
+    def total(self, col):
+        return float(self.sums[col])
+
+    def mean(self, col):
+        count = self.non_null[col]
+        return float(self.sums[col] / count) if count else np.nan
+
+    def distinct_count(self, col):
+        return self.distinct[col].count()
+
+    def value_counts(self, col):
+        counts = self.frequencies[col]
+        if isinstance(counts, TopKSketch):
+            return counts.top()
+        return ranked(counts.total())
+
+    def class_costs(self):
+        """Per-class claim cost mean/sum/count, like ``groupby('ENCOUNTERCLASS').agg(...)``"""
+        stats = self.by_class.total().sort_index()
+        return pd.DataFrame({
+            'mean': stats['cost_sum'] / stats['cost_count'],
+            'sum': stats['cost_sum'],
+            'count': stats['cost_count'],
+        })
+
+    def payer_totals(self):
+        return self.payer_coverage.total().sort_index()
+
+    def organization_totals(self):
+        """Encounter count and claim revenue per ORGANIZATION id"""
+        return self.by_organization.total().sort_index()
+
+    def patient_features(self, patients):
+        """Per-patient feature table (see ``patient_features.PatientAccumulator.table``)"""
+        return self.patients.table(patients)
+
+
+class ProcedurePartials:
+    """Mergeable summary of procedure rows"""
+
+    def __init__(self, approximate=False):
+        self.approximate = approximate
+        self.rows = 0
+        self.cost_sum = 0.0
+        self.cost_count = 0
+        self.cost_histogram = _histogram_type(approximate)()
+        self.descriptions = Tally()
+
+    def update(self, chunk):
+        """Fold a chunk of procedures into the partials"""
+        other = ProcedurePartials(self.approximate)
+        other.rows = len(chunk)
+        other.cost_sum = float(chunk['BASE_COST'].sum())
+        other.cost_count = int(chunk['BASE_COST'].count())
+        other.cost_histogram = _histogram_type(self.approximate).from_values(chunk['BASE_COST'])
+        other.descriptions.add(_plain_index(chunk.groupby('DESCRIPTION', observed=True).agg(
+            rows=('DESCRIPTION', 'size'),
+            cost_sum=('BASE_COST', 'sum'),
+            cost_count=('BASE_COST', 'count'),
+        )))
+        return self.merge(other)
+
+    def merge(self, other):
+        """Combine another set of procedure partials into this one"""
+        self.rows += other.rows
+        self.cost_sum += other.cost_sum
+        self.cost_count += other.cost_count
+        self.cost_histogram.merge(other.cost_histogram)
+        self.descriptions.merge(other.descriptions)
+        return self
+
+    def persisted(self, store):
+        """A copy for the saved state, the cost histogram written to ``store`` as segments"""
+        persisted = copy.copy(self)
+        persisted.cost_histogram = self.cost_histogram.persisted(store)
+        return persisted
+
+    def mean_cost(self):
+        return self.cost_sum / self.cost_count if self.cost_count else np.nan
+
+    def value_counts(self):
+        return ranked(self.descriptions.total()['rows'])
+
+    def mean_cost_by_description(self):
+        stats = self.descriptions.total().sort_index()
+        return stats['cost_sum'] / stats['cost_count']
@@ -0,0 +1,211 @@
+"""
+Patient Feature Table
+=====================
+One row per patient with encounters, built once per run and shared by every
+consumer (risk factors in ``01_ai_analysis_main.py``, the risk and interactive
+dashboards in ``02_ai_visualizations.py``, the risk pie in
+``03_ai_dashboard.py`` and the visit-count chart in
+``04_additional_visualizations.py``) instead of each one running its own
+``groupby('PATIENT')`` over the encounters table:
+
+    ENCOUNTER_COUNT      encounters per patient
+    TOTAL_CLAIM_COST     claim cost sum
+    MEAN_CLAIM_COST      claim cost mean
+    BASE_ENCOUNTER_COST  base encounter cost mean
+    DURATION_HOURS       total time in encounters
+    DISTINCT_REASONS     distinct REASONDESCRIPTION values
+    FIRST_VISIT          earliest encounter START
+    LAST_VISIT           latest encounter START
+    PRIMARY_PAYER        payer id with the most encounters (ties: lowest id)
+    PAYER_COUNT          distinct payers
+    AGE                  age in years on the day the table was built
+    DECEASED             patient has a DEATHDATE
+
+``PatientAccumulator`` folds encounters in chunk by chunk and merges, so the
+table comes out of the same pass as the analyzer's other partial aggregates
+(see ``partials.py``), streaming or not. The per-chunk patient tables are
+collected in ``tally.Tally`` objects and combined once, when the table is
+built, instead of on every chunk. Distinct reasons are counted with a
+``sketches.DistinctCounter``, exact by default or with ``approximate=True``
+exact per patient until a patient has more reasons than fit in its
+HyperLogLog registers.
+
+The table is persisted under ``.data_cache/patient_features/`` in a slot per
+key, the key being made of the encounters/patients source hashes, the month
+window, any applied deltas, the counting mode and the build date. The first
+script of a run builds it; later scripts with the same inputs read it back,
+and windowed, full and approximate runs each keep their own table (the
+``data_store.CACHE_SLOTS`` most recently used).
+"""
+
+import copy
+import json
+import os
+from datetime import date
+
+import pandas as pd
+
+from data_store import cache_slot, source_hash, touch_slot
+from dimensions import Dimension
+from sketches import DistinctCounter
+from tally import Tally
+from timeparse import duration_hours
+
+FEATURES_DIR = 'patient_features'
+FEATURES_FILE = 'table.parquet'
+FEATURES_MANIFEST = 'key.json'
+FEATURES_VERSION = 2
+
+
+class PatientAccumulator:
+    """Mergeable per-patient totals, visit bounds, reasons and payer counts"""
+
+    def __init__(self, approximate=False):
+        self.approximate = approximate
+        self.totals = Tally()
+        self.visits = Tally(how={'FIRST_VISIT': 'min', 'LAST_VISIT': 'max'})
+        self.reasons = DistinctCounter(grouped=True, approximate=approximate)
+        self.payers = Tally()
+
+    def __len__(self):
+        totals = self.totals.total()
+        return 0 if totals is None else len(totals)
+
+    def update(self, chunk):
+        """Fold a chunk of encounters into the accumulator"""
+        if 'DURATION_HOURS' in chunk:
+            duration = chunk['DURATION_HOURS']
+        else:
+            duration = duration_hours(chunk['START'], chunk['STOP'])
+        frame = chunk[['PATIENT', 'Id', 'TOTAL_CLAIM_COST', 'BASE_ENCOUNTER_COST',
+                       'START', 'REASONDESCRIPTION', 'PAYER']].assign(DURATION_HOURS=duration)
+        by_patient = frame.groupby('PATIENT', observed=True)
+
+        totals = by_patient.agg(
+            ENCOUNTER_COUNT=('Id', 'count'),
+            TOTAL_CLAIM_COST=('TOTAL_CLAIM_COST', 'sum'),
+            COST_COUNT=('TOTAL_CLAIM_COST', 'count'),
+            BASE_COST_SUM=('BASE_ENCOUNTER_COST', 'sum'),
+            BASE_COST_COUNT=('BASE_ENCOUNTER_COST', 'count'),
+            DURATION_HOURS=('DURATION_HOURS', 'sum'),
+        )
+        visits = by_patient['START'].agg(FIRST_VISIT='min', LAST_VISIT='max')
+        payers = frame.groupby(['PATIENT', 'PAYER'], observed=True).size().rename('ENCOUNTERS')
+        # Plain object labels so chunks with different categories merge
+        for stats in (totals, visits):
+            stats.index = stats.index.astype(object)
+        payers.index = payers.index.set_levels([level.astype(object) for level in payers.index.levels])
+        self.totals.add(totals)
+        self.visits.add(visits)
+        self.payers.add(payers)
+        self.reasons.update(frame['REASONDESCRIPTION'], frame['PATIENT'])
+        return self
+
+    def merge(self, other):
+        """Combine another accumulator into this one"""
+        self.totals.merge(other.totals)
+        self.visits.merge(other.visits)
+        self.payers.merge(other.payers)
+        self.reasons.merge(other.reasons)
+        return self
+
+    def persisted(self, store):
+        """A copy for the saved state, the distinct reason pairs written to ``store`` as segments"""
+        persisted = copy.copy(self)
+        persisted.reasons = self.reasons.persisted(store)
+        return persisted
+
+    def table(self, patients):
+        """The feature table, indexed by patient id in sorted order"""
+        totals = self.totals.total().sort_index()
+        index = totals.index.rename('PATIENT')
+        features = pd.DataFrame({
+            'ENCOUNTER_COUNT': totals['ENCOUNTER_COUNT'],
+            'TOTAL_CLAIM_COST': totals['TOTAL_CLAIM_COST'],
+            'MEAN_CLAIM_COST': totals['TOTAL_CLAIM_COST'] / totals['COST_COUNT'],
+            'BASE_ENCOUNTER_COST': totals['BASE_COST_SUM'] / totals['BASE_COST_COUNT'],
+            'DURATION_HOURS': totals['DURATION_HOURS'],
+        }).set_axis(index)
+
+        features['DISTINCT_REASONS'] = self.reasons.counts().reindex(index, fill_value=0).to_numpy()
+        visits = self.visits.total().reindex(index)
+        features['FIRST_VISIT'] = visits['FIRST_VISIT'].to_numpy()
+        features['LAST_VISIT'] = visits['LAST_VISIT'].to_numpy()
+
+        payers = self.payers.total().reset_index().sort_values(['PATIENT', 'ENCOUNTERS', 'PAYER'],
+                                         ascending=[True, False, True])
+        primary = payers.drop_duplicates('PATIENT').set_index('PATIENT')['PAYER']
+        features['PRIMARY_PAYER'] = primary.reindex(index).to_numpy()
+        features['PAYER_COUNT'] = payers.groupby('PATIENT').size().reindex(index, fill_value=0).to_numpy()
+
+        # Demographics by dense-key lookup; patients missing from the table get NaN
+        patient_dim = Dimension(patients)
+        keys = patient_dim.keys(index)
+        birth = pd.to_datetime(pd.Series(patient_dim.column('BIRTHDATE', keys), index=index))
+        features['AGE'] = (pd.Timestamp.now() - birth).dt.days / 365.25
+        features['DECEASED'] = pd.notna(patient_dim.column('DEATHDATE', keys))
+        return features
+
+
+def build_patient_features(encounters, patients):
+    """Feature table of an in-memory encounters frame"""
+    return PatientAccumulator().update(encounters).table(patients)
+
+
+def feature_key(window=None, deltas=(), approximate=False, data_dir='.', cache_dir=None):
+    """Identity of a feature table: its inputs, counting mode and the day its ages refer to"""
+    return {
+        'version': FEATURES_VERSION,
+        'approximate': approximate,
+        'encounters': source_hash('encounters', data_dir, cache_dir),
+        'patients': source_hash('patients', data_dir, cache_dir),
+        'window': list(window) if window is not None else None,
+        'deltas': list(deltas),
+        'as_of': date.today().isoformat(),
+    }
+
+
+def _feature_paths(key, data_dir, cache_dir):
+    slot = cache_slot(FEATURES_DIR, key, data_dir, cache_dir)
+    return slot, slot / FEATURES_FILE, slot / FEATURES_MANIFEST
+
+
+def save_patient_features(features, key, data_dir='.', cache_dir=None):
+    """Persist a feature table and its key atomically, in the slot of its key"""
+    slot, table_file, manifest_file = _feature_paths(key, data_dir, cache_dir)
+    slot.mkdir(parents=True, exist_ok=True)
+    tmp_table = table_file.with_suffix('.parquet.tmp')
+    features.to_parquet(tmp_table)
+    os.replace(tmp_table, table_file)
+    tmp_manifest = manifest_file.with_suffix('.json.tmp')
+    with open(tmp_manifest, 'w') as f:
+        json.dump(key, f, indent=2)
+    os.replace(tmp_manifest, manifest_file)
+    touch_slot(slot)
+
+
+def load_patient_features(key, data_dir='.', cache_dir=None):
+    """The persisted feature table if one was built for ``key``, otherwise None"""
+    slot, table_file, manifest_file = _feature_paths(key, data_dir, cache_dir)
+    try:
+        with open(manifest_file) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if stored != key or not table_file.exists():
+        return None
+    touch_slot(slot)
+    return pd.read_parquet(table_file)
+
+
+def patient_features(encounters, patients, window=None, data_dir='.', cache_dir=None):
+    """
+    Feature table for a loaded encounters frame: the persisted copy when it
+    was built from the same inputs, otherwise built now and persisted.
+    """
+    key = feature_key(window, data_dir=data_dir, cache_dir=cache_dir)
+    features = load_patient_features(key, data_dir, cache_dir)
+    if features is None:
+        features = build_patient_features(encounters, patients)
+        save_patient_features(features, key, data_dir, cache_dir)
+    return features
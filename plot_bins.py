@@ -0,0 +1,224 @@
+"""
+Pre-binned Histograms
+=====================
+Histogram counts computed in a dashboard's aggregation step, so the drawing
+step only gets ``bins`` counts and edges instead of every encounter or
+patient row:
+
+    durations = histogram(encounters['DURATION_HOURS'], bins=50)
+    ...
+    plot_histogram(ax, durations, color='purple', edgecolor='black')
+    ax.axvline(durations.mean, ...)
+
+``histogram`` takes the bins the way ``plt.hist`` does (a count spread over
+the data's range, or explicit edges) and leaves out NaN and infinite values,
+so the bars come out as ``plt.hist`` on the raw values would draw them.
+Integer data are counted once per distinct value with ``np.bincount`` and
+those counts are binned. ``log=True`` spaces the edges evenly in log scale
+over the positive values, for heavy-tailed costs; values at or below zero
+are counted in ``nonpositive`` instead of a bin.
+
+A ``Histogram`` also carries the count, mean and median of the values, for
+the reference lines and labels the charts draw with it.
+
+Scatter plots of a whole population are rasterized the same way:
+``density_grid`` counts (x, y) points into a fixed grid of cells (log-spaced
+per axis on request) with one ``np.bincount``, and ``plot_density`` draws
+the counts with a log color scale, so millions of patients cost no more to
+draw than a thousand. ``top_outliers`` picks the few rows worth drawing as
+individual points on top of it.
+
+The Plotly dashboards embed their data in the HTML, so they are built from
+the same aggregates: ``histogram_bar`` turns a ``Histogram`` into a bar
+trace, ``stratified_sample`` bounds a scatter to a fixed number of points
+spread over groups (age bands, say) rather than proportional to the row
+count, and ``write_plotly_html`` references one ``plotly.min.js`` next to
+the HTML files instead of inlining its ~4 MB into each of them.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from matplotlib.colors import LogNorm
+
+PLOTLY_BUNDLE = 'plotly.min.js'
+
+# Widest integer value range counted with bincount rather than np.histogram
+BINCOUNT_SPAN = 1 << 22
+
+
+class Histogram:
+    """Bin counts and edges of a set of values, with their mean and median"""
+
+    def __init__(self, counts, edges, total, mean, median, nonpositive=0):
+        self.counts = counts
+        self.edges = edges
+        self.total = total
+        self.mean = mean
+        self.median = median
+        self.nonpositive = nonpositive
+
+    def __repr__(self):
+        return f"Histogram({len(self.counts)} bins, {self.total:,} values)"
+
+
+def _counts(values, edges):
+    """np.histogram counts of ``values`` over ``edges``, by bincount for narrow integer data"""
+    if values.dtype.kind in 'iub' and len(values):
+        low, high = int(values.min()), int(values.max())
+        if high - low < BINCOUNT_SPAN:
+            distinct = np.bincount(values.astype(np.int64) - low)
+            return np.histogram(np.arange(low, high + 1), edges, weights=distinct)[0].astype(np.int64)
+    return np.histogram(values, edges)[0]
+
+
+def histogram(values, bins=10, range=None, log=False):
+    """Pre-binned histogram of the finite ``values`` (see the module docstring)"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        values = values[np.isfinite(values)]
+    total = len(values)
+    mean = float(values.mean()) if total else np.nan
+    median = float(np.median(values)) if total else np.nan
+
+    nonpositive = 0
+    if log:
+        positive = values > 0
+        nonpositive = int(total - positive.sum())
+        values = values[positive]
+        if np.ndim(bins) == 0:
+            low, high = range if range is not None else (
+                (values.min(), values.max()) if len(values) else (1, 10))
+            bins = np.geomspace(low, high if high > low else low * 10, bins + 1)
+    edges = np.histogram_bin_edges(values, bins, range)
+    return Histogram(_counts(values, edges), edges, total, mean, median, nonpositive)
+
+
+def plot_histogram(ax, hist, **style):
+    """Draw a pre-binned histogram as ``ax.hist`` would draw its raw values"""
+    return ax.hist(hist.edges[:-1], bins=hist.edges, weights=hist.counts, **style)
+
+
+class DensityGrid:
+    """Point counts over a grid of cells: ``counts[i, j]`` lies in x bin i and y bin j"""
+
+    def __init__(self, counts, x_edges, y_edges, log, total, excluded=0):
+        self.counts = counts
+        self.x_edges = x_edges
+        self.y_edges = y_edges
+        self.log = log
+        self.total = total
+        self.excluded = excluded
+
+    def __repr__(self):
+        return f"DensityGrid({self.counts.shape[0]}x{self.counts.shape[1]}, {self.total:,} points)"
+
+
+def _grid_edges(values, bins, log):
+    low, high = (values.min(), values.max()) if len(values) else (1, 10)
+    if high <= low:
+        high = low * 10 if log else low + 1
+    return np.geomspace(low, high, bins + 1) if log else np.linspace(low, high, bins + 1)
+
+
+def _grid_index(values, edges, log):
+    """Cell of each value along one axis (the last cell includes the upper edge)"""
+    low, high = (np.log(edges[0]), np.log(edges[-1])) if log else (edges[0], edges[-1])
+    scaled = ((np.log(values) if log else values) - low) / (high - low) * (len(edges) - 1)
+    return np.clip(scaled.astype(np.int64), 0, len(edges) - 2)
+
+
+def density_grid(x, y, bins=200, log=False):
+    """
+    Counts of the (x, y) points over a ``bins`` grid spanning their range;
+    ``bins`` and ``log`` take one value for both axes or an (x, y) pair. Points
+    with a NaN coordinate, or one at or below zero on a log axis, are counted
+    in ``excluded``.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    x_bins, y_bins = (bins, bins) if np.ndim(bins) == 0 else bins
+    x_log, y_log = (log, log) if np.ndim(log) == 0 else log
+    valid = np.isfinite(x) & np.isfinite(y)
+    if x_log:
+        valid &= x > 0
+    if y_log:
+        valid &= y > 0
+    x, y = x[valid], y[valid]
+
+    x_edges = _grid_edges(x, x_bins, x_log)
+    y_edges = _grid_edges(y, y_bins, y_log)
+    cells = _grid_index(x, x_edges, x_log) * y_bins + _grid_index(y, y_edges, y_log)
+    counts = np.bincount(cells, minlength=x_bins * y_bins).reshape(x_bins, y_bins)
+    return DensityGrid(counts, x_edges, y_edges, (x_log, y_log), len(x), int((~valid).sum()))
+
+
+def plot_density(ax, grid, cmap='YlOrRd'):
+    """Draw a density grid with a log color scale; empty cells stay blank"""
+    counts = np.ma.masked_equal(grid.counts.T, 0)
+    mesh = ax.pcolormesh(grid.x_edges, grid.y_edges, counts, cmap=cmap,
+                         norm=LogNorm(vmin=1, vmax=max(int(grid.counts.max()), 1)))
+    # Leave the usual margins, so points overlaid at the extremes are not cut off
+    mesh.sticky_edges.x[:] = []
+    mesh.sticky_edges.y[:] = []
+    if grid.log[0]:
+        ax.set_xscale('log')
+    if grid.log[1]:
+        ax.set_yscale('log')
+    return mesh
+
+
+def top_outliers(frame, columns, top=10):
+    """Rows among the ``top`` largest of any of ``columns``, largest first"""
+    rows = pd.concat([frame.nlargest(top, column) for column in columns])
+    return rows[~rows.index.duplicated()]
+
+
+def histogram_bar(hist, **trace):
+    """Plotly bar trace of a pre-binned histogram, one bar per bin"""
+    return go.Bar(x=(hist.edges[:-1] + hist.edges[1:]) / 2, y=hist.counts,
+                  width=np.diff(hist.edges), **trace)
+
+
+def _quotas(sizes, size, rng):
+    """Rows to take from each group: equal shares of ``size``, the unused share
+    of groups smaller than theirs passed on to the larger ones"""
+    if sizes.sum() <= size:
+        return sizes
+    ordered = np.sort(sizes)
+    before = np.concatenate([[0], np.cumsum(ordered)[:-1]])
+    remaining = len(ordered) - np.arange(len(ordered))
+    # The first group (smallest first) that cannot be kept whole sets the quota
+    first = np.argmax(ordered * remaining > size - before)
+    quota = (size - before[first]) // remaining[first]
+    take = np.minimum(sizes, quota)
+    extra = size - take.sum()
+    if extra:
+        take[rng.choice(np.flatnonzero(sizes > quota), extra, replace=False)] += 1
+    return take
+
+
+def stratified_sample(frame, by, size, random_state=None):
+    """
+    Rows of ``frame`` drawn at random with an equal quota per value of ``by``
+    (a column name or aligned array), ``size`` rows in total (or every row, if
+    fewer); groups smaller than the quota are kept whole and their unused
+    quota is shared among the others. Rows missing a ``by`` value are left out.
+    """
+    groups = frame[by] if isinstance(by, str) else by
+    codes, _ = pd.factorize(groups)
+    rng = np.random.default_rng(random_state)
+    take = _quotas(np.bincount(codes[codes >= 0]), size, rng)
+    shuffled = rng.permutation(len(frame))
+    # Rank of each row within its group in shuffled order
+    order = shuffled[np.argsort(codes[shuffled], kind='stable')]
+    ordered_codes = codes[order]
+    starts = np.flatnonzero(np.append(True, ordered_codes[1:] != ordered_codes[:-1]))
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.append(starts, len(order))))
+    valid = ordered_codes >= 0
+    keep = order[valid][rank[valid] < take[ordered_codes[valid]]]
+    return frame.iloc[np.sort(keep)]
+
+
+def write_plotly_html(fig, path):
+    """Save a Plotly figure, loading plotly.js from the shared bundle beside it"""
+    fig.write_html(path, include_plotlyjs='directory')
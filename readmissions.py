@@ -0,0 +1,158 @@
+"""
+Readmission Engine
+==================
+Vectorized N-day readmission rates over per-patient encounter timelines.
+
+A readmission is an admission (an encounter whose ENCOUNTERCLASS is in
+``ADMISSION_CLASSES``) that starts within N days of the discharge (STOP) of
+an earlier index encounter of the same patient. Index stays are inpatient
+discharges, except in the per-class table, where every class is an index so
+e.g. emergency visits followed by an admission can be compared with
+inpatient stays.
+
+Discharge and admission events are sorted once into per-patient timelines
+by a single composite (PATIENT, time) int64 key, and the next admission after
+every discharge is found with a reversed running minimum over that array: no
+per-patient Python loops, one sort overall, so tens of millions of
+encounters take seconds.
+
+    gaps = readmission_gaps(encounters)
+    report = readmission_report(encounters, gaps)
+    report['year']        # STAYS, RATE_7D, RATE_30D, RATE_90D per discharge year
+
+Rates are percentages of the index stays that can be followed for the full
+window: a stay discharged less than N days before the last admission in the
+data is left out of the N-day denominator instead of counted as not
+readmitted.
+"""
+
+import numpy as np
+import pandas as pd
+
+from financial_engine import category_codes
+from timeparse import SECONDS_PER_DAY, calendar_fields, epoch_seconds
+
+READMISSION_WINDOWS = (7, 30, 90)
+ADMISSION_CLASSES = ('inpatient',)
+
+
+def _class_mask(encounters, classes):
+    codes, labels = category_codes(encounters['ENCOUNTERCLASS'])
+    return np.append(np.isin(np.asarray(labels, dtype=object), classes), False)[codes]
+
+
+def readmission_gaps(encounters, admission_classes=ADMISSION_CLASSES):
+    """
+    Days from each encounter's STOP to the START of the same patient's next
+    admission at or after it, aligned with the rows of ``encounters``; NaN
+    where there is none (or STOP/START is missing).
+    """
+    patients, _ = category_codes(encounters['PATIENT'])
+    start, start_valid = epoch_seconds(encounters['START'])
+    stop, stop_valid = epoch_seconds(encounters['STOP'])
+    gaps = np.full(len(encounters), np.nan)
+
+    admissions = np.flatnonzero(_class_mask(encounters, admission_classes)
+                                & start_valid & (patients >= 0))
+    discharges = np.flatnonzero(stop_valid & (patients >= 0))
+    if len(admissions) == 0 or len(discharges) == 0:
+        return gaps
+
+    # One timeline of discharge (STOP) and admission (START) events, sorted
+    # once by a composite (patient, time, kind) int64 key; at equal times the
+    # discharge sorts first, so an admission at the discharge instant counts
+    origin = min(start[admissions].min(), stop[discharges].min())
+    span = max(start[admissions].max(), stop[discharges].max()) - origin + 1
+    keys = np.concatenate([
+        (patients[discharges] * span + (stop[discharges] - origin)) * 2,
+        (patients[admissions] * span + (start[admissions] - origin)) * 2 + 1,
+    ])
+    rows = np.concatenate([discharges, admissions])
+    order = np.argsort(keys)
+    rows = rows[order]
+    is_discharge = order < len(discharges)
+
+    # Position of the next admission event at or after every event, by a
+    # reversed running minimum (len(order) where there is none)
+    events = len(order)
+    admission_at = np.where(is_discharge, events, np.arange(events))
+    next_admission = np.append(np.minimum.accumulate(admission_at[::-1])[::-1], events)
+    rows = np.append(rows, -1)
+
+    position = np.flatnonzero(is_discharge)
+    discharge_rows = rows[position]
+    nxt = next_admission[position]
+    # A zero-length admission must not count as its own readmission
+    is_self = rows[nxt] == discharge_rows
+    nxt[is_self] = next_admission[nxt[is_self] + 1]
+
+    found = nxt < events
+    admission_rows = rows[nxt]
+    found &= patients[admission_rows] == patients[discharge_rows]
+    gaps[discharge_rows[found]] = (
+        start[admission_rows[found]] - stop[discharge_rows[found]]) / SECONDS_PER_DAY
+    return gaps
+
+
+def _followed(encounters, windows):
+    """
+    Per window, the rows with a discharge that can be followed for the full
+    window; follow-up ends at the last admission in the data.
+    """
+    stop, stop_valid = epoch_seconds(encounters['STOP'])
+    start, start_valid = epoch_seconds(encounters['START'])
+    admissions = _class_mask(encounters, ADMISSION_CLASSES) & start_valid
+    end = start[admissions].max() if admissions.any() else stop[stop_valid].max(initial=0)
+    return stop_valid, {days: stop_valid & (stop <= end - days * SECONDS_PER_DAY)
+                        for days in windows}
+
+
+def readmission_rates(encounters, gaps, by, index=None, windows=READMISSION_WINDOWS,
+                      followed=None):
+    """
+    Index stays and N-day readmission rates (%) per value of ``by`` (a column
+    name or an array aligned with the rows), over the rows in the ``index``
+    mask (default: all rows). ``followed`` is a precomputed ``_followed``.
+    """
+    codes, labels = category_codes(encounters[by] if isinstance(by, str) else pd.Series(by))
+    stop_valid, followed = followed or _followed(encounters, windows)
+
+    eligible = (codes >= 0) & stop_valid
+    if index is not None:
+        eligible &= index
+    codes, gaps = codes[eligible], gaps[eligible]
+    stays = np.bincount(codes, minlength=len(labels))
+    present = stays > 0
+    table = pd.DataFrame({'STAYS': stays[present].astype('int64')},
+                         index=pd.Index(np.asarray(labels[present], dtype=object)))
+    for days in windows:
+        rows = followed[days][eligible]
+        denominator = np.bincount(codes, weights=rows, minlength=len(labels))
+        readmitted = np.bincount(codes, weights=rows & (gaps <= days), minlength=len(labels))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table[f'RATE_{days}D'] = (readmitted / denominator * 100)[present]
+    return table
+
+
+def readmission_report(encounters, gaps=None, windows=READMISSION_WINDOWS):
+    """
+    Readmission rates overall and by discharge year, ENCOUNTERCLASS, PAYER and
+    ORGANIZATION, as a dict of tables (see ``readmission_rates``).
+    """
+    if gaps is None:
+        gaps = readmission_gaps(encounters)
+    followed = _followed(encounters, windows)
+    inpatient = _class_mask(encounters, ADMISSION_CLASSES)
+    discharge_year = pd.Series(calendar_fields(encounters['STOP'])['year']).astype('Int64')
+
+    def rates(by, index=inpatient):
+        return readmission_rates(encounters, gaps, by, index, windows, followed)
+
+    overall = rates(np.zeros(len(encounters), dtype=np.int8))
+    return {
+        'overall': overall.reindex([0]).iloc[0].fillna({'STAYS': 0}),
+        'year': rates(discharge_year).sort_index(),
+        'class': rates('ENCOUNTERCLASS', None),
+        'payer': rates('PAYER'),
+        'organization': rates('ORGANIZATION'),
+    }
@@ -0,0 +1,194 @@
+"""
+Render Cache
+============
+Skips redrawing dashboards whose inputs have not changed. A dashboard's key
+is a SHA-256 over everything its output depends on:
+
+    - its aggregate inputs (Series, DataFrames, arrays, pre-binned
+      histograms, scalars, text), by value: a table read back from Parquet
+      hashes like the one built in memory, whatever the datetime resolution
+      or string dtype of its columns
+    - the source of its draw function and of the repository helpers and
+      module constants it reaches (``plot_bins.histogram_bar`` and the like)
+    - the matplotlib rcParams in effect (seaborn styles set them) and the
+      matplotlib/plotly versions
+
+The keys of the last successful renders are kept in a manifest under
+``.data_cache/`` together with the size and modification time of each output
+file. A dashboard is current when its key matches and its files are still the
+ones that render wrote, so a deleted or overwritten PNG is drawn again:
+
+    cache = RenderCache()
+    key = render_key(dashboard.draw, inputs)
+    if not cache.is_current(dashboard.name, key, dashboard.outputs):
+        dashboard.draw(inputs)
+        cache.record(dashboard.name, key, dashboard.outputs)
+
+``force=True`` treats every dashboard as stale; the manifest is still
+updated, so the next run skips them again.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import plotly
+
+from data_store import CACHE_DIR
+
+RENDER_MANIFEST = 'renders.json'
+RENDER_CACHE_VERSION = 2
+
+# Helpers defined in modules under this directory are part of a render's key
+_REPO_DIR = Path(__file__).resolve().parent
+
+
+def _canonical(values):
+    """An array's values with a type tag, independent of how they are stored"""
+    array = np.asarray(values)
+    kind = array.dtype.kind
+    if kind == 'M':
+        return 'datetime', array.astype('datetime64[ns]').view('int64')
+    if kind == 'm':
+        return 'timedelta', array.astype('timedelta64[ns]').view('int64')
+    if kind in 'OUS':
+        # Text as object, str or categorical columns, and mixed labels
+        return 'object', array.astype(object)
+    return array.dtype.str, array
+
+
+def _update(digest, value):
+    """Feed a dashboard input into a hash, recursing into containers"""
+    if isinstance(value, pd.DataFrame):
+        digest.update(b"DataFrame")
+        _update(digest, value.index)
+        _update(digest, value.columns)
+        for position in range(value.shape[1]):
+            _update(digest, value.iloc[:, position])
+    elif isinstance(value, (pd.Series, pd.Index)):
+        digest.update(f"{type(value).__name__}:{value.name!r};".encode())
+        if isinstance(value, pd.Series):
+            _update(digest, value.index)
+        _update(digest, np.asarray(value))
+    elif isinstance(value, np.ndarray):
+        tag, value = _canonical(value)
+        digest.update(f"ndarray{value.shape}{tag}".encode())
+        if value.dtype == object:
+            try:
+                digest.update(pd.util.hash_array(value.ravel()).tobytes())
+            except (TypeError, ValueError):
+                # Labels pandas cannot factorize (tuples of a MultiIndex) hash by their text
+                digest.update(repr(value.tolist()).encode())
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}".encode())
+        for key in sorted(value, key=repr):
+            _update(digest, key)
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(digest, item)
+    elif hasattr(value, '__dict__') and not callable(value):
+        # Input containers such as plot_bins.Histogram, by their attributes
+        digest.update(type(value).__name__.encode())
+        _update(digest, vars(value))
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+def _is_local(obj):
+    """Whether a function or class is defined in a module of this repository"""
+    try:
+        source_file = inspect.getsourcefile(obj)
+    except TypeError:
+        return False
+    return source_file is not None and Path(source_file).resolve().parent == _REPO_DIR
+
+
+def _code_names(code):
+    """Global names a code object and the functions nested in it refer to"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def draw_sources(draw):
+    """
+    Source of ``draw`` and of every repository function or class it reaches
+    through its globals, plus the module constants it reads, by name
+    """
+    sources, pending = {}, [draw]
+    while pending:
+        function = pending.pop()
+        name = f"{function.__module__}.{function.__qualname__}"
+        if name in sources:
+            continue
+        sources[name] = inspect.getsource(function)
+        if not inspect.isfunction(function):
+            continue
+        for global_name in sorted(_code_names(function.__code__)):
+            value = function.__globals__.get(global_name)
+            if (inspect.isfunction(value) or inspect.isclass(value)) and _is_local(value):
+                pending.append(value)
+            elif isinstance(value, (bool, int, float, str, tuple, list, frozenset)):
+                sources[f"{function.__module__}.{global_name}"] = repr(value)
+    return sources
+
+
+def render_key(draw, inputs):
+    """Key of drawing ``inputs`` with ``draw`` under the current style settings"""
+    digest = hashlib.sha256()
+    _update(digest, [RENDER_CACHE_VERSION, matplotlib.__version__, plotly.__version__])
+    _update(digest, draw_sources(draw))
+    _update(digest, {name: repr(value) for name, value in matplotlib.rcParams.items()})
+    _update(digest, inputs)
+    return digest.hexdigest()
+
+
+def _file_state(path):
+    """Size and modification time of an output file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class RenderCache:
+    """Manifest of the keys and output files of the last successful renders"""
+
+    def __init__(self, force=False, data_dir='.', cache_dir=None):
+        cache_root = Path(cache_dir) if cache_dir else Path(data_dir) / CACHE_DIR
+        self.path = cache_root / RENDER_MANIFEST
+        self.force = force
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, name, key, outputs):
+        """Whether ``name`` was last rendered from ``key`` and its files are untouched"""
+        entry = self.entries.get(name)
+        if self.force or not outputs or entry is None or entry['key'] != key:
+            return False
+        return all(entry['files'].get(path) == _file_state(path) and _file_state(path) is not None
+                   for path in outputs)
+
+    def record(self, name, key, outputs):
+        """Remember a finished render and save the manifest atomically"""
+        self.entries[name] = {'key': key, 'files': {path: _file_state(path) for path in outputs}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,208 @@
+"""
+Stage Scheduler
+===============
+Runs the stages of a pipeline as a dependency graph instead of one after
+another. Each ``Stage`` declares the artifacts it reads (``inputs``) and
+writes (``outputs``); a stage waits for the last earlier-declared stage
+writing any of its inputs, and for earlier stages reading or writing any of
+its outputs. Stages with nothing between them run concurrently:
+
+    stages = [
+        Stage('prepare', prepare, inputs=['encounters'], outputs=['stats']),
+        Stage('demographics', demographics, inputs=['patients'], outputs=['insights.demographics']),
+        Stage('financial', financial, inputs=['stats'], outputs=['insights.financial']),
+    ]
+    Scheduler(stages, workers=8).run(publish)
+
+Declaration order is the serial order, so any schedule gives the results of
+running the stages one after another. A stage's ``run`` returns a dict of its
+outputs, which the scheduler hands to ``publish`` in the calling process.
+
+With ``executor='thread'`` (default) stages share the caller's objects
+directly; NumPy and pandas release the GIL in their heavy loops. With
+``executor='process'`` each stage runs in a process forked once the stages
+before it are published, so it reads the prepared frames copy-on-write and
+only its outputs are pickled back.
+
+Console output of a stage is buffered and printed in declaration order, so
+it reads the same as a serial run. ``workers=1`` runs the stages inline.
+"""
+
+import io
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import redirect_stdout
+
+from tracing import TRACER
+
+EXECUTORS = ('thread', 'process')
+
+
+class Stage:
+    """A named step with the artifacts it reads and writes"""
+
+    def __init__(self, name, run, inputs=(), outputs=()):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def dependencies(stages):
+    """Indices of the earlier stages each stage has to wait for"""
+    writer = {}
+    readers = {}
+    depends = []
+    for i, stage in enumerate(stages):
+        before = {writer[name] for name in stage.inputs if name in writer}
+        for name in stage.outputs:
+            if name in writer:
+                before.add(writer[name])
+            before.update(readers.get(name, ()))
+        depends.append(before)
+        for name in stage.inputs:
+            readers.setdefault(name, set()).add(i)
+        for name in stage.outputs:
+            writer[name] = i
+            readers[name] = set()
+    return depends
+
+
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout stand-in sending each scheduler thread's writes to its own buffer"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _run_captured(stage):
+    """Run a stage with its output captured: (outputs, printed text, error)"""
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            return stage.run() or {}, buffer.getvalue(), None
+    except Exception as exc:
+        return None, buffer.getvalue(), exc
+
+
+def _run_in_thread(output, stage):
+    output.local.buffer = buffer = io.StringIO()
+    try:
+        return stage.run() or {}, buffer.getvalue(), None
+    except Exception as exc:
+        return None, buffer.getvalue(), exc
+    finally:
+        output.local.buffer = None
+
+
+# Stages of the process-pool run in progress; forked children look their stage
+# up here by index, so neither the stage nor what it closes over is pickled
+_FORKED_STAGES = []
+
+
+def _run_in_child(index):
+    # Trace spans recorded in the child travel back with the outputs
+    TRACER.events = []
+    outputs, text, error = _run_captured(_FORKED_STAGES[index])
+    return outputs, text, error, TRACER.events
+
+
+class Scheduler:
+    """Runs stages concurrently as their dependencies complete"""
+
+    def __init__(self, stages, workers=None, executor='thread'):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}' (expected one of {', '.join(EXECUTORS)})")
+        self.stages = list(stages)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.executor = executor
+        self.depends = dependencies(self.stages)
+
+    def run(self, publish):
+        """Run every stage, passing each one's outputs to ``publish`` in this process"""
+        if self.workers == 1:
+            for stage in self.stages:
+                publish(stage.run() or {})
+            return
+        if self.executor == 'process':
+            self._run_processes(publish)
+        else:
+            self._run_threads(publish)
+
+    def _schedule(self, submit, publish):
+        """
+        Submit stages (at most ``workers`` at a time) as their dependencies
+        finish and print their output in declaration order; ``submit(index)``
+        returns a future of (outputs, text, error[, trace events]).
+        """
+        done, printed = set(), 0
+        texts = {}
+        running = {}
+        try:
+            while len(done) < len(self.stages):
+                for i in range(len(self.stages)):
+                    if len(running) >= self.workers:
+                        break
+                    if i not in done and i not in running.values() and self.depends[i] <= done:
+                        running[submit(i)] = i
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    outputs, text, error, *events = future.result()
+                    texts[i] = text
+                    if events:
+                        TRACER.events.extend(events[0])
+                    if error is not None:
+                        raise error
+                    publish(outputs)
+                    done.add(i)
+                while printed in texts:
+                    sys.stdout.write(texts.pop(printed))
+                    printed += 1
+        finally:
+            # Output of stages that finished before a failure, in order
+            for i in sorted(texts):
+                sys.stdout.write(texts[i])
+
+    def _run_threads(self, publish):
+        output = _ThreadOutput(sys.stdout)
+        sys.stdout = output
+        try:
+            with ThreadPoolExecutor(self.workers) as pool:
+                self._schedule(lambda i: pool.submit(_run_in_thread, output, self.stages[i]),
+                               publish)
+        finally:
+            sys.stdout = output.stream
+
+    def _run_processes(self, publish):
+        # Workers are forked per stage, after everything it depends on is
+        # published, so each child sees the parent's current objects
+        context = multiprocessing.get_context('fork')
+        pools = []
+        _FORKED_STAGES[:] = self.stages
+
+        def submit(i):
+            pool = ProcessPoolExecutor(1, mp_context=context)
+            pools.append(pool)
+            return pool.submit(_run_in_child, i)
+
+        try:
+            self._schedule(submit, publish)
+        finally:
+            for pool in pools:
+                pool.shutdown()
+            _FORKED_STAGES.clear()
@@ -0,0 +1,185 @@
+"""
+Dataset Schema Registry
+=======================
+Declares how every documented column in ``data_dictionary.csv`` is stored in
+memory, so that all scripts load the same compact, typed frames.
+
+Each column is assigned a storage kind:
+
+    id         unique identifiers, left as plain strings
+    key        foreign keys, dictionary-encoded (categorical)
+    category   low-cardinality text, dictionary-encoded (categorical)
+    text       free text, left as plain strings
+    timestamp  ISO-8601 UTC date-time, fixed layout yyyy-MM-dd'T'HH:mm'Z'
+    date       ISO-8601 date, fixed layout YYYY-MM-DD
+    number     numeric, downcast to the smallest lossless type
+
+Timestamps and dates are parsed by ``timeparse.parse_timestamps`` into
+``datetime64[s]`` values (naive, representing UTC); malformed values raise
+``timeparse.MalformedTimestampError`` listing the offending rows.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from timeparse import LAYOUTS, parse_timestamps
+
+DICTIONARY_FILE = 'data_dictionary.csv'
+
+# Storage kind for every column, keyed by table and CSV column name
+COLUMN_KINDS = {
+    'encounters': {
+        'Id': 'id',
+        'START': 'timestamp',
+        'STOP': 'timestamp',
+        'PATIENT': 'key',
+        'ORGANIZATION': 'key',
+        'PAYER': 'key',
+        'ENCOUNTERCLASS': 'category',
+        'CODE': 'number',
+        'DESCRIPTION': 'category',
+        'BASE_ENCOUNTER_COST': 'number',
+        'TOTAL_CLAIM_COST': 'number',
+        'PAYER_COVERAGE': 'number',
+        'REASONCODE': 'number',
+        'REASONDESCRIPTION': 'category',
+    },
+    'procedures': {
+        'START': 'timestamp',
+        'STOP': 'timestamp',
+        'PATIENT': 'key',
+        'ENCOUNTER': 'id',
+        'CODE': 'number',
+        'DESCRIPTION': 'category',
+        'BASE_COST': 'number',
+        'REASONCODE': 'number',
+        'REASONDESCRIPTION': 'category',
+    },
+    'patients': {
+        'Id': 'id',
+        'BIRTHDATE': 'date',
+        'DEATHDATE': 'date',
+        'PREFIX': 'category',
+        'FIRST': 'text',
+        'MIDDLE': 'text',
+        'LAST': 'text',
+        'SUFFIX': 'category',
+        'MAIDEN': 'text',
+        'MARITAL': 'category',
+        'RACE': 'category',
+        'ETHNICITY': 'category',
+        'GENDER': 'category',
+        'BIRTHPLACE': 'category',
+        'ADDRESS': 'text',
+        'CITY': 'category',
+        'STATE': 'category',
+        'COUNTY': 'category',
+        'FIPS': 'category',
+        'ZIP': 'number',
+        'LAT': 'number',
+        'LON': 'number',
+    },
+    'organizations': {
+        'Id': 'id',
+        'NAME': 'text',
+        'ADDRESS': 'text',
+        'CITY': 'category',
+        'STATE': 'category',
+        'ZIP': 'number',
+        'LAT': 'number',
+        'LON': 'number',
+    },
+    'payers': {
+        'Id': 'id',
+        'NAME': 'text',
+        'ADDRESS': 'text',
+        'CITY': 'category',
+        'STATE_HEADQUARTERED': 'category',
+        'ZIP': 'number',
+        'PHONE': 'text',
+    },
+}
+
+# Data dictionary field names that do not follow the upper-case convention
+FIELD_ALIASES = {
+    'Id': 'Id',
+    'FIPS County Code': 'FIPS',
+}
+
+
+def column_name(field):
+    """Map a data dictionary field name (e.g. 'Base_Encounter_Cost') to its CSV column"""
+    return FIELD_ALIASES.get(field, field.upper().replace(' ', '_'))
+
+
+def load_dictionary(path=DICTIONARY_FILE):
+    """Return {table: [column, ...]} for every field listed in the data dictionary"""
+    dictionary = pd.read_csv(path, encoding='utf-8-sig')
+    fields = dictionary.dropna(subset=['Field'])
+    return {
+        table: [column_name(field) for field in group['Field']]
+        for table, group in fields.groupby('Table', sort=False)
+    }
+
+
+def check_dictionary(path=DICTIONARY_FILE):
+    """Return documented columns missing from the registry, as {table: [column, ...]}"""
+    if not Path(path).exists():
+        return {}
+    missing = {}
+    for table, columns in load_dictionary(path).items():
+        declared = COLUMN_KINDS.get(table, {})
+        undeclared = [col for col in columns if col not in declared]
+        if undeclared:
+            missing[table] = undeclared
+    return missing
+
+
+def read_dtypes(table):
+    """dtype mapping for ``pd.read_csv`` so dictionary-encoded columns are built while parsing"""
+    return {
+        col: 'category'
+        for col, kind in COLUMN_KINDS.get(table, {}).items()
+        if kind in ('key', 'category')
+    }
+
+
+def _downcast(series):
+    """Downcast a numeric column to the smallest type that holds every value exactly"""
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy()
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+            return pd.Series(narrow, index=series.index, name=series.name)
+    return series
+
+
+def apply_schema(table, df):
+    """Convert a freshly parsed frame to the registry's types, in place"""
+    for col, kind in COLUMN_KINDS.get(table, {}).items():
+        if col not in df.columns:
+            continue
+        if kind in LAYOUTS:
+            df[col] = parse_timestamps(df[col], layout=kind)
+        elif kind in ('key', 'category') and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+        elif kind == 'number':
+            df[col] = _downcast(df[col])
+    return df
+
+
+def read_table_csv(table, path, **kwargs):
+    """Parse a table's CSV with the registry's types applied"""
+    df = pd.read_csv(path, dtype=read_dtypes(table), **kwargs)
+    return apply_schema(table, df)
+
+
+def iter_table_csv(table, path, chunksize, **kwargs):
+    """Parse a table's CSV in chunks of ``chunksize`` rows, each with the registry's types applied"""
+    with pd.read_csv(path, dtype=read_dtypes(table), chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield apply_schema(table, chunk)
@@ -0,0 +1,115 @@
+"""
+Append-only Segments
+====================
+On-disk runs of sorted NumPy arrays for the parts of the analysis state that
+grow with every row (see ``analysis_state.py``): the value histograms of
+``partials.py`` and the exact distinct counters of ``sketches.py``.
+
+A structure that persists this way (a ``Segmented``) keeps its recent rows
+in memory and its history as segments: named sets of arrays written once
+into a ``SegmentStore`` directory and memory-mapped when read, so loading a
+state costs nothing per segment and a lookup touches only the pages its
+binary searches visit. ``persisted(store)`` writes the in-memory part as a
+new segment and returns a copy to pickle in its place; the newest segment
+is merged into the one before it while it is at least as large, so a
+structure holds a logarithmic number of segments and each row is rewritten
+a logarithmic number of times.
+"""
+
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+
+class SegmentStore:
+    """Named segments of arrays in a directory, written once and memory-mapped on read"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._mapped = {}
+        # Segments the state being saved refers to
+        self.referenced = set()
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def write(self, arrays):
+        """Write a new segment of ``{field: array}`` and return its name"""
+        name = uuid.uuid4().hex[:16]
+        self.path.mkdir(parents=True, exist_ok=True)
+        for field, array in arrays.items():
+            np.save(self.path / f'{name}.{field}.npy', np.ascontiguousarray(array))
+        return name
+
+    def read(self, name, field):
+        """One array of a segment, memory-mapped"""
+        key = name, field
+        if key not in self._mapped:
+            self._mapped[key] = np.load(self.path / f'{name}.{field}.npy', mmap_mode='r')
+        return self._mapped[key]
+
+    def keep(self, names):
+        """Mark segments as part of the state being saved"""
+        self.referenced.update(names)
+
+    def collect(self):
+        """Delete the segment files the saved state does not refer to"""
+        for path in self.path.glob('*.npy'):
+            if path.name.split('.', 1)[0] not in self.referenced:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+class Segmented:
+    """
+    Base of the structures persisted as segments. A subclass implements
+    ``_memory_segment`` (its in-memory part as ``{field: array}``, or None
+    when empty), ``_without_memory`` (a shallow copy with that part empty)
+    and ``_merge_segments`` (the arrays of two of its segments as one).
+    The first field of a segment has one entry per value it holds.
+    """
+
+    store = None
+    segments = ()
+    sizes = ()
+
+    def _memory_segment(self):
+        raise NotImplementedError
+
+    def _without_memory(self):
+        raise NotImplementedError
+
+    def _merge_segments(self, older, newer):
+        raise NotImplementedError
+
+    def _read(self, name, field):
+        return self.store.read(name, field)
+
+    def persisted(self, store):
+        """
+        A copy whose in-memory part is written to ``store`` as a new segment,
+        for pickling; this structure keeps its in-memory part.
+        """
+        arrays = self._memory_segment()
+        persisted = self._without_memory()
+        persisted.store = store
+        persisted.segments, persisted.sizes = list(self.segments), list(self.sizes)
+        if arrays is not None:
+            persisted._append(arrays)
+            # The newest segment absorbs the one before while at least as large
+            while len(persisted.segments) > 1 and persisted.sizes[-1] >= persisted.sizes[-2]:
+                merged = persisted._merge_segments(*persisted.segments[-2:])
+                persisted.segments, persisted.sizes = persisted.segments[:-2], persisted.sizes[:-2]
+                persisted._append(merged)
+        store.keep(persisted.segments)
+        return persisted
+
+    def _append(self, arrays):
+        self.segments.append(self.store.write(arrays))
+        self.sizes.append(len(next(iter(arrays.values()))))
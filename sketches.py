@@ -0,0 +1,594 @@
+"""
+Mergeable Sketches
+==================
+Fixed-size summaries of a column that are built one chunk at a time and
+merged, for the statistics that would otherwise need the whole column in
+memory. Each sketch offers the interface of the exact structure it stands in
+for, so the analyzer can switch between exact and approximate mode without
+changing how it reads the results.
+
+QuantileSketch
+    t-digest quantile sketch, a drop-in for ``partials.ValueHistogram``
+    (quantiles, medians and threshold counts/sums). Values are summarized as
+    centroids (mean, weight). Centroids are merged under the arcsine scale
+    function, which keeps them small near both tails, so extreme percentiles
+    such as the top-10% cost threshold stay accurate. Each centroid keeps
+    its exact sum, so totals above a threshold are nearly exact too.
+
+    ``compression`` bounds the centroid count: a compressed sketch holds
+    about ``compression / 2`` centroids and never more than
+    ``BUFFER_FACTOR * compression`` between compressions. At the default of
+    200 the rank error is well under 1% in the middle of the distribution
+    and far less at the tails. Until the first compression the results are
+    exact.
+
+TopKSketch
+    Space-Saving heavy-hitter sketch, a drop-in for the frequency tables
+    behind ``value_counts().head(n)``. At most ``capacity`` labels are kept
+    with an overestimated count and the bound on that overestimate. Merging
+    two sketches charges each label missing from a full sketch with that
+    sketch's smallest count, so a merged count exceeds the true count by at
+    most ``rows / capacity``, and every label more frequent than that is
+    retained. While fewer than ``capacity`` distinct labels have been seen
+    the counts are exact. ``top_values`` folds a loaded column into one a
+    chunk of rows at a time, for the dashboards' top-N panels.
+
+DistinctCounter
+    Distinct-value counts, overall or per group (e.g. distinct reasons per
+    patient). The exact mode codes the values with a stable integer
+    dictionary (``LabelDictionary``), interning each chunk's categories - or
+    unique values, for a column that is not categorical - once, so it is
+    exact: overall the count is the size of the dictionary, and per group it
+    keeps the sorted unique (group id, value id) pairs as one 8-byte key
+    each. The approximate mode is HyperLogLog over 64-bit hashes of the
+    values: ``2**precision`` one-byte registers overall (about 0.8% standard
+    error at precision 14). Per group it is sparse: a group keeps exact
+    (group, hash) pairs until it has more distinct values than its
+    registers would hold in the same bytes (64 at the grouped default
+    precision of 10), and only then switches to 1,024 registers (about 3%
+    error). The typical patient, with a handful of distinct reasons, is
+    counted exactly in 16 bytes per reason. Merging takes the maximum of
+    each register. Pairs are queued and deduplicated in batches, like the
+    tables of a ``tally.Tally``, so folding in a chunk costs the chunk's
+    size rather than the number of pairs seen so far.
+
+All sketches are deterministic (compression does not sample, Space-Saving ties
+are broken by label and hashing is unseeded), so a given sequence of chunks
+always yields the same sketch.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from financial_engine import category_codes
+from segments import Segmented
+
+DEFAULT_COMPRESSION = 200
+
+# Centroids kept before a compression is triggered, relative to the compression
+BUFFER_FACTOR = 5
+
+DEFAULT_CAPACITY = 1000
+
+# Rows ``top_values`` folds into its sketch at a time
+TOP_VALUES_CHUNK = 1 << 16
+
+# HyperLogLog register counts (2 ** precision) for overall and per-group counts
+DEFAULT_PRECISION = 14
+GROUPED_PRECISION = 10
+
+# Bytes of a sparse (group, hash) pair; a group switches to registers once its
+# pairs would take more room than them
+PAIR_BYTES = 16
+
+# Exact pair keys are ``group_id << VALUE_BITS | value_id``
+VALUE_BITS = 32
+VALUE_MASK = (1 << VALUE_BITS) - 1
+
+# Pairs collected before they are combined with the unique ones, at the least
+# (as ``tally.Tally`` collects chunk tables)
+PENDING_PAIRS = 1 << 16
+
+
+class QuantileSketch:
+    """Mergeable approximate quantiles in bounded memory"""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.n = 0
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    @classmethod
+    def from_values(cls, values, compression=DEFAULT_COMPRESSION):
+        return cls(compression).update(values)
+
+    def update(self, values):
+        """Fold a batch of values in; missing values are skipped"""
+        values = pd.Series(values).dropna().to_numpy(dtype='float64')
+        return self._add(values, np.ones(len(values)))
+
+    def merge(self, other):
+        """Combine another sketch into this one"""
+        return self._add(other.means, other.weights)
+
+    def __len__(self):
+        return int(self.n)
+
+    def persisted(self, store):
+        """The sketch itself: it is bounded in size, so a saved state pickles it whole"""
+        return self
+
+    @property
+    def exact(self):
+        """True while every centroid is a single value"""
+        return bool((self.weights == 1).all())
+
+    def _add(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        self.means, self.weights = means[order], weights[order]
+        self.n = self.weights.sum()
+        if len(self.means) > BUFFER_FACTOR * self.compression:
+            self._compress()
+        return self
+
+    def _compress(self):
+        """Merge neighbouring centroids that fall into the same unit of the scale function"""
+        cumulative = self.weights.cumsum()
+        q = (cumulative - self.weights / 2) / self.n
+        scale = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        _, group = np.unique(scale, return_inverse=True)
+        weights = np.bincount(group, weights=self.weights)
+        self.means = np.bincount(group, weights=self.weights * self.means) / weights
+        self.weights = weights
+
+    def _centers(self):
+        """Rank (0-based) at the middle of each centroid"""
+        return self.weights.cumsum() - self.weights + (self.weights - 1) / 2
+
+    def quantile(self, q):
+        """Quantile with the linear interpolation of ``Series.quantile``, over estimated ranks"""
+        if self.n == 0:
+            return np.nan
+        return float(np.interp((self.n - 1) * q, self._centers(), self.means))
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def _rank(self, threshold):
+        """Estimated rank of ``threshold`` among the values"""
+        return np.interp(threshold, self.means, self._centers())
+
+    def count_above(self, threshold):
+        """Number of values strictly greater than ``threshold`` (estimated once compressed)"""
+        if self.exact:
+            return int((self.means > threshold).sum())
+        return int(round(self.n - 1 - self._rank(threshold)))
+
+    def sum_above(self, threshold):
+        """Sum of the values strictly greater than ``threshold`` (estimated once compressed)"""
+        if self.exact:
+            return float(self.means[self.means > threshold].sum())
+        mass = self.weights * self.means
+        # Cumulative sum up to the middle of each centroid, read off at the threshold's rank
+        below = np.interp(self._rank(threshold), self._centers(), mass.cumsum() - mass / 2)
+        return float(mass.sum() - below)
+
+
+class TopKSketch:
+    """Mergeable approximate value counts of the most frequent labels in bounded memory"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.rows = 0
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+
+    @classmethod
+    def from_values(cls, values, capacity=DEFAULT_CAPACITY):
+        """Sketch of one chunk, from its exact counts; missing values are skipped"""
+        counts = pd.Series(values).value_counts(sort=False)
+        counts = counts[counts > 0]
+        counts.index = counts.index.astype(object)
+        sketch = cls(capacity)
+        sketch.rows = int(counts.sum())
+        sketch.counts = counts.astype('int64')
+        sketch.errors = pd.Series(0, index=counts.index, dtype='int64')
+        return sketch._truncate()
+
+    def __len__(self):
+        return self.rows
+
+    def floor(self):
+        """Largest count a label that is not retained can have"""
+        return int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """Combine another sketch into this one"""
+        labels = self.counts.index.append(other.counts.index).unique()
+        floor, other_floor = self.floor(), other.floor()
+        self.counts = (self.counts.reindex(labels, fill_value=floor)
+                       + other.counts.reindex(labels, fill_value=other_floor))
+        self.errors = (self.errors.reindex(labels, fill_value=floor)
+                       + other.errors.reindex(labels, fill_value=other_floor))
+        self.rows += other.rows
+        return self._truncate()
+
+    def _truncate(self):
+        """Keep the ``capacity`` largest counts, ties broken by label"""
+        if len(self.counts) > self.capacity:
+            keep = self.top().index[:self.capacity]
+            self.counts = self.counts[keep]
+            self.errors = self.errors[keep]
+        return self
+
+    def top(self, n=None):
+        """Estimated counts in ``value_counts()`` order, ties broken by label"""
+        ranked = self.counts.sort_index().sort_values(ascending=False, kind='stable')
+        return ranked if n is None else ranked.head(n)
+
+    def guaranteed(self, n=None):
+        """Lower bounds on the true counts of ``top(n)``"""
+        top = self.top(n)
+        return top - self.errors[top.index]
+
+
+def top_values(values, n, capacity=DEFAULT_CAPACITY, chunksize=TOP_VALUES_CHUNK):
+    """
+    ``value_counts().head(n)`` of a column from a TopKSketch folded in
+    ``chunksize`` rows at a time, so no table of every distinct label is built
+    (exact while fewer than ``capacity`` labels occur; ties broken by label)
+    """
+    sketch = TopKSketch(capacity)
+    for start in range(0, len(values), chunksize):
+        sketch.merge(TopKSketch.from_values(values.iloc[start:start + chunksize], capacity))
+    return sketch.top(n)
+
+
+def hash_values(values):
+    """64-bit hashes of the non-missing values, and the mask of rows they came from"""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        valid = codes >= 0
+        category_hashes = pd.util.hash_array(values.cat.categories.to_numpy(dtype=object))
+        return category_hashes[codes[valid]], valid
+    valid = values.notna().to_numpy()
+    return pd.util.hash_array(values.to_numpy(dtype=object)[valid]), valid
+
+
+def _register_ranks(hashes, precision):
+    """HyperLogLog register index and rank (leading zeros + 1) of each hash"""
+    width = 64 - precision
+    buckets = (hashes >> np.uint64(width)).astype(np.intp)
+    rest = hashes & np.uint64((1 << width) - 1)
+    # Bit length from float exponents, split in 32-bit halves to stay exact
+    high = np.frexp((rest >> np.uint64(32)).astype('float64'))[1]
+    low = np.frexp((rest & np.uint64(0xFFFFFFFF)).astype('float64'))[1]
+    bit_length = np.where(high > 0, high + 32, low)
+    return buckets, (width - bit_length + 1).astype(np.uint8)
+
+
+def _hll_estimate(registers, precision):
+    """HyperLogLog cardinality estimate of each row of registers"""
+    m = 1 << precision
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.ldexp(1.0, -registers.astype(np.int64)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    # Small cardinalities: linear counting on the empty registers
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def _unique_pairs(group_ids, hashes):
+    """Sorted unique (group, hash) pairs"""
+    order = np.lexsort((hashes, group_ids))
+    group_ids, hashes = group_ids[order], hashes[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (group_ids[1:] != group_ids[:-1]) | (hashes[1:] != hashes[:-1])
+    return group_ids[first], hashes[first]
+
+
+class LabelDictionary:
+    """
+    Stable integer ids for labels, numbered in first-seen order. The labels
+    are held in blocks that merge like a binary counter (a block absorbs the
+    next one once that is as large), so interning a chunk costs one hash
+    lookup per block instead of rebuilding an index of every label.
+    """
+
+    def __init__(self):
+        self.blocks = []
+
+    def __len__(self):
+        return sum(len(block) for block in self.blocks)
+
+    @property
+    def labels(self):
+        """Every label, at the position of its id"""
+        if not self.blocks:
+            return pd.Index([], dtype=object)
+        return self.blocks[0].append(self.blocks[1:]) if len(self.blocks) > 1 else self.blocks[0]
+
+    def lookup(self, labels):
+        """Ids of ``labels``, -1 for those not interned"""
+        labels = pd.Index(labels, dtype=object)
+        ids = np.full(len(labels), -1, dtype=np.int64)
+        offset = 0
+        for block in self.blocks:
+            found = block.get_indexer(labels)
+            ids[found >= 0] = found[found >= 0] + offset
+            offset += len(block)
+        return ids
+
+    def intern(self, labels):
+        """Ids of the unique ``labels``, numbering the ones not seen before"""
+        labels = pd.Index(labels, dtype=object)
+        ids = self.lookup(labels)
+        new = ids < 0
+        if new.any():
+            ids[new] = np.arange(len(self), len(self) + new.sum())
+            self.blocks.append(labels[new])
+            while len(self.blocks) > 1 and len(self.blocks[-1]) >= len(self.blocks[-2]):
+                tail = self.blocks.pop()
+                self.blocks[-1] = self.blocks[-1].append(tail)
+        return ids
+
+
+def _label_keys(labels):
+    """Labels as UTF-8 bytes, the sortable form segments keep them in"""
+    return np.char.encode(np.asarray(labels, dtype=str), 'utf-8')
+
+
+def _sorted_contains(sorted_keys, keys):
+    """Which of ``keys`` occur in the sorted array ``sorted_keys``"""
+    fits = True
+    if sorted_keys.dtype.kind == 'S':
+        # Longer labels cannot occur, and must not match once truncated
+        fits = np.char.str_len(keys) <= sorted_keys.dtype.itemsize
+        keys = keys.astype(sorted_keys.dtype)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return fits & (sorted_keys[positions] == keys)
+
+
+def _intern_codes(dictionary, codes, labels):
+    """Dictionary ids of the rows with a code, interning only the labels that occur"""
+    codes = codes[codes >= 0]
+    ids = np.full(len(labels), -1, dtype=np.int64)
+    present = np.bincount(codes, minlength=len(labels)) > 0
+    ids[present] = dictionary.intern(labels[present])
+    return ids[codes]
+
+
+class DistinctCounter(Segmented):
+    """
+    Mergeable distinct-value counts, overall or per group, exact or
+    HyperLogLog. In a saved state the exact mode keeps the values (or pair
+    keys) of earlier runs as sorted segments (see ``segments.py``), which
+    new values are looked up in, and only the values of this run in memory.
+    """
+
+    def __init__(self, grouped=False, approximate=False, precision=None):
+        self.grouped = grouped
+        self.approximate = approximate
+        self.precision = precision or (GROUPED_PRECISION if grouped else DEFAULT_PRECISION)
+        self.groups = LabelDictionary()
+        # Exact mode: the distinct values and, when grouped, the sorted unique
+        # pair keys over the group and value ids
+        self.values = LabelDictionary()
+        self.pairs = np.empty(0, dtype=np.int64)
+        # Grouped exact mode: distinct values per group id held in segments
+        self.persisted_counts = np.empty(0, dtype=np.int64)
+        # Approximate grouped mode: exact (group, hash) pairs of the groups
+        # still below ``sparse_limit`` values
+        self.group_ids = np.empty(0, dtype=np.int64)
+        self.hashes = np.empty(0, dtype=np.uint64)
+        # Pairs not yet combined with the unique ones above: pair keys, or
+        # (group ids, hashes) in approximate mode
+        self.pending = []
+        self.pending_pairs = 0
+        # Register row of each group, -1 while it is counted exactly
+        self.dense = np.empty(0, dtype=np.intp)
+        rows = 0 if grouped or not approximate else 1
+        self.registers = np.zeros((rows, 1 << self.precision), dtype=np.uint8)
+
+    @property
+    def sparse_limit(self):
+        """Exact values a group keeps before its pairs would outgrow its registers"""
+        return (1 << self.precision) // PAIR_BYTES
+
+    def _intern_groups(self, labels):
+        """Group ids of the unique ``labels``, adding the labels not seen before"""
+        ids = self.groups.intern(labels)
+        if len(self.dense) < len(self.groups):
+            self.dense = np.concatenate([
+                self.dense, np.full(len(self.groups) - len(self.dense), -1, dtype=np.intp)])
+        return ids
+
+    def update(self, values, groups=None):
+        """Fold in a batch of values (and, when grouped, the group label of each row)"""
+        values = pd.Series(values)
+        if self.grouped:
+            group_codes, group_labels = category_codes(pd.Series(groups))
+            values = values.where(group_codes >= 0)
+        if self.approximate:
+            hashes, valid = hash_values(values)
+        else:
+            codes, labels = category_codes(values)
+            valid = codes >= 0
+            if not self.grouped:
+                present = np.bincount(codes[valid], minlength=len(labels)) > 0
+                return self._add_labels(labels[present])
+            value_ids = _intern_codes(self.values, codes, labels)
+        if not self.grouped:
+            return self._add_hashes(hashes, None)
+        group_codes = group_codes[valid]
+        group_ids = np.full(len(group_labels), -1, dtype=np.int64)
+        present = np.bincount(group_codes, minlength=len(group_labels)) > 0
+        group_ids[present] = self._intern_groups(group_labels[present])
+        group_ids = group_ids[group_codes]
+        if self.approximate:
+            return self._add_hashes(hashes, group_ids)
+        return self._add_pairs(group_ids << VALUE_BITS | value_ids)
+
+    def merge(self, other):
+        """Combine another counter into this one"""
+        if self.approximate and not self.grouped:
+            np.maximum(self.registers, other.registers, out=self.registers)
+            return self
+        if other.segments:
+            raise ValueError("A persisted counter can only be merged into, not merged")
+        other._combine()
+        if not self.approximate:
+            if not self.grouped:
+                return self._add_labels(other.values.labels)
+            value_ids = self.values.intern(other.values.labels)
+            group_ids = self._intern_groups(other.groups.labels)
+            return self._add_pairs(group_ids[other.pairs >> VALUE_BITS] << VALUE_BITS
+                                   | value_ids[other.pairs & VALUE_MASK])
+        ids = self._intern_groups(other.groups.labels)
+        dense_groups = np.flatnonzero(other.dense >= 0)
+        if len(dense_groups):
+            self._combine()
+            self._promote(ids[dense_groups])
+            np.maximum.at(self.registers, self.dense[ids[dense_groups]],
+                          other.registers[other.dense[dense_groups]])
+        return self._add_hashes(other.hashes, ids[other.group_ids])
+
+    def _add_labels(self, labels):
+        """Fold unique labels in (exact ungrouped mode)"""
+        if self.segments:
+            labels = labels[~self._in_segments(_label_keys(labels))]
+        self.values.intern(labels)
+        return self
+
+    def _add_pairs(self, keys):
+        """Fold exact pair keys in"""
+        keys = np.unique(keys)
+        if self.segments:
+            keys = keys[~self._in_segments(keys)]
+        return self._collect(keys)
+
+    def _in_segments(self, keys):
+        """Which of ``keys`` (pair keys, or labels as bytes) a segment holds"""
+        field = 'pairs' if self.grouped else 'labels'
+        found = np.zeros(len(keys), dtype=bool)
+        for name in self.segments:
+            found |= _sorted_contains(self._read(name, field), keys)
+        return found
+
+    def persisted(self, store):
+        if self.approximate:
+            # Registers and sparse pairs are bounded; a saved state pickles them whole
+            return self
+        return super().persisted(store)
+
+    def _memory_segment(self):
+        if self.grouped:
+            self._combine()
+            return {'pairs': self.pairs} if len(self.pairs) else None
+        return {'labels': np.sort(_label_keys(self.values.labels))} if len(self.values) else None
+
+    def _without_memory(self):
+        persisted = copy.copy(self)
+        if self.grouped:
+            persisted.persisted_counts = self._persisted_counts() + np.bincount(
+                self.pairs >> VALUE_BITS, minlength=len(self.groups))
+            persisted.pairs = np.empty(0, dtype=np.int64)
+        else:
+            persisted.values = LabelDictionary()
+        return persisted
+
+    def _merge_segments(self, older, newer):
+        field = 'pairs' if self.grouped else 'labels'
+        return {field: np.sort(np.concatenate([self._read(older, field), self._read(newer, field)]))}
+
+    def _persisted_counts(self):
+        """Distinct values per group id held in segments"""
+        missing = len(self.groups) - len(self.persisted_counts)
+        return np.concatenate([self.persisted_counts, np.zeros(missing, dtype=np.int64)])
+
+    def _collect(self, pairs):
+        """
+        Queue pairs, combining the queue once it holds more pairs than both
+        the unique ones and ``PENDING_PAIRS``, so each chunk costs its own size
+        """
+        size = len(pairs[0]) if self.approximate else len(pairs)
+        if not size:
+            return self
+        self.pending.append(pairs)
+        self.pending_pairs += size
+        if self.pending_pairs > max(len(self.pairs) + len(self.hashes), PENDING_PAIRS):
+            self._combine()
+        return self
+
+    def _combine(self):
+        """Merge the queued pairs into the unique ones"""
+        if not self.pending:
+            return
+        if self.approximate:
+            group_ids = np.concatenate([self.group_ids] + [ids for ids, _ in self.pending])
+            hashes = np.concatenate([self.hashes] + [hashes for _, hashes in self.pending])
+            # Groups promoted since their pairs were queued take them as registers
+            rows = self.dense[group_ids]
+            self._add_registers(hashes[rows >= 0], rows[rows >= 0])
+            self.group_ids, self.hashes = _unique_pairs(group_ids[rows < 0], hashes[rows < 0])
+        else:
+            self.pairs = np.unique(np.concatenate([self.pairs] + self.pending))
+        self.pending, self.pending_pairs = [], 0
+        if self.approximate:
+            sizes = np.bincount(self.group_ids, minlength=len(self.groups))
+            self._promote(np.flatnonzero(sizes > self.sparse_limit))
+
+    def _promote(self, group_ids):
+        """Move groups from exact pairs to HyperLogLog registers"""
+        group_ids = np.unique(group_ids[self.dense[group_ids] < 0])
+        if not len(group_ids):
+            return
+        self.dense[group_ids] = np.arange(len(self.registers), len(self.registers) + len(group_ids))
+        self.registers = np.vstack([
+            self.registers, np.zeros((len(group_ids), self.registers.shape[1]), dtype=np.uint8)])
+        moving = np.isin(self.group_ids, group_ids)
+        self._add_registers(self.hashes[moving], self.dense[self.group_ids[moving]])
+        self.group_ids, self.hashes = self.group_ids[~moving], self.hashes[~moving]
+
+    def _add_registers(self, hashes, rows):
+        buckets, ranks = _register_ranks(hashes, self.precision)
+        np.maximum.at(self.registers, (rows, buckets), ranks)
+
+    def _add_hashes(self, hashes, group_ids):
+        """Fold hashes in (approximate mode), with the group id of each when grouped"""
+        if not self.grouped:
+            self._add_registers(hashes, np.zeros(len(hashes), dtype=np.intp))
+            return self
+        rows = self.dense[group_ids]
+        self._add_registers(hashes[rows >= 0], rows[rows >= 0])
+        return self._collect(_unique_pairs(group_ids[rows < 0], hashes[rows < 0]))
+
+    def count(self):
+        """Distinct values overall"""
+        if self.grouped:
+            raise ValueError("count() is for ungrouped counters; use counts()")
+        if self.approximate:
+            return int(np.rint(_hll_estimate(self.registers, self.precision)[0]))
+        return sum(self.sizes) + len(self.values)
+
+    def counts(self):
+        """Distinct values per group, for the groups with at least one value"""
+        if not self.grouped:
+            raise ValueError("counts() is for grouped counters; use count()")
+        self._combine()
+        if not self.approximate:
+            counts = self._persisted_counts() + np.bincount(self.pairs >> VALUE_BITS,
+                                                            minlength=len(self.groups))
+            return pd.Series(counts, index=self.groups.labels, dtype='int64')
+        counts = np.bincount(self.group_ids, minlength=len(self.groups))
+        dense = self.dense >= 0
+        if dense.any():
+            estimates = np.rint(_hll_estimate(self.registers, self.precision)).astype('int64')
+            counts[dense] = estimates[self.dense[dense]]
+        return pd.Series(counts, index=self.groups.labels, dtype='int64')
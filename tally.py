@@ -0,0 +1,80 @@
+"""
+Chunk Tallies
+=============
+Sums (or minima/maxima) of label-indexed tables added one chunk at a time,
+the way every mergeable aggregate of the analyzer combines its chunk tables
+(``partials.py``, the cuboids of ``olap_cube.py`` and the per-patient
+tables of ``patient_features.py``).
+
+Merging two tables with ``pd.concat(...).groupby(...)`` on every chunk costs
+the size of everything seen so far, so a run over many chunks would be
+quadratic. A ``Tally`` keeps the chunk tables as they are and combines them
+when the result is read, or as soon as they hold more rows than both the
+combined table and ``TALLY_PENDING_ROWS``, so the combining work stays
+proportional to the rows added:
+
+    tally = Tally(by=['YEAR', 'MONTH'], how={'ROWS': 'sum', 'COST_MAX': 'max'})
+    for chunk_table in chunk_tables:
+        tally.add(chunk_table)
+    table = tally.total()
+
+Tables are grouped by their index (all of its levels) unless ``by`` names
+key columns; missing keys form groups of their own.
+"""
+
+import pandas as pd
+
+# Chunk table rows a Tally collects before combining them, at the least
+TALLY_PENDING_ROWS = 1 << 16
+
+
+class Tally:
+    """
+    Combination of tables added one chunk at a time (see the module
+    docstring): summed, or per column by the ``how`` rules of
+    ``DataFrame.agg``. Labels keep their first-seen order unless ``sort=True``.
+    """
+
+    def __init__(self, sort=False, by=None, how='sum'):
+        self.sort = sort
+        self.by = by
+        self.how = how
+        self.combined = None
+        self.pending = []
+        self.pending_rows = 0
+
+    def add(self, table):
+        if table is None or not len(table):
+            return self
+        self.pending.append(table)
+        self.pending_rows += len(table)
+        combined_rows = 0 if self.combined is None else len(self.combined)
+        if self.pending_rows > max(combined_rows, TALLY_PENDING_ROWS):
+            self._combine()
+        return self
+
+    def merge(self, other):
+        """Add everything another tally holds"""
+        for table in ([other.combined] if other.combined is not None else []) + other.pending:
+            self.add(table)
+        return self
+
+    def _combine(self):
+        tables = ([self.combined] if self.combined is not None else []) + self.pending
+        if len(tables) > 1 or (tables and self.sort and self.combined is None):
+            if self.by is None:
+                levels = list(range(tables[0].index.nlevels))
+                grouped = pd.concat(tables).groupby(level=levels, sort=self.sort, dropna=False)
+            else:
+                grouped = pd.concat(tables, ignore_index=True).groupby(
+                    self.by, sort=self.sort, dropna=False, as_index=False)
+            self.combined = grouped.sum() if self.how == 'sum' else grouped.agg(self.how)
+        elif tables:
+            self.combined = tables[0]
+        self.pending, self.pending_rows = [], 0
+
+    def total(self):
+        """The combined table, or None if nothing was added"""
+        if self.pending:
+            self._combine()
+        return self.combined
@@ -0,0 +1,61 @@
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+import generate_synthetic_data  # noqa: E402
+
+SHIPPED_TABLES = ['patients.csv', 'payers.csv', 'organizations.csv', 'data_dictionary.csv']
+
+
+@pytest.fixture(scope='session')
+def dataset_dir(tmp_path_factory):
+    """A small synthetic extract (shipped patients/payers/organizations) in its own directory"""
+    path = tmp_path_factory.mktemp('dataset')
+    for name in SHIPPED_TABLES:
+        shutil.copy(REPO_DIR / name, path / name)
+    generate_synthetic_data.generate(scale=0.1, seed=0, data_dir=path, out_dir=path)
+    return path
+
+
+@pytest.fixture
+def data_dir(dataset_dir, tmp_path):
+    """A private copy of the synthetic extract, without a cache, for tests that change it"""
+    for path in dataset_dir.glob('*.csv'):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+@pytest.fixture
+def encounters():
+    """
+    Random encounters with the awkward cases mixed in: missing START/STOP,
+    zero-length stays, admissions at the instant of a discharge and patients
+    with a single visit.
+    """
+    rng = np.random.default_rng(7)
+    n = 600
+    patients = rng.choice([f'P{i}' for i in range(40)], n)
+    start = (np.datetime64('2020-01-01T00:00', 's')
+             + rng.integers(0, 200 * 86400 // 900, n) * np.timedelta64(900, 's'))
+    stop = start + rng.choice([0, 900, 3600, 5 * 3600, 3 * 86400], n) * np.timedelta64(1, 's')
+    frame = pd.DataFrame({
+        'PATIENT': patients,
+        'START': start,
+        'STOP': stop,
+        'ENCOUNTERCLASS': rng.choice(['inpatient', 'outpatient', 'emergency'], n),
+        'PAYER': rng.choice(['A', 'B', 'C'], n),
+        'ORGANIZATION': rng.choice(['X', 'Y'], n),
+    })
+    # Readmissions exactly at a discharge
+    frame.loc[1, ['PATIENT', 'START', 'ENCOUNTERCLASS']] = [frame.at[0, 'PATIENT'],
+                                                            frame.at[0, 'STOP'], 'inpatient']
+    frame.loc[rng.choice(n, 10, replace=False), 'START'] = pd.NaT
+    frame.loc[rng.choice(n, 10, replace=False), 'STOP'] = pd.NaT
+    return frame
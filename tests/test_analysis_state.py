@@ -0,0 +1,91 @@
+import importlib
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_state import STATE_CORE, STATE_DIR, load_state
+
+analysis = importlib.import_module('01_ai_analysis_main')
+
+DELTAS = {'encounters': 'delta_encounters.csv', 'procedures': 'delta_procedures.csv'}
+
+
+def write_history(dataset_dir, path, copies):
+    """
+    The extract with every fourth encounter held back as a delta, and the rest
+    repeated ``copies`` times as new encounters of the same patients and days
+    (new ids, slightly different costs), so only the row count of the
+    history changes between copies
+    """
+    path.mkdir()
+    for source in dataset_dir.glob('*.csv'):
+        shutil.copy(source, path / source.name)
+    encounters = pd.read_csv(path / 'encounters.csv', keep_default_na=False, dtype=str)
+    procedures = pd.read_csv(path / 'procedures.csv', keep_default_na=False, dtype=str)
+    late = np.arange(len(encounters)) % 4 == 3
+    late_procedures = procedures['ENCOUNTER'].isin(encounters['Id'][late])
+    encounters[late].to_csv(path / 'delta_encounters.csv', index=False)
+    procedures[late_procedures].to_csv(path / 'delta_procedures.csv', index=False)
+
+    history, history_procedures = [], []
+    for copy in range(copies):
+        suffix = f'-{copy}' if copy else ''
+        shift = lambda column: (pd.to_numeric(column) + copy / 1000).astype(str)
+        history.append(encounters[~late].assign(
+            Id=encounters['Id'][~late] + suffix,
+            TOTAL_CLAIM_COST=shift(encounters['TOTAL_CLAIM_COST'][~late])))
+        history_procedures.append(procedures[~late_procedures].assign(
+            ENCOUNTER=procedures['ENCOUNTER'][~late_procedures] + suffix,
+            BASE_COST=shift(procedures['BASE_COST'][~late_procedures])))
+    pd.concat(history).to_csv(path / 'encounters.csv', index=False)
+    pd.concat(history_procedures).to_csv(path / 'procedures.csv', index=False)
+    return path
+
+
+def segment_bytes(path):
+    return {file.name: file.stat().st_size for file in (path / STATE_DIR).glob('*.npy')}
+
+
+def delta_run(path, monkeypatch):
+    """Sizes of a state: core and segments after the base run, and segments the delta wrote"""
+    monkeypatch.chdir(path)
+    analysis.AIHospitalAnalyzer().run(workers=1)
+    base = segment_bytes(path)
+    analysis.AIHospitalAnalyzer(deltas=DELTAS).run(workers=1)
+    after = segment_bytes(path)
+    return {
+        'history': sum(base.values()),
+        'core': (path / STATE_DIR / STATE_CORE).stat().st_size,
+        'written': sum(size for name, size in after.items() if name not in base),
+    }
+
+
+def test_state_grows_with_the_delta_not_the_history(dataset_dir, tmp_path, monkeypatch):
+    small = delta_run(write_history(dataset_dir, tmp_path / 'small', 1), monkeypatch)
+    large = delta_run(write_history(dataset_dir, tmp_path / 'large', 3), monkeypatch)
+    # Three times the history rows: three times the segments...
+    assert large['history'] > 2.5 * small['history']
+    # ...but the core (all a load reads) stays the same size, as does what the delta writes
+    assert large['core'] < 1.05 * small['core']
+    assert large['written'] < 1.05 * small['written']
+    assert large['written'] < large['history'] / 5
+
+
+def test_loading_maps_no_segments(dataset_dir, tmp_path, monkeypatch):
+    path = write_history(dataset_dir, tmp_path / 'data', 1)
+    monkeypatch.chdir(path)
+    analysis.AIHospitalAnalyzer().run(workers=1)
+
+    def unexpected_read(*args, **kwargs):
+        raise AssertionError("segments are read when queried, not when the state is loaded")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(np, 'load', unexpected_read)
+        state = load_state()
+    histogram = state['encounters'].histograms['TOTAL_CLAIM_COST']
+    encounters = pd.read_csv('encounters.csv')
+    assert len(histogram) == encounters['TOTAL_CLAIM_COST'].count()
+    assert histogram.median() == pytest.approx(encounters['TOTAL_CLAIM_COST'].median())
+    assert state['encounters'].distinct_count('Id') == encounters['Id'].nunique()
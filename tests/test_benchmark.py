@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import benchmark
+
+
+def record(stage, wall_s, peak_rss_mb, scale=1):
+    return {'scale': scale, 'script': '01_ai_analysis_main', 'stage': stage,
+            'wall_s': wall_s, 'cpu_s': wall_s, 'peak_rss_mb': peak_rss_mb}
+
+
+def test_compare_flags_only_regressions_past_tolerance_and_floor():
+    baseline = {'results': [record('load', 2.0, 100.0), record('prepare_data', 0.01, 100.0),
+                            record('analyze_financial', 1.0, 100.0)]}
+    records = [
+        record('load', 2.6, 160.0),               # +30% time and +60 MB: both regress
+        record('prepare_data', 0.1, 110.0),       # 10x slower but under the 0.25 s floor
+        record('analyze_financial', 1.2, 100.0),  # +20%, inside the tolerance
+        record('identify_risk_factors', 9.0, 900.0),  # not in the baseline
+        record('load', 9.0, 900.0, scale=10),     # other scale, not in the baseline
+    ]
+    regressions = benchmark.compare(records, baseline)
+    assert regressions == [
+        "1x 01_ai_analysis_main.load wall_s: 2.000s -> 2.600s (+30%)",
+        "1x 01_ai_analysis_main.load peak_rss_mb: 100.000 MB -> 160.000 MB (+60%)",
+    ]
+    assert benchmark.compare(records, baseline, tolerance=0.5) == [regressions[1]]
+    assert benchmark.compare(baseline['results'], baseline) == []
+
+
+class Pipeline:
+    calls = []
+
+    def __init__(self):
+        self.calls.append('__init__')
+
+    def create_first(self):
+        self.calls.append('create_first')
+
+    def helper(self):
+        pass
+
+    def create_second(self):
+        print("drawn")
+        self.calls.append('create_second')
+
+    def create_all_dashboards(self):
+        raise AssertionError("not a stage")
+
+
+def test_dashboard_stages_run_in_definition_order(capsys):
+    assert benchmark.dashboard_stages(Pipeline) == ['create_first', 'create_second']
+    Pipeline.calls = []
+    results = benchmark.run_pipeline(type('module', (), {'Pipeline': Pipeline}), 'Pipeline', None)
+    assert [stage for stage, *_ in results] == ['load', 'create_first', 'create_second']
+    assert Pipeline.calls == ['__init__', 'create_first', 'create_second']
+    assert all(wall >= 0 and cpu >= 0 and rss > 0 for _, wall, cpu, rss in results)
+    # Stage output is kept out of the report
+    assert capsys.readouterr().out == ''
+
+
+def test_generated_data_is_reused_per_scale_and_seed(tmp_path, monkeypatch):
+    generated = []
+    monkeypatch.setattr(benchmark, 'generate',
+                        lambda scale, seed, data_dir, out_dir: generated.append((scale, seed)))
+    data_dir = benchmark.prepare_scale(0.5, 0, tmp_path)
+    (data_dir / '.data_cache').mkdir()
+    assert benchmark.prepare_scale(0.5, 0, tmp_path) == data_dir
+    assert (data_dir / '.data_cache').exists()
+    benchmark.prepare_scale(0.5, 0, tmp_path, cold=True)
+    assert not (data_dir / '.data_cache').exists()
+    benchmark.prepare_scale(0.5, 1, tmp_path)
+    assert generated == [(0.5, 0), (0.5, 1)]
+
+
+def test_baseline_run_exits_on_regression(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    argv = ['--scales', '0.02', '--scripts', '01', '--work-dir', str(tmp_path / 'work')]
+    benchmark.main(argv + ['--save-baseline', 'baseline.json'])
+    results = json.loads((tmp_path / 'baseline.json').read_text())['results']
+    assert [r['stage'] for r in results] == ['load'] + benchmark.PIPELINES[0][2]
+
+    benchmark.main(argv + ['--baseline', 'baseline.json', '--tolerance', '10'])
+    # A baseline ten times faster and smaller than anything measured
+    for r in results:
+        r['wall_s'], r['peak_rss_mb'] = r['wall_s'] / 10 - 1, r['peak_rss_mb'] / 10 - 100
+    (tmp_path / 'fast.json').write_text(json.dumps({'results': results}))
+    with pytest.raises(SystemExit) as error:
+        benchmark.main(argv + ['--baseline', 'fast.json'])
+    assert error.value.code == 1
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from census import census_table, occupancy_steps, peak_windows
+
+
+def naive_census(encounters, by=None, step=3600):
+    """Add one to every hour bin each encounter occupies, row by row"""
+    valid = encounters['START'].notna() & encounters['STOP'].notna()
+    encounters = encounters[valid]
+    start = encounters['START'].to_numpy().astype('datetime64[s]').astype(np.int64)
+    stop = encounters['STOP'].to_numpy().astype('datetime64[s]').astype(np.int64)
+    first, last = start // step, np.maximum(stop - 1, start) // step
+    groups = encounters[by].to_numpy() if by else np.zeros(len(encounters))
+
+    origin, end = first.min(), last.max() + 1
+    counts = {}
+    for group, lo, hi in zip(groups, first, last):
+        grid = counts.setdefault(group, np.zeros(end - origin + 1, dtype=np.int64))
+        for b in range(lo, hi + 1):
+            grid[b - origin] += 1
+    index = pd.DatetimeIndex(((origin + np.arange(end - origin + 1)) * step).astype('datetime64[s]'))
+    table = pd.DataFrame(counts, index=index)
+    return table[0] if by is None else table[sorted(counts)]
+
+
+def test_census_matches_naive_loop(encounters):
+    census = census_table(occupancy_steps(encounters))
+    expected = naive_census(encounters)
+    np.testing.assert_array_equal(census.index, expected.index)
+    np.testing.assert_array_equal(census.to_numpy(), expected.to_numpy())
+
+
+def test_census_by_class_matches_naive_loop(encounters):
+    census = census_table(occupancy_steps(encounters, by='ENCOUNTERCLASS'), by='ENCOUNTERCLASS')
+    expected = naive_census(encounters, by='ENCOUNTERCLASS')
+    np.testing.assert_array_equal(census.index, expected.index)
+    np.testing.assert_array_equal(census[expected.columns].to_numpy(), expected.to_numpy())
+
+
+def test_daily_census_matches_naive_loop(encounters):
+    census = census_table(occupancy_steps(encounters, resolution='day'), resolution='day')
+    expected = naive_census(encounters, step=86400)
+    np.testing.assert_array_equal(census.to_numpy(), expected.to_numpy())
+
+
+def test_peak_matches_naive_maximum(encounters):
+    peaks = peak_windows(occupancy_steps(encounters), top=1)
+    assert peaks['OCCUPANCY'].iloc[0] == naive_census(encounters).max()
@@ -0,0 +1,91 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+from column_store import iter_column_store, open_column_store, read_meta, write_column_store
+
+
+def assert_same_frame(left, right, check_dtype=True):
+    """
+    assert_frame_equal for frames over mapped files: copies turn numpy.memmap
+    columns into plain arrays, and categoricals (whose codes may stay memmaps)
+    are compared by value; their dtypes, and so categories, still must match.
+    """
+    pd.testing.assert_frame_equal(left.copy(), right.copy(), check_dtype=check_dtype,
+                                  check_categorical=False)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(11)
+    n = 1000
+    ids = pd.Series([f'id-{i}-ü' * (i % 4) for i in range(n)],
+                    dtype=pd.StringDtype('pyarrow', na_value=np.nan))
+    ids[::7] = np.nan
+    return pd.DataFrame({
+        'Id': ids,
+        'START': pd.Series(np.datetime64('2020-01-01', 's')
+                           + rng.integers(0, 10**8, n) * np.timedelta64(1, 's')),
+        'ENCOUNTERCLASS': pd.Categorical(rng.choice(['inpatient', 'outpatient', None], n)),
+        'TOTAL_CLAIM_COST': rng.random(n),
+        'VISITS': rng.integers(0, 9, n).astype('int32'),
+    })
+
+
+def test_round_trip(frame, tmp_path):
+    write_column_store(frame, tmp_path / 'store')
+    loaded = open_column_store(tmp_path / 'store')
+    assert_same_frame(loaded, frame)
+    assert read_meta(tmp_path / 'store')['rows'] == len(frame)
+    assert [entry['kind'] for entry in read_meta(tmp_path / 'store')['columns']] == [
+        'text', 'datetime', 'category', 'numeric', 'numeric']
+
+
+@pytest.mark.parametrize('start,stop', [(0, 1), (5, 14), (993, None), (400, 400)])
+def test_slices(frame, tmp_path, start, stop):
+    write_column_store(frame, tmp_path / 'store')
+    loaded = open_column_store(tmp_path / 'store', columns=['Id', 'VISITS'], start=start, stop=stop)
+    assert_same_frame(loaded, frame[['Id', 'VISITS']].iloc[start:stop].reset_index(drop=True))
+
+
+def test_chunks_cover_the_store(frame, tmp_path):
+    write_column_store(frame, tmp_path / 'store')
+    chunks = list(iter_column_store(tmp_path / 'store', 300))
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    assert_same_frame(pd.concat(chunks, ignore_index=True), frame)
+
+
+def mapped_file(address):
+    """The file mapped at ``address`` in this process, from /proc/self/maps"""
+    with open('/proc/self/maps') as f:
+        for line in f:
+            fields = line.split(maxsplit=5)
+            lo, hi = (int(bound, 16) for bound in fields[0].split('-'))
+            if lo <= address < hi:
+                return fields[5].strip() if len(fields) > 5 else None
+    return None
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="reads /proc/self/maps")
+def test_columns_are_mapped_not_read(frame, tmp_path):
+    store = tmp_path / 'store'
+    write_column_store(frame, store)
+    loaded = open_column_store(store)
+    assert mapped_file(loaded['TOTAL_CLAIM_COST'].to_numpy().ctypes.data) == str(store / '003.npy')
+    # The text column's characters and offsets are the mapped files themselves
+    _, offsets, data = loaded['Id'].array._pa_array.chunk(0).buffers()
+    assert mapped_file(data.address) == str(store / '000.npy')
+    assert mapped_file(offsets.address) == str(store / '000.offsets.npy')
+
+
+def test_cache_falls_back_without_pyarrow(data_dir, monkeypatch, capsys):
+    expected = data_store.load_table('encounters', data_dir=data_dir, cache_dir=data_dir / 'a')
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    uncached = data_store.load_table('encounters', data_dir=data_dir, cache_dir=data_dir / 'b')
+    assert 'Cache disabled for encounters' in capsys.readouterr().out
+    # Uncached text columns keep the CSV reader's dtype (object before pandas 3)
+    assert_same_frame(uncached.reset_index(drop=True), expected.reset_index(drop=True),
+                      check_dtype=False)
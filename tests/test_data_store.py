@@ -0,0 +1,108 @@
+import argparse
+import os
+
+import pandas as pd
+import pytest
+
+import data_store
+from schema import read_table_csv
+
+
+def test_cache_is_built_then_reused(data_dir, monkeypatch):
+    first = data_store.load_table('procedures', data_dir=data_dir)
+    assert (data_dir / data_store.CACHE_DIR / 'procedures.parquet').exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the CSV was parsed again")
+
+    monkeypatch.setattr(data_store, 'read_table_csv', fail)
+    pd.testing.assert_frame_equal(data_store.load_table('procedures', data_dir=data_dir), first)
+
+
+def test_touched_but_identical_source_keeps_the_cache(data_dir, monkeypatch):
+    data_store.load_table('payers', data_dir=data_dir)
+    source = data_dir / 'payers.csv'
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    monkeypatch.setattr(data_store, 'read_table_csv', None)
+    assert len(data_store.load_table('payers', data_dir=data_dir)) == len(pd.read_csv(source))
+    # The new timestamp is recorded, so the next load skips the hash
+    manifest = data_store._read_manifest(data_dir / data_store.CACHE_DIR / 'payers.json')
+    assert manifest['mtime_ns'] == source.stat().st_mtime_ns
+
+
+def test_edited_source_invalidates_the_cache(data_dir):
+    before = data_store.load_table('payers', data_dir=data_dir)
+    source = data_dir / 'payers.csv'
+    lines = source.read_text(encoding='utf-8-sig').splitlines()
+    source.write_text('\n'.join(lines[:-1]) + '\n', encoding='utf-8')
+    after = data_store.load_table('payers', data_dir=data_dir)
+    assert len(after) == len(before) - 1
+    # Downcasts follow the data, so the dropped row may change a column's width
+    pd.testing.assert_frame_equal(after, before.iloc[:-1], check_dtype=False,
+                                  check_categorical=False)
+
+
+def test_refresh_rebuilds_and_columns_select(data_dir):
+    data_store.load_table('procedures', data_dir=data_dir)
+    manifest_file = data_dir / data_store.CACHE_DIR / 'procedures.json'
+    manifest_file.write_text('{"version": 0}')
+    subset = data_store.load_table('procedures', data_dir=data_dir, refresh=True,
+                                   columns=['PATIENT', 'BASE_COST'])
+    assert list(subset.columns) == ['PATIENT', 'BASE_COST']
+    assert data_store._read_manifest(manifest_file)['version'] == data_store.CACHE_VERSION
+
+
+def test_month_window_bounds():
+    assert data_store.month_window() is None
+    assert data_store.month_window('2019', '2020') == (2019 * 12, 2020 * 12 + 11)
+    assert data_store.month_window(start='2019-03') == (2019 * 12 + 2, None)
+    assert data_store.month_window(end='2019-03') == (None, 2019 * 12 + 2)
+    assert data_store.describe_window((2019 * 12 + 2, None)) == 'from 2019-03'
+    parser = argparse.ArgumentParser()
+    data_store.add_window_arguments(parser)
+    args = parser.parse_args(['--from', '2019-03', '--to', '2019'])
+    assert data_store.month_window(args.start, args.end) == (2019 * 12 + 2, 2019 * 12 + 11)
+    for start, end in [('2019-13', None), ('2019-01-01', None), ('soon', None), ('2020', '2019')]:
+        with pytest.raises(ValueError):
+            data_store.month_window(start, end)
+
+
+def in_months(df, window):
+    """Rows of a full table whose START month lies inside the window"""
+    month = df['START'].dt.year * 12 + df['START'].dt.month - 1
+    first, last = window
+    mask = df['START'].notna()
+    if first is not None:
+        mask &= month >= first
+    if last is not None:
+        mask &= month <= last
+    return df[mask].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('name', ['encounters', 'procedures'])
+@pytest.mark.parametrize('bounds', [('2018-06', '2019-02'), ('2020', None), (None, '2016-12')])
+def test_windows_read_the_months_inside(data_dir, name, bounds):
+    window = data_store.month_window(*bounds)
+    full = data_store.load_table(name, data_dir=data_dir)
+    expected = in_months(full, window)
+    assert 0 < len(expected) < len(full)
+    windowed = data_store.load_table(name, data_dir=data_dir, window=window)
+    pd.testing.assert_frame_equal(windowed.copy(), expected, check_categorical=False)
+    # The same rows in chunks, from the cache and from the CSV before it exists
+    chunks = data_store.iter_table(name, 1000, data_dir=data_dir, window=window)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True).copy(), expected,
+                                  check_categorical=False)
+    # The CSV is in file order rather than month order
+    uncached = data_store.iter_table(name, 1000, data_dir=data_dir, cache_dir=data_dir / 'none',
+                                     window=window)
+    in_file_order = in_months(read_table_csv(name, data_dir / f'{name}.csv'), window)
+    pd.testing.assert_frame_equal(pd.concat(uncached, ignore_index=True), in_file_order,
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_empty_window_fails_clearly(data_dir):
+    window = data_store.month_window('1900', '1900')
+    rows = len(data_store.load_table('encounters', data_dir=data_dir, window=window))
+    with pytest.raises(ValueError, match='No encounters in the window 1900-01 to 1900-12'):
+        data_store.require_rows('encounters', rows, window)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dimensions import Dimension
+
+
+@pytest.fixture
+def payers():
+    return pd.DataFrame({
+        'Id': ['p1', 'p2', 'p3'],
+        'NAME': pd.Categorical(['Medicare', 'Medicaid', 'Aetna']),
+        'CITY': ['Baltimore', 'Baltimore', 'Hartford'],
+        'ZIP': [21244.0, 21244.0, 6156.0],
+    }, index=[10, 20, 30])
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_lookup_matches_a_left_merge(payers, categorical):
+    ids = pd.Series(['p3', 'p1', 'unknown', None, 'p3', 'p2'])
+    if categorical:
+        ids = ids.astype('category').cat.add_categories(['unused'])
+    dimension = Dimension(payers)
+    np.testing.assert_array_equal(dimension.keys(ids), [2, 0, -1, -1, 2, 1])
+
+    merged = pd.DataFrame({'Id': ids.astype(object)}).merge(payers, on='Id', how='left')
+    for col in ['NAME', 'CITY', 'ZIP']:
+        looked_up = pd.Series(dimension.lookup(ids, col))
+        pd.testing.assert_series_equal(looked_up, merged[col], check_names=False,
+                                       check_dtype=False)
+    assert isinstance(dimension.lookup(ids, 'NAME').dtype, pd.CategoricalDtype)
+    assert list(dimension.lookup(ids, 'NAME', default='Unknown')) == [
+        'Aetna', 'Medicare', 'Unknown', 'Unknown', 'Aetna', 'Medicaid']
+
+
+def test_enrich_keeps_the_aggregate_order(payers):
+    coverage = pd.Series([5.0, 7.0, 1.0], index=['p2', 'gone', 'p1'], name='coverage')
+    enriched = Dimension(payers).enrich(coverage, ['NAME', 'CITY'], default='Unknown')
+    assert list(enriched.index) == ['p2', 'gone', 'p1']
+    assert list(enriched['coverage']) == [5.0, 7.0, 1.0]
+    assert list(enriched['NAME']) == ['Medicaid', 'Unknown', 'Medicare']
+    assert list(enriched['CITY']) == ['Baltimore', 'Unknown', 'Baltimore']
+
+
+def test_empty_table_and_duplicate_keys(payers):
+    empty = Dimension(payers.iloc[:0])
+    assert len(empty) == 0
+    assert pd.isna(empty.lookup(['p1'], 'CITY')).all()
+    assert len(Dimension(payers)) == 3
+    with pytest.raises(ValueError, match='duplicate'):
+        Dimension(pd.concat([payers, payers]))
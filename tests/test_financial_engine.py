@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from financial_engine import coverage_buckets, financial_pass
+
+COLUMNS = ['TOTAL_CLAIM_COST', 'PAYER_COVERAGE', 'COVERAGE_RATE', 'DURATION_HOURS']
+
+
+@pytest.fixture(params=[True, False], ids=['categorical', 'text'])
+def chunk(request):
+    rng = np.random.default_rng(3)
+    n = 2000
+    cost = rng.gamma(2.0, 500.0, n).round(2)
+    coverage = (cost * rng.choice([0, 0.5, 1, 1.2], n)).round(2)
+    cost[rng.choice(n, 50, replace=False)] = np.nan
+    coverage[rng.choice(n, 50, replace=False)] = np.nan
+    frame = pd.DataFrame({
+        'ENCOUNTERCLASS': rng.choice(['ambulatory', 'inpatient', 'wellness', None], n),
+        'PAYER': rng.choice(['A', 'B', 'C', None], n),
+        'ORGANIZATION': rng.choice(['X', 'Y', 'Z'], n),
+        'TOTAL_CLAIM_COST': cost,
+        'PAYER_COVERAGE': coverage,
+        'DURATION_HOURS': rng.exponential(3.0, n).astype('float32'),
+    })
+    frame['COVERAGE_RATE'] = (frame['PAYER_COVERAGE'] / frame['TOTAL_CLAIM_COST'] * 100).fillna(0)
+    frame.loc[:9, 'COVERAGE_RATE'] = -5.0
+    if request.param:
+        for col in ['ENCOUNTERCLASS', 'PAYER', 'ORGANIZATION']:
+            frame[col] = frame[col].astype('category').cat.add_categories(['unused'])
+    return frame
+
+
+def plain(table):
+    """A grouped table sorted by its labels, with a plain object index"""
+    table = table.sort_index()
+    table.index = pd.Index(np.asarray(table.index, dtype=object))
+    return table
+
+
+def test_matches_pandas(chunk):
+    result = financial_pass(chunk, COLUMNS)
+    pd.testing.assert_series_equal(result['sums'], chunk[COLUMNS].astype('float64').sum())
+    pd.testing.assert_series_equal(result['non_null'], chunk[COLUMNS].count())
+
+    rate = chunk['COVERAGE_RATE']
+    assert result['coverage_none'] == (rate == 0).sum()
+    assert result['coverage_partial'] == ((rate > 0) & (rate < 100)).sum()
+    assert result['coverage_full'] == (rate == 100).sum()
+
+    by_class = chunk.groupby('ENCOUNTERCLASS', observed=True).agg(
+        rows=('TOTAL_CLAIM_COST', 'size'), cost_sum=('TOTAL_CLAIM_COST', 'sum'),
+        cost_count=('TOTAL_CLAIM_COST', 'count'))
+    pd.testing.assert_frame_equal(plain(result['by_class']), plain(by_class))
+
+    payer_coverage = chunk.groupby('PAYER', observed=True)['PAYER_COVERAGE'].sum()
+    pd.testing.assert_series_equal(plain(result['payer_coverage']), plain(payer_coverage),
+                                   check_names=False)
+
+    by_organization = chunk.groupby('ORGANIZATION', observed=True).agg(
+        rows=('TOTAL_CLAIM_COST', 'size'), cost_sum=('TOTAL_CLAIM_COST', 'sum'))
+    pd.testing.assert_frame_equal(plain(result['by_organization']), plain(by_organization))
+
+
+def test_coverage_buckets_edges():
+    rates = [0.0, 1e-9, 50.0, 99.999, 100.0, 100.5, -1.0, np.nan, np.inf, -np.inf]
+    assert coverage_buckets(rates) == (1, 3, 1)
+
+
+def test_empty_chunk(chunk):
+    result = financial_pass(chunk.iloc[:0], COLUMNS)
+    assert result['sums'].eq(0).all() and result['non_null'].eq(0).all()
+    assert (result['coverage_none'], result['coverage_partial'], result['coverage_full']) == (0, 0, 0)
+    assert result['by_class'].empty and result['payer_coverage'].empty
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+import generate_synthetic_data as generator
+from data_store import load_table
+from schema import load_dictionary
+
+
+def test_same_seed_same_files(dataset_dir, tmp_path):
+    rows = generator.generate(scale=0.1, seed=0, data_dir=dataset_dir, out_dir=tmp_path)
+    for table, count in zip(['encounters', 'procedures'], rows):
+        assert (tmp_path / f'{table}.csv').read_bytes() == (dataset_dir / f'{table}.csv').read_bytes()
+        assert len(pd.read_csv(tmp_path / f'{table}.csv')) == count
+    assert rows[0] == round(generator.BASE_ENCOUNTERS * 0.1)
+
+
+def test_other_seed_other_files(dataset_dir, tmp_path):
+    generator.generate(scale=0.1, seed=1, data_dir=dataset_dir, out_dir=tmp_path)
+    assert (tmp_path / 'encounters.csv').read_bytes() != (dataset_dir / 'encounters.csv').read_bytes()
+
+
+def test_blocks_append_to_one_file(dataset_dir, tmp_path):
+    rows = generator.generate(scale=0.05, seed=3, data_dir=dataset_dir, out_dir=tmp_path,
+                              block_rows=500)
+    encounters = pd.read_csv(tmp_path / 'encounters.csv')
+    assert len(encounters) == rows[0] == round(generator.BASE_ENCOUNTERS * 0.05)
+    assert encounters['Id'].is_unique
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_rows_are_plausible(data_dir):
+    encounters = load_table('encounters', data_dir=data_dir)
+    procedures = load_table('procedures', data_dir=data_dir)
+    dictionary = load_dictionary(data_dir / 'data_dictionary.csv')
+    for table, frame in [('encounters', encounters), ('procedures', procedures)]:
+        assert list(frame.columns) == dictionary[table]
+
+    patients = set(load_table('patients', data_dir=data_dir)['Id'])
+    assert set(encounters['PATIENT']) <= patients
+    assert set(procedures['ENCOUNTER']) <= set(encounters['Id'])
+    assert (encounters['STOP'] >= encounters['START']).all()
+    assert encounters['START'].min() >= pd.Timestamp(generator.FIRST_DAY)
+    assert encounters['START'].max() < pd.Timestamp(generator.LAST_DAY) + pd.Timedelta(days=3)
+    assert (encounters['PAYER_COVERAGE'] <= encounters['TOTAL_CLAIM_COST']).all()
+    assert set(encounters['ENCOUNTERCLASS']) == set(generator.ENCOUNTER_CLASSES)
+    # Uninsured claims are never covered
+    payers = load_table('payers', data_dir=data_dir).set_index('Id')['NAME']
+    uninsured = encounters['PAYER'].map(payers).astype(str) == 'NO_INSURANCE'
+    assert uninsured.any()
+    assert (encounters.loc[uninsured, 'PAYER_COVERAGE'] == 0).all()
+
+
+@pytest.mark.parametrize('argv', [['--scale', '0'], ['--scale', '-2']])
+def test_scale_must_be_positive(argv):
+    with pytest.raises(SystemExit):
+        generator.parse_args(argv)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_store import load_table
+from olap_cube import EncounterCube, cube_key, load_encounter_cube, save_encounter_cube
+
+
+@pytest.fixture(scope='module')
+def encounters(dataset_dir):
+    return load_table('encounters', data_dir=dataset_dir)
+
+
+@pytest.fixture(scope='module')
+def cube(encounters):
+    cube = EncounterCube()
+    for start in range(0, len(encounters), 300):
+        cube.update(encounters[start:start + 300])
+    return cube
+
+
+def test_counts_match_value_counts(encounters, cube):
+    counts = cube.counts('ENCOUNTERCLASS')
+    assert counts.to_dict() == encounters['ENCOUNTERCLASS'].value_counts().to_dict()
+    assert counts.index.is_monotonic_increasing
+
+
+def test_rollup_matches_groupby(encounters, cube):
+    rollup = cube.rollup(['YEAR', 'ENCOUNTERCLASS'], 'TOTAL_CLAIM_COST')
+    expected = (encounters.groupby([encounters['START'].dt.year.rename('YEAR'), 'ENCOUNTERCLASS'])
+                ['TOTAL_CLAIM_COST'].agg(['size', 'sum', 'count', 'mean', 'std', 'min', 'max']))
+    np.testing.assert_array_equal(rollup.index.to_frame().to_numpy(),
+                                  expected.index.to_frame().to_numpy())
+    for column, statistic in [('ROWS', 'size'), ('SUM', 'sum'), ('COUNT', 'count'),
+                              ('MEAN', 'mean'), ('STD', 'std'), ('MIN', 'min'), ('MAX', 'max')]:
+        np.testing.assert_allclose(rollup[column], expected[statistic], rtol=1e-9)
+
+
+def test_rollup_where(encounters, cube):
+    inpatient = encounters[encounters['ENCOUNTERCLASS'] == 'inpatient']
+    total = cube.total('PAYER', 'TOTAL_CLAIM_COST', where={'ENCOUNTERCLASS': 'inpatient'})
+    expected = inpatient.groupby('PAYER')['TOTAL_CLAIM_COST'].sum()
+    np.testing.assert_allclose(total.to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+
+def test_chunked_cube_matches_one_pass(encounters, cube):
+    whole = EncounterCube().update(encounters)
+    for by in [['MONTH'], ['ORGANIZATION'], ['DAY_OF_WEEK'], ['YEAR', 'HOUR']]:
+        pd.testing.assert_frame_equal(cube.rollup(by, 'DURATION_HOURS'),
+                                      whole.rollup(by, 'DURATION_HOURS'))
+
+
+def test_chunk_cuboids_are_combined_once(encounters):
+    cube = EncounterCube()
+    chunks = range(0, len(encounters), 300)
+    for start in chunks:
+        cube.update(encounters[start:start + 300])
+    # Merging a chunk leaves the running cuboids alone until they are read
+    assert all(tally.combined is None and len(tally.pending) == len(chunks)
+               for tally in cube.tallies.values())
+    pd.testing.assert_series_equal(cube.counts('HOUR'),
+                                   EncounterCube().update(encounters).counts('HOUR'))
+    assert all(len(tally.pending) == 0 for dims, tally in cube.tallies.items() if 'HOUR' in dims)
+
+
+def test_saved_cubes_are_kept_per_key(dataset_dir, cube, tmp_path):
+    keys = [cube_key(data_dir=dataset_dir), cube_key(window=(2020, 2021), data_dir=dataset_dir)]
+    for key in keys:
+        save_encounter_cube(cube, key, data_dir=dataset_dir, cache_dir=tmp_path)
+    for key in keys:
+        loaded = load_encounter_cube(key, data_dir=dataset_dir, cache_dir=tmp_path)
+        pd.testing.assert_frame_equal(loaded.rollup('YEAR', 'TOTAL_CLAIM_COST'),
+                                      cube.rollup('YEAR', 'TOTAL_CLAIM_COST'))
+    assert load_encounter_cube(dict(keys[0], deltas=['new.csv']), data_dir=dataset_dir,
+                               cache_dir=tmp_path) is None
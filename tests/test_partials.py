@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import sketches
+from partials import ProcedurePartials, ValueHistogram
+from patient_features import PatientAccumulator
+from sketches import DistinctCounter
+
+
+def test_value_histogram_matches_series():
+    values = pd.Series(np.random.default_rng(9).integers(0, 500, 10_000) / 4)
+    histogram = ValueHistogram()
+    for start in range(0, len(values), 777):
+        histogram.merge(ValueHistogram.from_values(values[start:start + 777]))
+    assert len(histogram) == len(values)
+    for q in [0, 0.1, 0.25, 0.5, 0.9, 0.999, 1]:
+        assert histogram.quantile(q) == pytest.approx(values.quantile(q))
+    threshold = values.quantile(0.9)
+    assert histogram.count_above(threshold) == (values > threshold).sum()
+    assert histogram.sum_above(threshold) == pytest.approx(values[values > threshold].sum())
+
+
+def test_procedure_partials_merge_like_one_pass():
+    rng = np.random.default_rng(10)
+    procedures = pd.DataFrame({'DESCRIPTION': rng.choice(['x', 'y', 'z'], 5000),
+                               'BASE_COST': rng.integers(10, 1000, 5000).astype(float)})
+    procedures.loc[::97, 'BASE_COST'] = np.nan
+    merged = ProcedurePartials()
+    for start in range(0, len(procedures), 600):
+        merged.merge(ProcedurePartials().update(procedures[start:start + 600]))
+
+    assert merged.mean_cost() == pytest.approx(procedures['BASE_COST'].mean())
+    pd.testing.assert_series_equal(merged.value_counts(), procedures['DESCRIPTION'].value_counts(),
+                                   check_names=False, check_index_type=False)
+    pd.testing.assert_series_equal(merged.mean_cost_by_description(),
+                                   procedures.groupby('DESCRIPTION')['BASE_COST'].mean(),
+                                   check_names=False, check_index_type=False)
+    assert merged.cost_histogram.median() == pytest.approx(procedures['BASE_COST'].median())
+
+
+def test_patient_accumulator_chunks_match_one_pass(encounters):
+    encounters = encounters.assign(
+        Id=[f'E{i}' for i in range(len(encounters))],
+        TOTAL_CLAIM_COST=np.arange(len(encounters)) * 1.5,
+        BASE_ENCOUNTER_COST=100.0,
+        REASONDESCRIPTION=np.random.default_rng(14).choice(['r1', 'r2', 'r3', None], len(encounters)))
+    patients = pd.DataFrame({'Id': [f'P{i}' for i in range(40)], 'BIRTHDATE': '1980-01-01',
+                             'DEATHDATE': None})
+    chunked = PatientAccumulator()
+    for start in range(0, len(encounters), 50):
+        chunk = encounters[start:start + 50]
+        chunked.merge(PatientAccumulator().update(chunk.astype({'PATIENT': 'category'})))
+    expected = PatientAccumulator().update(encounters).table(patients)
+    pd.testing.assert_frame_equal(chunked.table(patients), expected, check_exact=False,
+                                  check_index_type=False)
+
+
+@pytest.mark.parametrize('approximate', [False, True])
+def test_distinct_pairs_are_combined_in_batches(monkeypatch, approximate):
+    monkeypatch.setattr(sketches, 'PENDING_PAIRS', 500)
+    rng = np.random.default_rng(15)
+    visits = pd.DataFrame({'GROUP': rng.integers(0, 300, 20_000).astype(str),
+                           'VALUE': rng.integers(0, 40, 20_000).astype(str)})
+    counter = DistinctCounter(grouped=True, approximate=approximate)
+    for start in range(0, len(visits), 100):
+        part = visits[start:start + 100]
+        counter.update(part['VALUE'], part['GROUP'])
+        assert counter.pending_pairs <= max(len(counter.pairs) + len(counter.hashes), 500)
+    # Below the sparse limit approximate counts are exact too
+    expected = visits.groupby('GROUP')['VALUE'].nunique()
+    pd.testing.assert_series_equal(counter.counts().sort_index(), expected, check_names=False,
+                                   check_index_type=False)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import patient_features as pf
+from data_store import CACHE_DIR, CACHE_SLOTS, load_table, month_window
+
+
+@pytest.fixture
+def tables(data_dir):
+    return load_table('encounters', data_dir=data_dir), load_table('patients', data_dir=data_dir)
+
+
+def test_table_matches_a_patient_groupby(tables):
+    encounters, patients = tables
+    features = pf.build_patient_features(encounters, patients)
+    by_patient = encounters.assign(PATIENT=encounters['PATIENT'].astype(object)).groupby('PATIENT')
+    assert list(features.index) == sorted(by_patient.groups)
+    np.testing.assert_array_equal(features['ENCOUNTER_COUNT'], by_patient.size())
+    np.testing.assert_allclose(features['TOTAL_CLAIM_COST'], by_patient['TOTAL_CLAIM_COST'].sum())
+    np.testing.assert_allclose(features['MEAN_CLAIM_COST'], by_patient['TOTAL_CLAIM_COST'].mean())
+    np.testing.assert_array_equal(features['DISTINCT_REASONS'],
+                                  by_patient['REASONDESCRIPTION'].nunique())
+    np.testing.assert_array_equal(features['FIRST_VISIT'], by_patient['START'].min())
+    np.testing.assert_array_equal(features['LAST_VISIT'], by_patient['START'].max())
+    np.testing.assert_array_equal(features['PAYER_COUNT'], by_patient['PAYER'].nunique())
+    # Most frequent payer, ties to the lowest id
+    primary = by_patient['PAYER'].agg(lambda payers: min(
+        payers.astype(object).value_counts().pipe(lambda counts: counts[counts == counts.max()].index)))
+    np.testing.assert_array_equal(features['PRIMARY_PAYER'], primary)
+    births = patients.set_index('Id')['BIRTHDATE'].reindex(features.index)
+    assert (features['AGE'].round(6) == ((pd.Timestamp.now() - births).dt.days / 365.25).round(6)).all()
+
+
+def same_table(loaded, built):
+    """A table read back from Parquet may come back with other index and timestamp dtypes"""
+    pd.testing.assert_frame_equal(loaded, built, check_dtype=False, check_index_type=False)
+
+
+def test_first_script_builds_later_scripts_reuse(tables, data_dir, monkeypatch):
+    encounters, patients = tables
+    built = pf.patient_features(encounters, patients, data_dir=data_dir)
+    monkeypatch.setattr(pf, 'build_patient_features', None)
+    same_table(pf.patient_features(encounters, patients, data_dir=data_dir), built)
+
+
+def test_each_key_keeps_its_own_slot(tables, data_dir):
+    encounters, patients = tables
+    window = month_window('2018', '2019')
+    full = pf.patient_features(encounters, patients, data_dir=data_dir)
+    windowed_encounters = load_table('encounters', data_dir=data_dir, window=window)
+    windowed = pf.patient_features(windowed_encounters, patients, window=window, data_dir=data_dir)
+    assert len(windowed) < len(full)
+    slots = list((data_dir / CACHE_DIR / pf.FEATURES_DIR).iterdir())
+    assert len(slots) == 2
+    # Neither run overwrote the other's table
+    for key, expected in [(pf.feature_key(data_dir=data_dir), full),
+                          (pf.feature_key(window, data_dir=data_dir), windowed)]:
+        same_table(pf.load_patient_features(key, data_dir), expected)
+
+
+def test_changed_source_misses_and_old_slots_are_evicted(tables, data_dir):
+    encounters, patients = tables
+    features = pf.build_patient_features(encounters, patients)
+    key = pf.feature_key(data_dir=data_dir)
+    pf.save_patient_features(features, key, data_dir)
+    assert pf.load_patient_features({**key, 'patients': 'edited'}, data_dir) is None
+
+    for day in range(1, CACHE_SLOTS + 1):
+        pf.save_patient_features(features.iloc[:1], {**key, 'as_of': f'2000-01-{day:02d}'}, data_dir)
+    assert len(list((data_dir / CACHE_DIR / pf.FEATURES_DIR).iterdir())) == CACHE_SLOTS
+    # The first key was the least recently used, so it made room for the newest
+    assert pf.load_patient_features(key, data_dir) is None
+    assert pf.load_patient_features({**key, 'as_of': '2000-01-02'}, data_dir) is not None
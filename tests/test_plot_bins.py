@@ -0,0 +1,152 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from plot_bins import (PLOTLY_BUNDLE, density_grid, histogram, histogram_bar, plot_density,
+                       plot_histogram, stratified_sample, top_outliers, write_plotly_html)
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(1).lognormal(6, 1.2, 10_000),
+    np.random.default_rng(2).integers(0, 40, 10_000),
+    np.random.default_rng(3).integers(-5, 3, 1000).astype(np.int8),
+    np.array([7.0]),
+], ids=['costs', 'counts', 'narrow integers', 'single value'])
+@pytest.mark.parametrize('bins', [10, 50, [0, 1, 5, 20, 1000]])
+def test_counts_match_numpy(values, bins):
+    hist = histogram(values, bins=bins)
+    counts, edges = np.histogram(values, bins)
+    np.testing.assert_array_equal(hist.edges, edges)
+    np.testing.assert_array_equal(hist.counts, counts)
+    assert (hist.total, hist.mean, hist.median) == (len(values), pytest.approx(values.mean()),
+                                                    pytest.approx(np.median(values)))
+
+
+def test_missing_values_are_left_out():
+    values = np.array([1.0, np.nan, 2.0, np.inf, 3.0, -np.inf])
+    hist = histogram(values, bins=4, range=(0, 4))
+    np.testing.assert_array_equal(hist.counts, [0, 1, 1, 1])
+    assert hist.total == 3 and hist.mean == 2.0
+
+
+def test_log_bins_count_nonpositive_values_apart():
+    values = np.concatenate([np.random.default_rng(4).lognormal(5, 2, 5000), [0, 0, -3]])
+    hist = histogram(values, bins=30, log=True)
+    positive = values[values > 0]
+    np.testing.assert_allclose(np.diff(np.log(hist.edges)), np.log(hist.edges[1] / hist.edges[0]))
+    np.testing.assert_array_equal(hist.counts, np.histogram(positive, hist.edges)[0])
+    assert hist.nonpositive == 3 and hist.counts.sum() == len(positive)
+    assert hist.median == np.median(values)
+
+
+def test_bars_match_plt_hist():
+    values = np.random.default_rng(5).gamma(2, 3, 3000)
+    fig, (raw, binned) = plt.subplots(1, 2)
+    expected, _, _ = raw.hist(values, bins=25)
+    counts, _, patches = plot_histogram(binned, histogram(values, bins=25))
+    np.testing.assert_array_equal(counts, expected)
+    assert [p.get_height() for p in patches] == [p.get_height() for p in raw.patches]
+    plt.close(fig)
+
+
+def test_histogram_bar_spans_each_bin():
+    hist = histogram([1, 2, 2, 3, 9], bins=[0, 2, 4, 10])
+    bar = histogram_bar(hist, name='visits')
+    np.testing.assert_array_equal(bar.x, [1, 3, 7])
+    np.testing.assert_array_equal(bar.y, [1, 3, 1])
+    np.testing.assert_array_equal(bar.width, [2, 2, 6])
+    assert bar.name == 'visits'
+
+
+@pytest.fixture
+def bands():
+    """Rows of age bands of very different sizes, and a few without a band"""
+    sizes = {'0-17': 5, '18-34': 40, '35-54': 300, '55-74': 2000, '75+': 12}
+    band = np.concatenate([[name] * n for name, n in sizes.items()] + [[None] * 7])
+    np.random.default_rng(6).shuffle(band)
+    return pd.DataFrame({'band': band, 'row': np.arange(len(band))}), sizes
+
+
+def test_small_groups_pass_their_quota_on(bands):
+    frame, sizes = bands
+    sample = stratified_sample(frame, 'band', 300, random_state=0)
+    counts = sample['band'].value_counts()
+    assert len(sample) == 300 and sample['band'].notna().all()
+    # A quota of 60 each keeps the bands of 5, 12 and 40 rows whole; the other two share 243
+    assert counts['0-17'] == 5 and counts['75+'] == 12 and counts['18-34'] == 40
+    assert sorted(counts[['35-54', '55-74']]) == [121, 122]
+    assert sample.index.is_monotonic_increasing and sample['row'].is_unique
+
+
+def test_sample_is_random_but_reproducible(bands):
+    frame, _ = bands
+    first = stratified_sample(frame, frame['band'].to_numpy(), 100, random_state=1)
+    again = stratified_sample(frame, frame['band'].to_numpy(), 100, random_state=1)
+    other = stratified_sample(frame, frame['band'].to_numpy(), 100, random_state=2)
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.index.equals(other.index)
+
+
+def test_small_frames_are_kept_whole(bands):
+    frame, _ = bands
+    pd.testing.assert_frame_equal(stratified_sample(frame, 'band', 10_000),
+                                  frame[frame['band'].notna()])
+    assert stratified_sample(frame.iloc[:0], 'band', 10).empty
+
+
+def test_plotly_pages_share_one_bundle(tmp_path):
+    fig = go.Figure(go.Bar(x=[1, 2], y=[3, 4]))
+    write_plotly_html(fig, tmp_path / 'first.html')
+    write_plotly_html(fig, tmp_path / 'second.html')
+    assert (tmp_path / PLOTLY_BUNDLE).exists()
+    for page in ['first.html', 'second.html']:
+        html = (tmp_path / page).read_text()
+        assert f'src="{PLOTLY_BUNDLE}"' in html and len(html) < 100_000
+
+
+@pytest.fixture
+def patients():
+    rng = np.random.default_rng(7)
+    n = 20_000
+    return pd.DataFrame({'visits': rng.integers(1, 300, n).astype(float),
+                         'cost': rng.lognormal(8, 1.5, n)})
+
+
+def test_density_matches_histogram2d(patients):
+    grid = density_grid(patients['visits'], patients['cost'], bins=(40, 30))
+    counts, x_edges, y_edges = np.histogram2d(patients['visits'], patients['cost'], bins=(40, 30))
+    np.testing.assert_allclose(grid.x_edges, x_edges)
+    np.testing.assert_allclose(grid.y_edges, y_edges)
+    np.testing.assert_array_equal(grid.counts, counts)
+    assert grid.total == len(patients) and grid.excluded == 0
+
+
+def test_log_axes_exclude_points_they_cannot_place(patients):
+    patients.loc[:9, 'cost'] = 0.0
+    patients.loc[10:14, 'visits'] = np.nan
+    grid = density_grid(patients['visits'], patients['cost'], bins=50, log=(False, True))
+    assert grid.excluded == 15 and grid.counts.sum() == grid.total == len(patients) - 15
+    assert grid.log == (False, True)
+    np.testing.assert_allclose(np.diff(np.log(grid.y_edges)), np.log(grid.y_edges[1] / grid.y_edges[0]))
+    placed = patients.iloc[15:]
+    counts, _, _ = np.histogram2d(placed['visits'], np.log(placed['cost']),
+                                  bins=(grid.x_edges, np.log(grid.y_edges)))
+    # Cells are found by scaling each value, so only rounding at an edge may differ
+    assert np.abs(grid.counts - counts).sum() <= 2
+
+
+def test_density_draws_only_occupied_cells(patients):
+    grid = density_grid(patients['visits'], patients['cost'], bins=20, log=True)
+    fig, ax = plt.subplots()
+    mesh = plot_density(ax, grid)
+    assert mesh.get_array().count() == (grid.counts > 0).sum()
+    assert (ax.get_xscale(), ax.get_yscale()) == ('log', 'log')
+    plt.close(fig)
+
+
+def test_top_outliers_are_the_largest_of_any_column(patients):
+    rows = top_outliers(patients, ['visits', 'cost'], top=5)
+    expected = patients.nlargest(5, 'visits').index.union(patients.nlargest(5, 'cost').index)
+    assert set(rows.index) == set(expected) and rows.index.is_unique
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from readmissions import READMISSION_WINDOWS, readmission_gaps, readmission_report
+
+
+def naive_gaps(encounters):
+    """Per row, days to the same patient's next inpatient START at or after its STOP"""
+    gaps = np.full(len(encounters), np.nan)
+    admissions = encounters[(encounters['ENCOUNTERCLASS'] == 'inpatient')
+                            & encounters['START'].notna()]
+    for i, row in enumerate(encounters.itertuples(index=False)):
+        if pd.isna(row.STOP):
+            continue
+        later = admissions[(admissions['PATIENT'] == row.PATIENT)
+                           & (admissions['START'] >= row.STOP)
+                           & (admissions.index != encounters.index[i])]
+        if len(later):
+            gaps[i] = (later['START'].min() - row.STOP).total_seconds() / 86400
+    return gaps
+
+
+def test_gaps_match_naive_loop(encounters):
+    np.testing.assert_array_equal(readmission_gaps(encounters), naive_gaps(encounters))
+
+
+def test_admission_at_discharge_counts(encounters):
+    gaps = readmission_gaps(encounters)
+    assert gaps[0] == 0
+
+
+def test_zero_length_admission_is_not_its_own_readmission():
+    start = pd.Timestamp('2021-05-01 08:00')
+    encounters = pd.DataFrame({
+        'PATIENT': ['a', 'a', 'b'],
+        'START': [start, start + pd.Timedelta(days=2), start],
+        'STOP': [start, start + pd.Timedelta(days=3), start],
+        'ENCOUNTERCLASS': ['inpatient'] * 3,
+    })
+    np.testing.assert_array_equal(readmission_gaps(encounters), [2, np.nan, np.nan])
+
+
+def test_overall_rates_match_naive_loop(encounters):
+    report = readmission_report(encounters)
+    gaps = naive_gaps(encounters)
+    inpatient = encounters['ENCOUNTERCLASS'] == 'inpatient'
+    index = (inpatient & encounters['STOP'].notna()).to_numpy()
+    end = encounters.loc[inpatient, 'START'].max()
+
+    assert report['overall']['STAYS'] == index.sum()
+    for days in READMISSION_WINDOWS:
+        followed = index & (encounters['STOP'] <= end - pd.Timedelta(days=days)).to_numpy()
+        expected = (gaps[followed] <= days).mean() * 100
+        assert np.isclose(report['overall'][f'RATE_{days}D'], expected)
@@ -0,0 +1,58 @@
+import os
+
+import matplotlib.pyplot as plt
+import pytest
+
+from render import Dashboard, render_dashboards
+
+
+def draw_bars(inputs):
+    fig, ax = plt.subplots()
+    ax.bar(range(len(inputs['counts'])), inputs['counts'])
+    fig.savefig(inputs['path'])
+    plt.close(fig)
+    print(f"drew {os.path.basename(inputs['path'])}")
+    with open(f"{inputs['path']}.pid", 'w') as f:
+        f.write(str(os.getpid()))
+
+
+def draw_nothing(inputs):
+    raise RuntimeError(f"cannot draw {inputs['path']}")
+
+
+def dashboards(tmp_path, names, draw=draw_bars):
+    computed = []
+
+    def inputs(name):
+        computed.append((name, os.getpid()))
+        return {'counts': [3, 1, 2], 'path': str(tmp_path / f'{name}.png')}
+
+    return computed, [Dashboard(name, lambda name=name: inputs(name), draw, [str(tmp_path / f'{name}.png')])
+                      for name in names]
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_every_dashboard_is_drawn_once(tmp_path, workers, capsys):
+    names = ['first', 'second', 'third']
+    computed, boards = dashboards(tmp_path, names)
+    render_dashboards(boards, workers=workers, cache_dir=tmp_path / 'cache')
+
+    # Inputs are computed here, in dashboard order; drawing happens in forked workers
+    assert computed == [(name, os.getpid()) for name in names]
+    pids = {int((tmp_path / f'{name}.png.pid').read_text()) for name in names}
+    assert all((tmp_path / f'{name}.png').stat().st_size > 0 for name in names)
+    if workers == 1:
+        assert pids == {os.getpid()}
+    else:
+        assert os.getpid() not in pids
+    # Output comes out in dashboard order whatever finished first
+    out = capsys.readouterr().out
+    assert [out.index(f'drew {name}.png') for name in names] == sorted(
+        out.index(f'drew {name}.png') for name in names)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_draw_errors_propagate(tmp_path, workers):
+    _, boards = dashboards(tmp_path, ['first', 'second'], draw=draw_nothing)
+    with pytest.raises(RuntimeError, match='cannot draw'):
+        render_dashboards(boards, workers=workers, cache_dir=tmp_path / 'cache')
@@ -0,0 +1,85 @@
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from render import Dashboard, render_dashboards
+from render_cache import RenderCache, draw_sources, render_key
+
+visualizations = importlib.import_module('02_ai_visualizations')
+draw = visualizations.draw_demographic_dashboard
+
+
+def inputs_frame():
+    return pd.DataFrame({
+        'PATIENT': ['a', 'b', None],
+        'START': pd.to_datetime(['2020-01-01 10:00', '2021-06-30 23:15', None]),
+        'COST': [1.5, np.nan, 3.0],
+        'VISITS': [1, 2, 3],
+    })
+
+
+def test_key_survives_parquet_round_trip(tmp_path):
+    frame = inputs_frame()
+    frame.to_parquet(tmp_path / 'inputs.parquet')
+    loaded = pd.read_parquet(tmp_path / 'inputs.parquet')
+    assert render_key(draw, {'table': frame}) == render_key(draw, {'table': loaded})
+    assert (render_key(draw, {'counts': frame['PATIENT'].value_counts()})
+            == render_key(draw, {'counts': loaded['PATIENT'].value_counts()}))
+
+
+def test_key_follows_inputs():
+    frame = inputs_frame()
+    changed = inputs_frame()
+    changed.loc[0, 'COST'] = 1.25
+    assert render_key(draw, {'table': frame}) != render_key(draw, {'table': changed})
+
+
+def test_sources_include_helpers():
+    sources = draw_sources(draw)
+    assert '02_ai_visualizations.draw_demographic_dashboard' in sources
+    assert 'plot_bins.plot_histogram' in sources
+
+
+def test_render_cache_manifest(tmp_path):
+    output = tmp_path / 'dashboard.png'
+    output.write_bytes(b'png')
+    cache = RenderCache(cache_dir=tmp_path / 'cache')
+    assert not cache.is_current('dashboard', 'k1', [str(output)])
+    cache.record('dashboard', 'k1', [str(output)])
+
+    cache = RenderCache(cache_dir=tmp_path / 'cache')
+    assert cache.is_current('dashboard', 'k1', [str(output)])
+    assert not cache.is_current('dashboard', 'k2', [str(output)])
+    assert not RenderCache(force=True, cache_dir=tmp_path / 'cache').is_current(
+        'dashboard', 'k1', [str(output)])
+
+    output.write_bytes(b'edited')
+    os.utime(output, ns=(0, 0))
+    assert not cache.is_current('dashboard', 'k1', [str(output)])
+
+
+def test_unchanged_dashboards_are_skipped(tmp_path, capsys):
+    drawn = []
+    counts = {'value': [3, 1, 2]}
+
+    def draw_counts(inputs):
+        drawn.append(list(inputs['counts']))
+        (tmp_path / 'counts.png').write_bytes(repr(inputs['counts']).encode())
+
+    def render(**options):
+        board = Dashboard('counts', lambda: {'counts': list(counts['value'])}, draw_counts,
+                          [str(tmp_path / 'counts.png')])
+        render_dashboards([board], workers=1, cache_dir=tmp_path / 'cache', **options)
+
+    render()
+    render()
+    assert drawn == [[3, 1, 2]]
+    assert 'Unchanged' in capsys.readouterr().out
+    render(force=True)
+    counts['value'] = [3, 1, 5]
+    render()
+    (tmp_path / 'counts.png').unlink()
+    render()
+    assert drawn == [[3, 1, 2], [3, 1, 2], [3, 1, 5], [3, 1, 5]]
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import Scheduler, Stage, dependencies
+
+
+def test_dependencies():
+    stages = [
+        Stage('load', None, [], ['data']),
+        Stage('left', None, ['data'], ['left']),
+        Stage('right', None, ['data'], ['right']),
+        Stage('report', None, ['left', 'right']),
+        Stage('reload', None, [], ['data']),
+    ]
+    # Writing 'data' again waits for its writer and every stage that read it
+    assert dependencies(stages) == [set(), {0}, {0}, {1, 2}, {0, 1, 2}]
+
+
+def diamond(log, lock):
+    def step(name, inputs, outputs, delay=0.0):
+        def run():
+            time.sleep(delay)
+            with lock:
+                log.append(name)
+            print(f'{name} done')
+            return {output: name for output in outputs}
+        return Stage(name, run, inputs, outputs)
+    return [
+        step('load', [], ['data']),
+        step('slow', ['data'], ['slow'], delay=0.2),
+        step('fast', ['data'], ['fast']),
+        step('join', ['slow', 'fast'], ['report']),
+    ]
+
+
+@pytest.mark.parametrize('workers,executor', [(1, 'thread'), (3, 'thread'), (3, 'process')])
+def test_scheduler_runs_after_dependencies(workers, executor, capsys):
+    log, lock = [], threading.Lock()
+    published = {}
+    Scheduler(diamond(log, lock), workers, executor).run(published.update)
+
+    assert published == {'data': 'load', 'slow': 'slow', 'fast': 'fast', 'report': 'join'}
+    # Output is printed in declaration order whatever order the stages finish in
+    assert capsys.readouterr().out.split('\n')[:4] == ['load done', 'slow done', 'fast done',
+                                                        'join done']
+    if executor == 'thread':
+        assert log[0] == 'load' and log[-1] == 'join'
+        if workers > 1:
+            assert log.index('fast') < log.index('slow')
+
+
+def test_stage_errors_propagate():
+    def fail():
+        raise RuntimeError('stage failed')
+    with pytest.raises(RuntimeError, match='stage failed'):
+        Scheduler([Stage('ok', dict, [], ['a']), Stage('fail', fail, ['a'])], 2).run(dict)
+
+
+def test_unknown_executor():
+    with pytest.raises(ValueError, match='Unknown executor'):
+        Scheduler([], executor='cluster')
@@ -0,0 +1,49 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+import schema
+from conftest import REPO_DIR
+
+
+def test_every_documented_column_is_declared():
+    assert schema.check_dictionary(REPO_DIR / schema.DICTIONARY_FILE) == {}
+
+
+def test_column_names_follow_the_csv_headers():
+    assert schema.column_name('Base_Encounter_Cost') == 'BASE_ENCOUNTER_COST'
+    assert schema.column_name('FIPS County Code') == 'FIPS'
+    assert schema.column_name('Id') == 'Id'
+
+
+def test_read_applies_the_registry_types():
+    csv = io.StringIO(
+        "Id,START,STOP,PATIENT,ORGANIZATION,PAYER,ENCOUNTERCLASS,CODE,DESCRIPTION,"
+        "BASE_ENCOUNTER_COST,TOTAL_CLAIM_COST,PAYER_COVERAGE,REASONCODE,REASONDESCRIPTION\n"
+        "e1,2020-01-02T03:04Z,2020-01-02T05:00Z,p1,o1,y1,inpatient,185347001,Visit,"
+        "85.55,100.25,0.5,,\n"
+        "e2,2020-02-01T00:00Z,,p2,o1,y2,wellness,185349003,Check up,"
+        "129.16,1000.0,0,72892002,Normal pregnancy\n"
+    )
+    df = schema.read_table_csv('encounters', csv)
+    assert df['Id'].dtype != 'category'
+    for col in ['PATIENT', 'ORGANIZATION', 'PAYER', 'ENCOUNTERCLASS']:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype), col
+    assert df['START'].dtype == 'datetime64[s]'
+    assert df['START'][0] == pd.Timestamp('2020-01-02 03:04')
+    assert pd.isna(df['STOP'][1])
+    # Costs with exact float32 values shrink; others keep full precision
+    assert df['TOTAL_CLAIM_COST'].dtype == np.float32
+    assert df['BASE_ENCOUNTER_COST'].dtype == np.float64
+    assert df['CODE'].dtype == np.int32
+
+
+def test_chunks_match_a_full_read(dataset_dir):
+    path = dataset_dir / 'procedures.csv'
+    full = schema.read_table_csv('procedures', path)
+    chunks = list(schema.iter_table_csv('procedures', path, chunksize=500))
+    assert len(chunks) > 1
+    combined = pd.concat(chunks, ignore_index=True)
+    # Chunks have their own category sets and downcasts, so compare values
+    pd.testing.assert_frame_equal(combined, full, check_dtype=False, check_categorical=False)
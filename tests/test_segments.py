@@ -0,0 +1,76 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from partials import ValueHistogram
+from segments import SegmentStore
+from sketches import DistinctCounter
+
+
+def saved_runs(structure, parts, fold, store):
+    """Fold ``parts`` in one save at a time, reloading the pickled copy after each"""
+    for part in parts:
+        fold(structure, part)
+        store.referenced = set()
+        structure = pickle.loads(pickle.dumps(structure.persisted(store)))
+        store.collect()
+    return structure
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SegmentStore(tmp_path / 'state')
+
+
+def test_histogram_over_segments_matches_series(store):
+    values = pd.Series(np.random.default_rng(16).integers(0, 2000, 30_000) / 8)
+    parts = [values[start:start + size] for start, size in
+             zip(np.cumsum([0, 9000, 4000, 4000, 6000, 2000]), [9000, 4000, 4000, 6000, 2000, 5000])]
+    histogram = saved_runs(ValueHistogram(), parts[:-1],
+                           lambda h, part: h.merge(ValueHistogram.from_values(part)), store)
+    # Segments of similar size were merged, so there are fewer than saves
+    assert 1 < len(histogram.segments) < len(parts) - 1
+    assert len(list(store.path.glob('*.npy'))) == 3 * len(histogram.segments)
+    histogram.merge(ValueHistogram.from_values(parts[-1]))
+
+    assert len(histogram) == len(values)
+    for q in [0, 0.1, 0.5, 0.9, 0.999, 1]:
+        assert histogram.quantile(q) == pytest.approx(values.quantile(q))
+    threshold = values.quantile(0.9)
+    assert histogram.count_above(threshold) == (values > threshold).sum()
+    assert histogram.sum_above(threshold) == pytest.approx(values[values > threshold].sum())
+
+
+def test_distinct_counts_over_segments(store):
+    rng = np.random.default_rng(17)
+    n = 12_000
+    # Labels of several lengths, non-ASCII ones among them
+    labels = np.array([f'ü{i}' * (1 + i % 3) for i in range(3000)], dtype=object)
+    visits = pd.DataFrame({'PATIENT': labels[rng.integers(0, 3000, n)],
+                           'REASON': rng.choice(['a', 'bb', 'ççç'], n)})
+    parts = [visits[start:start + 2000] for start in range(0, n, 2000)]
+
+    overall = saved_runs(DistinctCounter(), parts[:-1],
+                         lambda c, part: c.update(part['PATIENT']), store)
+    assert overall.segments and not len(overall.values)
+    overall.update(parts[-1]['PATIENT'].astype('category'))
+    assert overall.count() == visits['PATIENT'].nunique()
+
+    grouped = saved_runs(DistinctCounter(grouped=True), parts[:-1],
+                         lambda c, part: c.update(part['REASON'], part['PATIENT']),
+                         SegmentStore(store.path.with_name('grouped')))
+    grouped.merge(DistinctCounter(grouped=True).update(parts[-1]['REASON'], parts[-1]['PATIENT']))
+    pd.testing.assert_series_equal(grouped.counts().sort_index(),
+                                   visits.groupby('PATIENT')['REASON'].nunique(),
+                                   check_names=False, check_index_type=False)
+
+
+def test_saving_leaves_the_live_structure_alone(store):
+    histogram = ValueHistogram.from_values([1.0, 2.0, 2.0])
+    persisted = histogram.persisted(store)
+    assert persisted.segments and not histogram.segments
+    assert histogram.median() == persisted.median() == 2.0
+    with pytest.raises(ValueError):
+        ValueHistogram().merge(persisted)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import DistinctCounter, LabelDictionary, QuantileSketch, TopKSketch, top_values
+
+
+def chunks(values, size=1000):
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+@pytest.fixture
+def visits():
+    """Patient and organization of each visit: a few large organizations and many small ones"""
+    rng = np.random.default_rng(3)
+    n = 20_000
+    organization = np.where(rng.random(n) < 0.8, rng.integers(0, 4, n), rng.integers(4, 200, n))
+    return pd.DataFrame({'PATIENT': rng.integers(0, 8000, n).astype(str),
+                         'ORGANIZATION': organization.astype(str)})
+
+
+def grouped_counter(visits, approximate, chunked):
+    counter = DistinctCounter(grouped=True, approximate=approximate)
+    for part in chunks(visits) if chunked else [visits]:
+        counter.merge(DistinctCounter(grouped=True, approximate=approximate)
+                      .update(part['PATIENT'], part['ORGANIZATION']))
+    return counter.counts()
+
+
+def test_exact_distinct_count(visits):
+    counter = DistinctCounter()
+    for part in chunks(visits['PATIENT']):
+        counter.merge(DistinctCounter().update(part))
+    assert counter.count() == visits['PATIENT'].nunique()
+
+
+def test_exact_counts_of_categorical_chunks(visits):
+    """Chunks with categories of their own, unused ones among them, count like the whole column"""
+    expected = visits.groupby('ORGANIZATION')['PATIENT'].nunique()
+    overall, grouped = DistinctCounter(), DistinctCounter(grouped=True)
+    for part in chunks(visits):
+        patients = part['PATIENT'].astype(pd.CategoricalDtype(
+            part['PATIENT'].unique().tolist() + ['never-seen']))
+        overall.update(patients)
+        grouped.update(patients, part['ORGANIZATION'].astype('category'))
+    assert overall.count() == visits['PATIENT'].nunique()
+    assert 'never-seen' not in overall.values.labels
+    pd.testing.assert_series_equal(grouped.counts().sort_index(), expected,
+                                   check_names=False, check_index_type=False)
+
+
+def test_label_ids_are_stable():
+    dictionary = LabelDictionary()
+    first = dictionary.intern(['a', 'b', 'c'])
+    for i in range(50):
+        dictionary.intern([f'x{i}', 'a'])
+    assert list(dictionary.lookup(['a', 'b', 'c', 'missing'])) == list(first) + [-1]
+    assert list(dictionary.labels[:3]) == ['a', 'b', 'c'] and len(dictionary) == 53
+    # Blocks merge like a binary counter
+    assert len(dictionary.blocks) <= 6
+
+
+def test_approximate_distinct_count(visits):
+    counter = DistinctCounter(approximate=True).update(visits['PATIENT'])
+    assert counter.count() == pytest.approx(visits['PATIENT'].nunique(), rel=0.03)
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_grouped_exact_counts(visits, chunked):
+    expected = visits.groupby('ORGANIZATION')['PATIENT'].nunique()
+    counts = grouped_counter(visits, approximate=False, chunked=chunked)
+    pd.testing.assert_series_equal(counts.sort_index(), expected, check_names=False,
+                                   check_index_type=False)
+
+
+def test_grouped_approximate_counts(visits):
+    expected = visits.groupby('ORGANIZATION')['PATIENT'].nunique()
+    counts = grouped_counter(visits, approximate=True, chunked=True).reindex(expected.index)
+    limit = DistinctCounter(grouped=True, approximate=True).sparse_limit
+    small = expected <= limit
+    # Groups below the sparse limit are still counted exactly
+    assert small.any() and (~small).any()
+    pd.testing.assert_series_equal(counts[small], expected[small], check_names=False)
+    np.testing.assert_allclose(counts[~small], expected[~small], rtol=0.1)
+    # Registers merge like one pass over all the rows
+    pd.testing.assert_series_equal(grouped_counter(visits, approximate=True, chunked=False)
+                                   .reindex(expected.index), counts)
+
+
+def test_quantile_sketch():
+    values = np.random.default_rng(4).lognormal(8, 1, 50_000)
+    sketch = QuantileSketch()
+    for part in chunks(values):
+        sketch.merge(QuantileSketch.from_values(part))
+    assert len(sketch) == len(values) and not sketch.exact
+    for q in [0.1, 0.5, 0.9, 0.99]:
+        estimate_rank = (values < sketch.quantile(q)).mean()
+        assert estimate_rank == pytest.approx(q, abs=0.01)
+    threshold = np.quantile(values, 0.9)
+    assert sketch.count_above(threshold) == pytest.approx((values > threshold).sum(), rel=0.02)
+    assert sketch.sum_above(threshold) == pytest.approx(values[values > threshold].sum(), rel=0.02)
+
+
+def test_quantile_sketch_is_exact_when_small():
+    values = pd.Series(np.random.default_rng(5).normal(size=300))
+    sketch = QuantileSketch.from_values(values)
+    assert sketch.exact
+    assert sketch.median() == pytest.approx(values.median())
+    assert sketch.count_above(0.5) == (values > 0.5).sum()
+
+
+def test_top_k_sketch_bounds():
+    values = pd.Series(np.random.default_rng(6).zipf(1.3, 50_000) % 5000).astype(str)
+    sketch = TopKSketch(capacity=200)
+    for part in chunks(values):
+        sketch.merge(TopKSketch.from_values(part, capacity=200))
+    true = values.value_counts()
+    top = sketch.top(10)
+    assert list(top.index) == list(true.index[:10])
+    assert (sketch.guaranteed(10) <= true[top.index]).all()
+    assert (top >= true[top.index]).all()
+
+
+def test_top_values_match_value_counts():
+    values = pd.Series(np.random.default_rng(18).zipf(1.5, 30_000) % 300).astype(str).astype('category')
+    top = top_values(values, 15, chunksize=1000)
+    expected = values.value_counts()
+    # Below the capacity the counts are exact; ties are ordered by label
+    assert top.to_dict() == expected[top.index].to_dict()
+    assert list(top) == list(expected.head(15))
@@ -0,0 +1,55 @@
+import importlib
+import json
+import shutil
+
+import pandas as pd
+import pytest
+
+analysis = importlib.import_module('01_ai_analysis_main')
+
+
+def run_analysis(**options):
+    """Insights of a full pipeline run in the current directory, as saved to JSON"""
+    analysis.AIHospitalAnalyzer(**options).run(workers=1)
+    with open('ai_analysis_insights.json') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def in_memory_insights(dataset_dir):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(dataset_dir)
+        return run_analysis()
+
+
+@pytest.mark.parametrize('chunksize', [97, 1000])
+def test_streaming_matches_in_memory(dataset_dir, in_memory_insights, chunksize, monkeypatch):
+    monkeypatch.chdir(dataset_dir)
+    assert run_analysis(streaming=True, chunksize=chunksize) == in_memory_insights
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_concurrent_stages_match_serial_run(dataset_dir, in_memory_insights, executor, monkeypatch):
+    monkeypatch.chdir(dataset_dir)
+    analysis.AIHospitalAnalyzer().run(workers=4, executor=executor)
+    with open('ai_analysis_insights.json') as f:
+        assert json.load(f) == in_memory_insights
+
+
+def test_deltas_match_full_run(dataset_dir, in_memory_insights, tmp_path, monkeypatch):
+    for path in dataset_dir.glob('*.csv'):
+        shutil.copy(path, tmp_path / path.name)
+    monkeypatch.chdir(tmp_path)
+
+    # Hold the last encounters (and their procedures) back as a delta
+    encounters = pd.read_csv('encounters.csv', dtype=str, keep_default_na=False)
+    procedures = pd.read_csv('procedures.csv', dtype=str, keep_default_na=False)
+    late = procedures['ENCOUNTER'].isin(encounters['Id'].iloc[-200:])
+    encounters.iloc[:-200].to_csv('encounters.csv', index=False)
+    encounters.iloc[-200:].to_csv('delta_encounters.csv', index=False)
+    procedures[~late].to_csv('procedures.csv', index=False)
+    procedures[late].to_csv('delta_procedures.csv', index=False)
+
+    run_analysis()
+    deltas = {'encounters': 'delta_encounters.csv', 'procedures': 'delta_procedures.csv'}
+    assert run_analysis(deltas=deltas) == in_memory_insights
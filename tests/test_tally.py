@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+import tally
+from tally import Tally
+
+
+def chunk_tables(rng, count=200):
+    return [pd.DataFrame({'rows': 1, 'cost': rng.random(n)}, index=rng.choice(list('abcdefghij'), n))
+            .groupby(level=0).sum() for n in rng.integers(1, 30, count)]
+
+
+def test_tally_matches_concat_groupby(monkeypatch):
+    monkeypatch.setattr(tally, 'TALLY_PENDING_ROWS', 50)
+    tables = chunk_tables(np.random.default_rng(8))
+    left, right = Tally(), Tally()
+    for table in tables[:150]:
+        left.add(table)
+    for table in tables[150:]:
+        right.add(table)
+    expected = pd.concat(tables).groupby(level=0).sum()
+    pd.testing.assert_frame_equal(left.merge(right).total().sort_index(), expected)
+
+
+def test_tables_are_combined_once_they_outgrow_the_total(monkeypatch):
+    monkeypatch.setattr(tally, 'TALLY_PENDING_ROWS', 50)
+    summed = Tally()
+    for table in chunk_tables(np.random.default_rng(12), 100):
+        summed.add(table)
+        # The combined table has 10 labels, so at most 50 pending rows wait for it
+        assert summed.pending_rows <= 50
+    assert len(summed.total()) == 10 and not summed.pending
+
+
+def test_key_columns_and_rules():
+    rng = np.random.default_rng(13)
+    frames = [pd.DataFrame({'YEAR': rng.choice([2020.0, 2021.0, np.nan], 40),
+                            'CLASS': rng.choice(['a', 'b'], 40),
+                            'ROWS': 1, 'LOW': rng.random(40), 'HIGH': rng.random(40)})
+              for _ in range(5)]
+    rules = {'ROWS': 'sum', 'LOW': 'min', 'HIGH': 'max'}
+    combined = Tally(by=['YEAR', 'CLASS'], how=rules)
+    for frame in frames:
+        combined.add(frame)
+    expected = (pd.concat(frames).groupby(['YEAR', 'CLASS'], dropna=False, as_index=False)
+                .agg(rules))
+    pd.testing.assert_frame_equal(
+        combined.total().sort_values(['YEAR', 'CLASS']).reset_index(drop=True), expected)
+
+
+def test_multi_level_index():
+    index = pd.MultiIndex.from_tuples([('p1', 'x'), ('p1', 'y'), ('p2', 'x')])
+    combined = Tally().add(pd.Series([1, 2, 3], index=index)).add(pd.Series([4], index=index[:1]))
+    assert combined.total().to_dict() == {('p1', 'x'): 5, ('p1', 'y'): 2, ('p2', 'x'): 3}
+
+
+def test_empty_tally():
+    assert Tally().add(None).add(pd.Series(dtype='int64')).total() is None
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from timeparse import (MalformedTimestampError, calendar_fields, duration_hours, month_periods,
+                       parse_timestamps)
+
+
+def random_datetimes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(-80 * 525_960, 80 * 525_960, n)
+    return pd.Series(np.datetime64('1970-01-01T00:00', 's') + minutes * np.timedelta64(60, 's'))
+
+
+def test_timestamps_match_pandas():
+    dates = random_datetimes(5000)
+    text = pd.concat([dates.dt.strftime('%Y-%m-%dT%H:%MZ'),
+                      pd.Series(['2000-02-29T23:59Z', '1900-03-01T00:00Z', None, ''])],
+                     ignore_index=True)
+    expected = pd.to_datetime(text, format='%Y-%m-%dT%H:%MZ').to_numpy().astype('datetime64[s]')
+    np.testing.assert_array_equal(parse_timestamps(text), expected)
+
+
+def test_dates_match_pandas():
+    text = pd.concat([random_datetimes(5000, seed=1).dt.strftime('%Y-%m-%d'),
+                      pd.Series(['2024-02-29', None])], ignore_index=True)
+    expected = pd.to_datetime(text, format='%Y-%m-%d').to_numpy().astype('datetime64[s]')
+    np.testing.assert_array_equal(parse_timestamps(text, layout='date'), expected)
+
+
+@pytest.mark.parametrize('value', ['2023-02-29T10:00Z', '2023-13-01T10:00Z', '2023-01-01T24:00Z',
+                                   '2023-01-01 10:00Z', '2023-01-01T10:00', '2023-01-01T10:00Z+',
+                                   '2023-0a-01T10:00Z', 'é023-01-01T10:00Z'])
+def test_malformed_timestamps(value, capsys):
+    values = ['2023-01-01T10:00Z', value]
+    with pytest.raises(MalformedTimestampError) as error:
+        parse_timestamps(values)
+    assert error.value.rows == [1]
+
+    parsed = parse_timestamps(values, errors='report')
+    assert parsed[0] == np.datetime64('2023-01-01T10:00', 's')
+    assert np.isnat(parsed[1])
+    assert 'malformed timestamp' in capsys.readouterr().out
+
+
+def test_calendar_fields_match_dt_accessors():
+    dates = pd.concat([random_datetimes(5000, seed=2), pd.Series([pd.NaT])], ignore_index=True)
+    fields = calendar_fields(dates)
+    for name, accessor in [('year', 'year'), ('month', 'month'), ('day', 'day'),
+                           ('hour', 'hour'), ('weekday', 'weekday')]:
+        np.testing.assert_array_equal(fields[name], getattr(dates.dt, accessor).to_numpy(dtype=float))
+
+    periods = month_periods(dates)
+    expected = dates.dt.to_period('M').astype(str).where(dates.notna())
+    np.testing.assert_array_equal(np.asarray(periods, dtype=object)[:-1], expected[:-1].to_numpy())
+    assert pd.isna(periods[-1])
+
+
+def test_duration_hours():
+    start = random_datetimes(1000, seed=3)
+    stop = start + pd.to_timedelta(np.arange(1000) * 7, unit='min')
+    stop.iloc[0] = pd.NaT
+    expected = ((stop - start).dt.total_seconds() / 3600).to_numpy()
+    np.testing.assert_array_equal(duration_hours(start, stop), expected)
@@ -0,0 +1,75 @@
+import importlib
+import json
+
+import pytest
+
+import tracing
+
+analysis = importlib.import_module('01_ai_analysis_main')
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    """A fresh shared tracer, so spans recorded here do not leak into other tests"""
+    fresh = tracing.Tracer()
+    monkeypatch.setattr(tracing, 'TRACER', fresh)
+    return fresh
+
+
+class Stages:
+    def __init__(self, rows):
+        self.rows = rows
+
+    @tracing.stage(rows_in=lambda self: len(self.rows), rows_out=lambda self: len(self.rows))
+    def double(self):
+        with tracing.span('copy', rows_in=len(self.rows)) as current:
+            self.rows = self.rows * 2
+            current.set(rows_out=len(self.rows))
+        return 'done'
+
+    @tracing.stage('failing stage')
+    def fail(self):
+        raise KeyError('missing')
+
+
+def test_disabled_tracing_records_nothing(tracer):
+    assert Stages([1]).double() == 'done'
+    with tracing.span('ignored') as current:
+        current.set(rows_out=1)
+    assert tracer.events == []
+
+
+def test_stages_and_nested_spans(tracer, tmp_path):
+    tracing.enable()
+    assert Stages([1, 2, 3]).double() == 'done'
+    spans = {e['name']: e for e in tracer.events if e['ph'] == 'X'}
+    assert spans['double']['cat'] == 'stage' and spans['copy']['cat'] == 'step'
+    assert spans['double']['args']['rows_in'] == 3 and spans['double']['args']['rows_out'] == 6
+    assert spans['copy']['args']['rows_out'] == 6
+    outer, inner = spans['double'], spans['copy']
+    assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    counters = [e for e in tracer.events if e['ph'] == 'C']
+    assert len(counters) == 2 and all(e['args']['rss_mb'] > 0 for e in counters)
+
+    tracing.save(tmp_path / 'trace.json')
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    stamps = [e['ts'] for e in trace['traceEvents']]
+    assert stamps == sorted(stamps) and len(stamps) == 4
+
+
+def test_failed_stage_is_recorded_and_raised(tracer):
+    tracing.enable()
+    with pytest.raises(KeyError):
+        Stages([]).fail()
+    assert tracer.events[0]['name'] == 'failing stage'
+    assert tracer.events[0]['args']['error'] == 'KeyError'
+
+
+def test_analysis_writes_a_trace(data_dir, tracer, monkeypatch):
+    monkeypatch.chdir(data_dir)
+    analysis.main(['--trace', 'trace.json', '--workers', '1'])
+    events = json.loads((data_dir / 'trace.json').read_text())['traceEvents']
+    stages = {e['name']: e['args'] for e in events if e.get('cat') == 'stage'}
+    assert {'load', 'prepare_data', 'analyze_financial', 'identify_risk_factors'} <= set(stages)
+    assert stages['prepare_data']['rows_out'] > 0
+    assert 'analysis pipeline' in {e['name'] for e in events}
@@ -0,0 +1,196 @@
+"""
+Fixed-Layout Timestamp Parsing
+==============================
+Vectorized parser for the two date layouts documented in
+``data_dictionary.csv``:
+
+    timestamp   yyyy-MM-dd'T'HH:mm'Z'   (START, STOP)
+    date        YYYY-MM-DD              (BIRTHDATE, DEATHDATE)
+
+Values are decoded straight from their ASCII bytes into int64 seconds since
+the Unix epoch, with every row validated in bulk (separators, digits, field
+ranges and calendar dates). Malformed rows are reported, never coerced.
+
+The calendar helpers derive year/month/hour/weekday and durations from the
+integer epoch values instead of going through per-element datetime objects.
+"""
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86400
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Byte offsets of each field and of the fixed separator characters
+LAYOUTS = {
+    'timestamp': {
+        'width': 17,
+        'fields': {'year': (0, 4), 'month': (5, 7), 'day': (8, 10),
+                   'hour': (11, 13), 'minute': (14, 16)},
+        'separators': {4: b'-', 7: b'-', 10: b'T', 13: b':', 16: b'Z'},
+    },
+    'date': {
+        'width': 10,
+        'fields': {'year': (0, 4), 'month': (5, 7), 'day': (8, 10)},
+        'separators': {4: b'-', 7: b'-'},
+    },
+}
+
+
+class MalformedTimestampError(ValueError):
+    """Raised when values do not match the documented layout"""
+
+    def __init__(self, layout, rows, values):
+        self.layout = layout
+        self.rows = rows
+        self.values = values
+        sample = ', '.join(f'row {r}: {v!r}' for r, v in zip(rows[:5], values[:5]))
+        super().__init__(f"{len(rows):,} malformed {layout} value(s) ({sample})")
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for proleptic Gregorian dates (vectorized)"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def civil_from_days(days):
+    """(year, month, day) arrays for days since 1970-01-01 (vectorized)"""
+    z = days + 719468
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524
+                   - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    mp = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def _to_bytes(values, width):
+    """Fixed-width byte matrix of the values, one extra byte wide to catch over-long strings"""
+    try:
+        packed = np.asarray(values, dtype=f'S{width + 1}')
+    except UnicodeEncodeError:
+        encoded = [v.encode('utf-8') for v in values]
+        packed = np.asarray(encoded, dtype=f'S{width + 1}')
+    return packed.view(np.uint8).reshape(len(packed), width + 1)
+
+
+def parse_timestamps(values, layout='timestamp', errors='raise'):
+    """
+    Parse ISO-8601 strings in a fixed layout into ``datetime64[s]`` values.
+
+    Parameters
+    ----------
+    values : array-like of str
+        Strings to parse; nulls and empty strings become NaT.
+    layout : {'timestamp', 'date'}
+        Documented layout the values must follow.
+    errors : {'raise', 'report'}
+        'raise' raises MalformedTimestampError listing the bad rows;
+        'report' prints the same summary and returns NaT for those rows.
+    """
+    spec = LAYOUTS[layout]
+    width = spec['width']
+    values = pd.Series(values).to_numpy(dtype=object)
+    nulls = pd.isna(values) | (values == '')
+    filled = np.where(nulls, '', values)
+
+    raw = _to_bytes(filled, width)
+    valid = ~nulls & (raw[:, width] == 0)
+    for pos, char in spec['separators'].items():
+        valid &= raw[:, pos] == ord(char)
+
+    fields = {}
+    for name, (lo, hi) in spec['fields'].items():
+        digits = raw[:, lo:hi].astype(np.int64) - ord('0')
+        valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        fields[name] = (digits * 10 ** np.arange(hi - lo - 1, -1, -1)).sum(axis=1)
+
+    year, month, day = fields['year'], fields['month'], fields['day']
+    hour = fields.get('hour', np.zeros_like(year))
+    minute = fields.get('minute', np.zeros_like(year))
+    valid &= (month >= 1) & (month <= 12) & (hour < 24) & (minute < 60)
+
+    days = days_from_civil(year, np.clip(month, 1, 12), day)
+    # A day outside its month (e.g. Feb 30) does not survive the round trip
+    _, check_month, check_day = civil_from_days(days)
+    valid &= (check_month == month) & (check_day == day)
+
+    malformed = np.flatnonzero(~valid & ~nulls)
+    if len(malformed):
+        error = MalformedTimestampError(layout, malformed.tolist(), values[malformed].tolist())
+        if errors == 'raise':
+            raise error
+        print(f"  ⚠️  {error}")
+
+    seconds = days * SECONDS_PER_DAY + hour * 3600 + minute * 60
+    seconds[~valid] = np.iinfo(np.int64).min  # NaT
+    return seconds.view('datetime64[s]')
+
+
+def epoch_seconds(dates):
+    """int64 seconds since the epoch and a validity mask for a datetime Series or array"""
+    if isinstance(getattr(dates, 'dtype', None), pd.DatetimeTZDtype):
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    values = np.asarray(dates)
+    valid = ~np.isnat(values)
+    return values.astype('datetime64[s]').view(np.int64), valid
+
+
+def calendar_fields(dates):
+    """
+    Year, month, day, hour and weekday (Monday=0) of datetimes, derived from
+    their integer epoch values. Fields are float with NaN where the date is NaT.
+    """
+    seconds, valid = epoch_seconds(dates)
+    days = seconds // SECONDS_PER_DAY
+    year, month, day = civil_from_days(days)
+    fields = {
+        'year': year,
+        'month': month,
+        'day': day,
+        'hour': (seconds - days * SECONDS_PER_DAY) // 3600,
+        'weekday': (days + 3) % 7,  # 1970-01-01 was a Thursday
+    }
+    if not valid.all():
+        fields = {name: np.where(valid, field, np.nan) for name, field in fields.items()}
+    return fields
+
+
+def named(codes, names):
+    """Categorical of names (e.g. MONTH_NAMES) from zero-based codes, NaN -> missing"""
+    codes = np.where(np.isnan(codes), -1, codes) if codes.dtype.kind == 'f' else codes
+    return pd.Categorical.from_codes(codes.astype(np.int8), categories=names)
+
+
+def month_periods(dates):
+    """'YYYY-MM' labels for datetimes, like ``dt.to_period('M').astype(str)``, as a
+    Categorical whose categories run in calendar order"""
+    fields = calendar_fields(dates)
+    month_index = fields['year'] * 12 + fields['month'] - 1
+    valid = ~np.isnan(month_index) if month_index.dtype.kind == 'f' else np.ones(len(month_index), bool)
+    if not valid.any():
+        return pd.Categorical.from_codes(np.full(len(month_index), -1), categories=[])
+    first, last = int(month_index[valid].min()), int(month_index[valid].max())
+    labels = [f'{i // 12:04d}-{i % 12 + 1:02d}' for i in range(first, last + 1)]
+    codes = np.where(valid, month_index - first, -1).astype(np.int32)
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def duration_hours(start, stop):
+    """Hours between two datetime columns, computed on the integer epoch values"""
+    start_seconds, start_valid = epoch_seconds(start)
+    stop_seconds, stop_valid = epoch_seconds(stop)
+    hours = (stop_seconds - start_seconds) / 3600
+    return np.where(start_valid & stop_valid, hours, np.nan)
@@ -0,0 +1,159 @@
+"""
+Pipeline Tracing
+================
+Built-in instrumentation for the analysis pipeline. Each stage, and any
+expensive sub-step nested inside it, is recorded as a span with its start and
+end time, rows in/out and the change in resident memory.
+
+Spans are written as a Chrome trace-event JSON file: open it in
+``chrome://tracing`` or https://ui.perfetto.dev to see the stages as a flame
+chart, with a resident-memory counter track underneath.
+
+Tracing is off by default; a disabled span costs a single flag check. Turn it
+on with ``enable()`` (``--trace PATH`` on ``01_ai_analysis_main.py``).
+
+    @stage(rows_out=lambda self: len(self.result))
+    def analyze(self):
+        with span('groupby PATIENT', rows_in=len(df)) as s:
+            stats = df.groupby('PATIENT').sum()
+            s.set(rows_out=len(stats))
+"""
+
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (the peak where the current value is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except OSError:
+        # ru_maxrss is KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class Span:
+    """An open span; ``set`` attaches arguments such as rows_in/rows_out"""
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+class _NullSpan:
+    """Stand-in yielded while tracing is disabled"""
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects spans as Chrome trace events"""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._origin = time.perf_counter_ns()
+
+    def _now_us(self):
+        return (time.perf_counter_ns() - self._origin) / 1000
+
+    @contextmanager
+    def span(self, name, category='step', **args):
+        """Record the enclosed block as a complete ('X') event"""
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        current = Span(name, dict(args))
+        rss_start = current_rss_mb()
+        start = self._now_us()
+        try:
+            yield current
+        except BaseException as exc:
+            current.set(error=type(exc).__name__)
+            raise
+        finally:
+            end = self._now_us()
+            rss_end = current_rss_mb()
+            current.set(rss_start_mb=round(rss_start, 1),
+                        rss_delta_mb=round(rss_end - rss_start, 1))
+            pid, tid = os.getpid(), threading.get_ident()
+            self.events.append({
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': start, 'dur': end - start, 'pid': pid, 'tid': tid,
+                'args': current.args,
+            })
+            self.events.append({
+                'name': 'rss_mb', 'ph': 'C', 'ts': end, 'pid': pid,
+                'args': {'rss_mb': round(rss_end, 1)},
+            })
+
+    def save(self, path):
+        """Write the collected events as a Chrome trace JSON file"""
+        trace = {
+            'traceEvents': sorted(self.events, key=lambda e: e['ts']),
+            'displayTimeUnit': 'ms',
+            'otherData': {'command': ' '.join(sys.argv)},
+        }
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+
+
+TRACER = Tracer()
+
+
+def enable():
+    """Start recording spans on the shared tracer"""
+    TRACER.enabled = True
+
+
+def span(name, **args):
+    """Context manager recording a nested sub-step on the shared tracer"""
+    return TRACER.span(name, **args)
+
+
+def save(path):
+    """Write the shared tracer's events to ``path``"""
+    TRACER.save(path)
+
+
+def stage(name=None, rows_in=None, rows_out=None):
+    """
+    Decorator recording a method call as a pipeline stage.
+
+    ``rows_in`` and ``rows_out`` are optional callables taking the instance,
+    evaluated before and after the call (e.g. ``lambda self: len(self.df)``).
+    """
+    def decorator(method):
+        label = name or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not TRACER.enabled:
+                return method(self, *args, **kwargs)
+            with TRACER.span(label, category='stage') as current:
+                if rows_in is not None:
+                    current.set(rows_in=rows_in(self))
+                result = method(self, *args, **kwargs)
+                if rows_out is not None:
+                    current.set(rows_out=rows_out(self))
+                return result
+        return wrapper
+    return decorator